@@ -2,29 +2,67 @@
 # ---------------------------------------------------------------------------
 # Initialization for AKUTILS package
 # Author: Timm Nawrocki and Matt Macander
-# Last Updated: 2025-12-18
+# Last Updated: 2026-10-17
 # Usage: Individual functions have varying requirements.
 # Description: The AKUTILS package contains helper functions used across scripts for the AKVEG Map project (including the AKVEG Database).
 # ---------------------------------------------------------------------------
 
 # Import functions from modules
+from .compute_spectral_metrics import compute_spectral_features
+from .compute_spectral_metrics import compute_spectral_rasters
+from .compute_spectral_metrics import foliar_cover_predictor_chunks
 from .compute_spectral_metrics import foliar_cover_predictors
 from .compute_spectral_metrics import impute_band_data
+from .compute_spectral_metrics import impute_band_raster
 from .compute_spectral_metrics import normalized_index
+from .compute_spectral_metrics import normalized_index_raster
+from .compute_spectral_metrics import predict_covariate_chunks
+from .compute_spectral_metrics import read_covariate_chunks
+from .connect_database_postgresql import PostgreSQLConnectionPool
+from .connect_database_postgresql import authentication_parameters
 from .connect_database_postgresql import connect_database_postgresql
+from .connect_database_postgresql import connection_pool_postgresql
 from .determine_optimal_threshold import determine_optimal_threshold
+from .determine_optimal_threshold import presence_threshold_counts
+from .determine_optimal_threshold import sweep_presence_thresholds
 from .determine_optimal_threshold import test_presence_threshold
 from .determine_optimal_threshold import x_wrong_threshold
 from .dictionary_response import get_attribute_code_block
 from .dictionary_response import get_response
+from .end_timing import Profiler
+from .end_timing import disable_profiling
+from .end_timing import enable_profiling
 from .end_timing import end_timing
+from .end_timing import get_profiler
+from .end_timing import span
+from .end_timing import timed
+from .geodatabase_to_dataframe import ArcpyTableReader
+from .geodatabase_to_dataframe import DataFrameTableReader
+from .geodatabase_to_dataframe import geodatabase_snapshot
 from .geodatabase_to_dataframe import geodatabase_to_dataframe
+from .lgbm_to_gee import compact_tree_string
+from .lgbm_to_gee import compare_gee_trees
+from .lgbm_to_gee import lgbm_booster_to_file
+from .lgbm_to_gee import lgbm_booster_to_gee_files
+from .lgbm_to_gee import lgbm_booster_to_strings
 from .lgbm_to_gee import lgbm_booster_to_tree_df
+from .lgbm_to_gee import lgbm_tree_to_string
+from .lgbm_to_gee import parse_gee_trees
+from .lgbm_to_gee import predict_gee_trees
 from .lgbm_to_gee import treedf_to_string
+from .optimization_lgbm import EvaluationCache
+from .optimization_lgbm import SuccessiveHalvingPruner
 from .optimization_lgbm import lgbmclassifier_cv
 from .optimization_lgbm import lgbmregressor_cv
+from .optimization_lgbm import optimize_lgbm_targets
 from .optimization_lgbm import optimize_lgbmclassifier
 from .optimization_lgbm import optimize_lgbmregressor
+from .predict_raster_lgbm import predict_lgbm_raster
+from .query_to_dataframe import QueryResultCache
+from .query_to_dataframe import copy_query_to_dataframe
 from .query_to_dataframe import query_to_dataframe
+from .query_to_dataframe import query_to_dataframes
+from .query_to_dataframe import query_to_dataframes_async
+from .raster_block_progress import BlockProgress
 from .raster_block_progress import raster_block_progress
 from .raster_bounds import raster_bounds
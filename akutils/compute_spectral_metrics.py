@@ -2,11 +2,14 @@
 # ---------------------------------------------------------------------------
 # Compute spectral metrics
 # Author: Timm Nawrocki, Alaska Center for Conservation Science
-# Last Updated: 2024-09-22
+# Last Updated: 2026-10-17
 # Usage: Python 3.12+
-# Description: "Compute spectral metrics" contains a function to compute standard spectral metrics from user-specified bands of remotely sensed imagery.
+# Description: "Compute spectral metrics" contains functions to compute standard spectral metrics from user-specified bands of remotely sensed imagery.
 # ---------------------------------------------------------------------------
 
+# Import profiling decorator
+from .end_timing import timed
+
 # Define a function to compute normalized index
 def normalized_index(band_1, band_2, spectral_data):
     """
@@ -56,134 +59,432 @@ def impute_band_data(band_1, band_2, band_data):
     return imputed_band
 
 
+# Define the Sentinel-2 bands and normalized indices used in the AKVEG foliar cover maps
+S2_BANDS = ('blue', 'green', 'red', 'redge1', 'redge2', 'redge3', 'nir', 'redge4', 'swir1', 'swir2')
+S2_INDICES = (('nbr', 'nir', 'swir2'),
+              ('ngrdi', 'green', 'red'),
+              ('ndmi', 'nir', 'swir1'),
+              ('ndsi', 'green', 'swir1'),
+              ('ndvi', 'nir', 'red'),
+              ('ndwi', 'green', 'nir'))
+
+# Define the imputations for the AKVEG foliar cover maps as ordered pairs of the band with missing values and the fill band
+FOLIAR_COVER_IMPUTES = tuple(
+    [pair for season in (1, 2, 3) for polarization in ('vv', 'vh')
+     for pair in ((f's1_{season}_{polarization}a', f's1_{season}_{polarization}d'),
+                  (f's1_{season}_{polarization}d', f's1_{season}_{polarization}a'))]
+    + [(f's2_{season}_{band}', f's2_0_{band}') for season in range(1, 6) for band in S2_BANDS])
+
+# Define the normalized indices for the AKVEG foliar cover maps as the output name and the two input bands
+FOLIAR_COVER_INDICES = tuple((f's2_{season}_{name}', f's2_{season}_{band_1}', f's2_{season}_{band_2}')
+                             for season in range(1, 6) for name, band_1, band_2 in S2_INDICES)
+
+
+# Define a function to compute imputations and normalized indices from specifications
+@timed('covariates')
+def compute_spectral_features(covariate_data, imputes=(), indices=()):
+    """
+    Description: computes imputed bands and normalized indices declared as data, batching bands into stacked arrays and attaching all outputs to the dataframe at once
+    Inputs: covariate_data -- the dataframe containing the band values
+            imputes -- an ordered sequence of (band with missing values, fill band) pairs; each pair uses the results of earlier pairs, as in repeated calls to impute_band_data
+            indices -- a sequence of (output name, band_1, band_2) normalized index definitions, computed as in normalized_index after all imputations
+    Returned Value: returns a new dataframe with imputed bands replaced at their column positions and new indices appended in order
+    Preconditions: requires a dataframe containing labeled bands with numeric values; the input dataframe is not modified
+    """
+
+    # Import packages
+    import numpy as np
+    import pandas as pd
+
+    # Store the output arrays by name
+    outputs = {}
+
+    # Define a function to return the current values of a band
+    def band_values(name):
+        return outputs[name] if name in outputs else covariate_data[name].to_numpy()
+
+    # Define a function to run a function on stacked bands that share data types
+    def run_batched(specifications, compute):
+        groups = {}
+        for specification in specifications:
+            band_1, band_2 = specification[-2:]
+            key = (band_values(band_1).dtype, band_values(band_2).dtype)
+            groups.setdefault(key, []).append(specification)
+        for group in groups.values():
+            stack_1 = np.stack([band_values(specification[-2]) for specification in group])
+            stack_2 = np.stack([band_values(specification[-1]) for specification in group])
+            compute(group, stack_1, stack_2)
+
+    # Define a function to impute a batch of bands
+    def impute_stack(group, stack_1, stack_2):
+        imputed = np.where((stack_1 == -32768) | pd.isnull(stack_1), stack_2, stack_1)
+        for row, (band_1, band_2) in enumerate(group):
+            outputs[band_1] = imputed[row]
+
+    # Impute bands in stages so that no pair reads or rewrites a band imputed within its own stage or imputes a band read within its own stage, since stages run in groups of data types rather than in order
+    stage = []
+    stage_bands = set()
+    stage_reads = set()
+    for band_1, band_2 in imputes:
+        if band_1 in stage_bands or band_2 in stage_bands or band_1 in stage_reads:
+            run_batched(stage, impute_stack)
+            stage = []
+            stage_bands = set()
+            stage_reads = set()
+        stage.append((band_1, band_2))
+        stage_bands.add(band_1)
+        stage_reads.add(band_2)
+    run_batched(stage, impute_stack)
+
+    # Define a function to calculate a batch of normalized indices
+    def index_stack(group, stack_1, stack_2):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            normalized_metric = (stack_1 - stack_2) / (stack_1 + stack_2 + 0.001)
+        normalized_rescaled = (normalized_metric * 10000) + 0.5
+        # Raise the same error as the pandas conversion in normalized_index for missing values
+        if not np.isfinite(normalized_rescaled).all():
+            raise pd.errors.IntCastingNaNError('Cannot convert non-finite values (NA or inf) to integer')
+        normalized_int = normalized_rescaled.astype('int32')
+        for row, (name, band_1, band_2) in enumerate(group):
+            outputs[name] = normalized_int[row]
+
+    # Calculate normalized indices
+    run_batched(indices, index_stack)
+
+    # Replace existing columns in place and append new indices, attaching all pieces with a single concat
+    pieces = []
+    column_names = list(covariate_data.columns)
+    position = 0
+    while position < len(column_names):
+        replaced = column_names[position] in outputs
+        end = position
+        while end < len(column_names) and (column_names[end] in outputs) == replaced:
+            end += 1
+        if replaced:
+            pieces.append(pd.DataFrame({name: outputs[name] for name in column_names[position:end]},
+                                       index=covariate_data.index))
+        else:
+            pieces.append(covariate_data.iloc[:, position:end])
+        position = end
+    new_names = [name for name, band_1, band_2 in indices if name not in covariate_data.columns]
+    if new_names:
+        pieces.append(pd.DataFrame({name: outputs[name] for name in dict.fromkeys(new_names)},
+                                   index=covariate_data.index))
+
+    return pd.concat(pieces, axis=1) if pieces else covariate_data.copy()
+
+
 # Define a function to process covariate data for the AKVEG foliar cover maps
 def foliar_cover_predictors(covariate_data, predictors):
     """
     Description: processes the covariates in a dataframe for prediction
     Inputs: covariate_data -- the dataframe containing all covariates for model training and prediction
             predictors -- a set of all predictor variables used in model training and prediction
-    Returned Value: returns a dataframe of full predictors
-    Preconditions: requires a dataframe containing initial predictors
+    Returned Value: returns a new dataframe of full predictors
+    Preconditions: requires a dataframe containing initial predictors; unlike earlier versions, the input dataframe is not modified, so callers must use the returned dataframe
+    """
+
+    # Impute missing S1 and S2 data and calculate derived metrics for seasons 1 to 5
+    covariate_data = compute_spectral_features(covariate_data, FOLIAR_COVER_IMPUTES, FOLIAR_COVER_INDICES)
+
+    # Fill missing data
+    covariate_data[predictors] = covariate_data[predictors].interpolate().fillna(-32768).astype('int32')
+
+    return covariate_data
+
+
+# Define a function to read covariate data in chunks of rows
+def read_covariate_chunks(source, chunksize=100000, columns=None):
+    """
+    Description: reads covariate data as a sequence of dataframes with a bounded number of rows
+    Inputs: source -- a path to a Parquet or CSV file, a dataframe, or an iterable of dataframes
+            chunksize -- the maximum number of rows in each chunk read from a file or dataframe
+            columns -- an optional list of columns to read from a file
+    Returned Value: returns a generator of dataframes
+    Preconditions: requires pyarrow to read Parquet files
+    """
+
+    # Import packages
+    import os
+    import pandas as pd
+
+    # Read files in chunks
+    if isinstance(source, (str, os.PathLike)):
+        extension = os.path.splitext(str(source))[1].lower()
+        if extension in ('.parquet', '.pq'):
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(source)
+            for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+                yield batch.to_pandas()
+        elif extension == '.csv':
+            yield from pd.read_csv(source, chunksize=chunksize, usecols=columns)
+        else:
+            raise ValueError(f'Covariate files must be Parquet or CSV, not "{extension}".')
+
+    # Split a dataframe into chunks
+    elif isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+
+    # Pass through an iterable of dataframes
+    else:
+        yield from source
+
+
+# Define a function to process covariate data for the AKVEG foliar cover maps in chunks
+def foliar_cover_predictor_chunks(source, predictors, chunksize=100000, max_carry_rows=1000000):
+    """
+    Description: processes the covariates for prediction one chunk of rows at a time, interpolating missing values across chunk boundaries as foliar_cover_predictors does for the whole dataframe
+    Inputs: source -- a path to a Parquet or CSV file, a dataframe, or an iterable of dataframes in row order
+            predictors -- a list of all predictor variables used in model training and prediction
+            chunksize -- the maximum number of rows in each chunk read from a file or dataframe
+            max_carry_rows -- the maximum number of rows held back while waiting for the end of a run of missing values; beyond this, the held back rows are completed by filling their trailing missing values with the last valid value, and None holds back rows without limit
+    Returned Value: returns a generator of dataframes of full predictors that, concatenated, equal the output of foliar_cover_predictors unless a run of missing values exceeds max_carry_rows
+    Preconditions: requires initial predictors in every chunk
     """
 
     # Import packages
     import numpy as np
+    import pandas as pd
 
-    # Impute missing S1 data
-    covariate_data['s1_1_vva'] = impute_band_data('s1_1_vva', 's1_1_vvd', covariate_data)
-    covariate_data['s1_1_vvd'] = impute_band_data('s1_1_vvd', 's1_1_vva', covariate_data)
-    covariate_data['s1_1_vha'] = impute_band_data('s1_1_vha', 's1_1_vhd', covariate_data)
-    covariate_data['s1_1_vhd'] = impute_band_data('s1_1_vhd', 's1_1_vha', covariate_data)
-
-    covariate_data['s1_2_vva'] = impute_band_data('s1_2_vva', 's1_2_vvd', covariate_data)
-    covariate_data['s1_2_vvd'] = impute_band_data('s1_2_vvd', 's1_2_vva', covariate_data)
-    covariate_data['s1_2_vha'] = impute_band_data('s1_2_vha', 's1_2_vhd', covariate_data)
-    covariate_data['s1_2_vhd'] = impute_band_data('s1_2_vhd', 's1_2_vha', covariate_data)
-
-    covariate_data['s1_3_vva'] = impute_band_data('s1_3_vva', 's1_3_vvd', covariate_data)
-    covariate_data['s1_3_vvd'] = impute_band_data('s1_3_vvd', 's1_3_vva', covariate_data)
-    covariate_data['s1_3_vha'] = impute_band_data('s1_3_vha', 's1_3_vhd', covariate_data)
-    covariate_data['s1_3_vhd'] = impute_band_data('s1_3_vhd', 's1_3_vha', covariate_data)
-
-    covariate_data['s2_1_blue'] = impute_band_data('s2_1_blue', 's2_0_blue', covariate_data)
-    covariate_data['s2_1_green'] = impute_band_data('s2_1_green', 's2_0_green', covariate_data)
-    covariate_data['s2_1_red'] = impute_band_data('s2_1_red', 's2_0_red', covariate_data)
-    covariate_data['s2_1_redge1'] = impute_band_data('s2_1_redge1', 's2_0_redge1', covariate_data)
-    covariate_data['s2_1_redge2'] = impute_band_data('s2_1_redge2', 's2_0_redge2', covariate_data)
-    covariate_data['s2_1_redge3'] = impute_band_data('s2_1_redge3', 's2_0_redge3', covariate_data)
-    covariate_data['s2_1_nir'] = impute_band_data('s2_1_nir', 's2_0_nir', covariate_data)
-    covariate_data['s2_1_redge4'] = impute_band_data('s2_1_redge4', 's2_0_redge4', covariate_data)
-    covariate_data['s2_1_swir1'] = impute_band_data('s2_1_swir1', 's2_0_swir1', covariate_data)
-    covariate_data['s2_1_swir2'] = impute_band_data('s2_1_swir2', 's2_0_swir2', covariate_data)
-
-    covariate_data['s2_2_blue'] = impute_band_data('s2_2_blue', 's2_0_blue', covariate_data)
-    covariate_data['s2_2_green'] = impute_band_data('s2_2_green', 's2_0_green', covariate_data)
-    covariate_data['s2_2_red'] = impute_band_data('s2_2_red', 's2_0_red', covariate_data)
-    covariate_data['s2_2_redge1'] = impute_band_data('s2_2_redge1', 's2_0_redge1', covariate_data)
-    covariate_data['s2_2_redge2'] = impute_band_data('s2_2_redge2', 's2_0_redge2', covariate_data)
-    covariate_data['s2_2_redge3'] = impute_band_data('s2_2_redge3', 's2_0_redge3', covariate_data)
-    covariate_data['s2_2_nir'] = impute_band_data('s2_2_nir', 's2_0_nir', covariate_data)
-    covariate_data['s2_2_redge4'] = impute_band_data('s2_2_redge4', 's2_0_redge4', covariate_data)
-    covariate_data['s2_2_swir1'] = impute_band_data('s2_2_swir1', 's2_0_swir1', covariate_data)
-    covariate_data['s2_2_swir2'] = impute_band_data('s2_2_swir2', 's2_0_swir2', covariate_data)
-
-    covariate_data['s2_3_blue'] = impute_band_data('s2_3_blue', 's2_0_blue', covariate_data)
-    covariate_data['s2_3_green'] = impute_band_data('s2_3_green', 's2_0_green', covariate_data)
-    covariate_data['s2_3_red'] = impute_band_data('s2_3_red', 's2_0_red', covariate_data)
-    covariate_data['s2_3_redge1'] = impute_band_data('s2_3_redge1', 's2_0_redge1', covariate_data)
-    covariate_data['s2_3_redge2'] = impute_band_data('s2_3_redge2', 's2_0_redge2', covariate_data)
-    covariate_data['s2_3_redge3'] = impute_band_data('s2_3_redge3', 's2_0_redge3', covariate_data)
-    covariate_data['s2_3_nir'] = impute_band_data('s2_3_nir', 's2_0_nir', covariate_data)
-    covariate_data['s2_3_redge4'] = impute_band_data('s2_3_redge4', 's2_0_redge4', covariate_data)
-    covariate_data['s2_3_swir1'] = impute_band_data('s2_3_swir1', 's2_0_swir1', covariate_data)
-    covariate_data['s2_3_swir2'] = impute_band_data('s2_3_swir2', 's2_0_swir2', covariate_data)
-
-    covariate_data['s2_4_blue'] = impute_band_data('s2_4_blue', 's2_0_blue', covariate_data)
-    covariate_data['s2_4_green'] = impute_band_data('s2_4_green', 's2_0_green', covariate_data)
-    covariate_data['s2_4_red'] = impute_band_data('s2_4_red', 's2_0_red', covariate_data)
-    covariate_data['s2_4_redge1'] = impute_band_data('s2_4_redge1', 's2_0_redge1', covariate_data)
-    covariate_data['s2_4_redge2'] = impute_band_data('s2_4_redge2', 's2_0_redge2', covariate_data)
-    covariate_data['s2_4_redge3'] = impute_band_data('s2_4_redge3', 's2_0_redge3', covariate_data)
-    covariate_data['s2_4_nir'] = impute_band_data('s2_4_nir', 's2_0_nir', covariate_data)
-    covariate_data['s2_4_redge4'] = impute_band_data('s2_4_redge4', 's2_0_redge4', covariate_data)
-    covariate_data['s2_4_swir1'] = impute_band_data('s2_4_swir1', 's2_0_swir1', covariate_data)
-    covariate_data['s2_4_swir2'] = impute_band_data('s2_4_swir2', 's2_0_swir2', covariate_data)
-
-    covariate_data['s2_5_blue'] = impute_band_data('s2_5_blue', 's2_0_blue', covariate_data)
-    covariate_data['s2_5_green'] = impute_band_data('s2_5_green', 's2_0_green', covariate_data)
-    covariate_data['s2_5_red'] = impute_band_data('s2_5_red', 's2_0_red', covariate_data)
-    covariate_data['s2_5_redge1'] = impute_band_data('s2_5_redge1', 's2_0_redge1', covariate_data)
-    covariate_data['s2_5_redge2'] = impute_band_data('s2_5_redge2', 's2_0_redge2', covariate_data)
-    covariate_data['s2_5_redge3'] = impute_band_data('s2_5_redge3', 's2_0_redge3', covariate_data)
-    covariate_data['s2_5_nir'] = impute_band_data('s2_5_nir', 's2_0_nir', covariate_data)
-    covariate_data['s2_5_redge4'] = impute_band_data('s2_5_redge4', 's2_0_redge4', covariate_data)
-    covariate_data['s2_5_swir1'] = impute_band_data('s2_5_swir1', 's2_0_swir1', covariate_data)
-    covariate_data['s2_5_swir2'] = impute_band_data('s2_5_swir2', 's2_0_swir2', covariate_data)
-
-    # Calculate derived metrics for season 1
-    covariate_data['s2_1_nbr'] = normalized_index('s2_1_nir', 's2_1_swir2', covariate_data)
-    covariate_data['s2_1_ngrdi'] = normalized_index('s2_1_green', 's2_1_red', covariate_data)
-    covariate_data['s2_1_ndmi'] = normalized_index('s2_1_nir', 's2_1_swir1', covariate_data)
-    covariate_data['s2_1_ndsi'] = normalized_index('s2_1_green', 's2_1_swir1', covariate_data)
-    covariate_data['s2_1_ndvi'] = normalized_index('s2_1_nir', 's2_1_red', covariate_data)
-    covariate_data['s2_1_ndwi'] = normalized_index('s2_1_green', 's2_1_nir', covariate_data)
-
-    # Calculate derived metrics for season 2
-    covariate_data['s2_2_nbr'] = normalized_index('s2_2_nir', 's2_2_swir2', covariate_data)
-    covariate_data['s2_2_ngrdi'] = normalized_index('s2_2_green', 's2_2_red', covariate_data)
-    covariate_data['s2_2_ndmi'] = normalized_index('s2_2_nir', 's2_2_swir1', covariate_data)
-    covariate_data['s2_2_ndsi'] = normalized_index('s2_2_green', 's2_2_swir1', covariate_data)
-    covariate_data['s2_2_ndvi'] = normalized_index('s2_2_nir', 's2_2_red', covariate_data)
-    covariate_data['s2_2_ndwi'] = normalized_index('s2_2_green', 's2_2_nir', covariate_data)
-
-    # Calculate derived metrics for season 3
-    covariate_data['s2_3_nbr'] = normalized_index('s2_3_nir', 's2_3_swir2', covariate_data)
-    covariate_data['s2_3_ngrdi'] = normalized_index('s2_3_green', 's2_3_red', covariate_data)
-    covariate_data['s2_3_ndmi'] = normalized_index('s2_3_nir', 's2_3_swir1', covariate_data)
-    covariate_data['s2_3_ndsi'] = normalized_index('s2_3_green', 's2_3_swir1', covariate_data)
-    covariate_data['s2_3_ndvi'] = normalized_index('s2_3_nir', 's2_3_red', covariate_data)
-    covariate_data['s2_3_ndwi'] = normalized_index('s2_3_green', 's2_3_nir', covariate_data)
-
-    # Calculate derived metrics for season 4
-    covariate_data['s2_4_nbr'] = normalized_index('s2_4_nir', 's2_4_swir2', covariate_data)
-    covariate_data['s2_4_ngrdi'] = normalized_index('s2_4_green', 's2_4_red', covariate_data)
-    covariate_data['s2_4_ndmi'] = normalized_index('s2_4_nir', 's2_4_swir1', covariate_data)
-    covariate_data['s2_4_ndsi'] = normalized_index('s2_4_green', 's2_4_swir1', covariate_data)
-    covariate_data['s2_4_ndvi'] = normalized_index('s2_4_nir', 's2_4_red', covariate_data)
-    covariate_data['s2_4_ndwi'] = normalized_index('s2_4_green', 's2_4_nir', covariate_data)
-
-    # Calculate derived metrics for season 5
-    covariate_data['s2_5_nbr'] = normalized_index('s2_5_nir', 's2_5_swir2', covariate_data)
-    covariate_data['s2_5_ngrdi'] = normalized_index('s2_5_green', 's2_5_red', covariate_data)
-    covariate_data['s2_5_ndmi'] = normalized_index('s2_5_nir', 's2_5_swir1', covariate_data)
-    covariate_data['s2_5_ndsi'] = normalized_index('s2_5_green', 's2_5_swir1', covariate_data)
-    covariate_data['s2_5_ndvi'] = normalized_index('s2_5_nir', 's2_5_red', covariate_data)
-    covariate_data['s2_5_ndwi'] = normalized_index('s2_5_green', 's2_5_nir', covariate_data)
+    # Store the last valid value and row position of each predictor and the rows held back for interpolation
+    anchor_values = {}
+    anchor_positions = {}
+    pending = None
+    start = 0
 
-    # Fill missing data
-    covariate_data[predictors] = covariate_data[predictors].interpolate()
-    for name, values in covariate_data[predictors].items():
-        covariate_data[name] = covariate_data[name].fillna(-32768)
-    covariate_data[predictors] = covariate_data[predictors].astype('int32')
+    # Define a function to interpolate, fill, and return the completed rows of the held back and new rows
+    def complete_rows(combined, final):
+        n_rows = len(combined)
+        positions = np.arange(start, start + n_rows, dtype='float64')
+        filled = {}
+        valid_masks = {}
+        float_values = {}
+        cut = n_rows
+        for name in predictors:
+            # Compare integer columns as floats, since a chunk without missing values may be read as integers
+            if not pd.api.types.is_numeric_dtype(combined[name]):
+                continue
+            values = combined[name].to_numpy(dtype='float64', na_value=np.nan)
+            valid = ~np.isnan(values)
+            valid_masks[name] = valid
+            float_values[name] = values
+            if valid.all():
+                continue
 
-    return covariate_data
+            # Interpolate linearly between valid values by row position, keeping missing values before the first valid value
+            valid_positions = positions[valid]
+            valid_values = values[valid]
+            if name in anchor_values:
+                valid_positions = np.concatenate([[anchor_positions[name]], valid_positions])
+                valid_values = np.concatenate([[anchor_values[name]], valid_values])
+            if valid_positions.shape[0] == 0:
+                continue
+            output = values.copy()
+            invalid = ~valid & (positions > valid_positions[0])
+            output[invalid] = np.interp(positions[invalid], valid_positions, valid_values)
+            filled[name] = output
+
+            # Hold back rows after the last valid value until the next valid value is read
+            if not final:
+                valid_index = np.flatnonzero(valid)
+                cut = min(cut, valid_index[-1] + 1 if valid_index.shape[0] > 0 else 0)
+
+        # Complete all rows once too many rows are held back
+        if not final and max_carry_rows is not None and n_rows - cut > max_carry_rows:
+            cut = n_rows
+
+        # Remember the last valid value of each predictor in the completed rows
+        for name, valid in valid_masks.items():
+            valid_index = np.flatnonzero(valid[:cut])
+            if valid_index.shape[0] > 0:
+                anchor_values[name] = float_values[name][valid_index[-1]]
+                anchor_positions[name] = positions[valid_index[-1]]
+
+        # Fill missing data
+        completed = combined.iloc[:cut].copy()
+        predictor_values = np.empty((cut, len(predictors)), dtype='int32')
+        for column, name in enumerate(predictors):
+            values = filled[name][:cut] if name in filled else completed[name].to_numpy()
+            if values.dtype.kind == 'f':
+                values = np.where(np.isnan(values), -32768, values)
+            predictor_values[:, column] = values
+        completed[predictors] = predictor_values
+
+        return completed, combined.iloc[cut:]
+
+    # Process each chunk and yield the completed rows
+    for chunk in read_covariate_chunks(source, chunksize=chunksize):
+        processed = compute_spectral_features(chunk, FOLIAR_COVER_IMPUTES, FOLIAR_COVER_INDICES)
+        combined = processed if pending is None or len(pending) == 0 else pd.concat([pending, processed])
+        completed, pending = complete_rows(combined, final=False)
+        start += len(completed)
+        if len(completed) > 0:
+            yield completed
+
+    # Complete the rows held back after the last chunk
+    if pending is not None and len(pending) > 0:
+        completed, pending = complete_rows(pending, final=True)
+        yield completed
+
+
+# Define a function to predict processed covariate chunks
+def predict_covariate_chunks(chunks, estimator, predictors, keep_fields=(), prediction_field='prediction',
+                             probability=False):
+    """
+    Description: predicts a model for each chunk of processed covariates
+    Inputs: chunks -- an iterable of dataframes of full predictors, such as from foliar_cover_predictor_chunks
+            estimator -- a trained model with a predict or predict_proba method
+            predictors -- a list of all predictor variables used in model training and prediction
+            keep_fields -- a list of fields, such as coordinates, to copy from each chunk to the output
+            prediction_field -- the name of the output prediction field
+            probability -- if True, predicts the probability of the positive class with predict_proba
+    Returned Value: returns a generator of dataframes with the kept fields and the prediction of each chunk
+    Preconditions: requires a trained model
+    """
+
+    # Predict each chunk
+    for chunk in chunks:
+        if probability:
+            prediction = estimator.predict_proba(chunk[predictors])[:, 1]
+        else:
+            prediction = estimator.predict(chunk[predictors])
+        output = chunk[list(keep_fields)].copy()
+        output[prediction_field] = prediction
+        yield output
+
+
+# Define a function to compute imputed bands and normalized indices for raster windows
+def compute_spectral_rasters(input_file, output_files, imputes=(), indices=(), band_names=None, dtype='int16',
+                             nodata=-32768, n_workers=4, detail=10):
+    """
+    Description: computes imputed bands and normalized indices from a multi-band raster one block window at a time, processing windows in a thread pool and writing one single-band raster per output
+    Inputs: input_file -- the path to a multi-band raster
+            output_files -- a dictionary of output band or index names and the raster paths to which they are written
+            imputes -- an ordered sequence of (band with missing values, fill band) pairs, as in compute_spectral_features
+            indices -- a sequence of (output name, band_1, band_2) normalized index definitions, as in compute_spectral_features
+            band_names -- an optional list of names for the input bands in band order; defaults to the band descriptions of the raster
+            dtype -- the data type of the output rasters
+            nodata -- the no data value of the output rasters
+            n_workers -- the number of threads used to process windows
+            detail -- the number of progress reports passed to BlockProgress
+    Returned Value: returns the dictionary of output files
+    Preconditions: requires rasterio; input values equal to -32768, the input no data value, or NaN are missing, and indices are missing where either band is missing
+    """
+
+    # Import packages
+    import threading
+    import numpy as np
+    import rasterio
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from .raster_block_progress import BlockProgress
+
+    with rasterio.open(input_file) as input_raster:
+        # Map band names to band numbers
+        if band_names is None:
+            band_names = input_raster.descriptions
+        band_numbers = {name: number for number, name in enumerate(band_names, start=1) if name is not None}
+        input_nodata = input_raster.nodata
+
+        # Read only the input bands needed for the outputs
+        needed = [name for name in output_files if name in band_numbers]
+        for band_1, band_2 in imputes:
+            needed.extend([band_1, band_2])
+        for name, band_1, band_2 in indices:
+            needed.extend([band_1, band_2])
+        needed = [name for name in dict.fromkeys(needed) if name in band_numbers]
+        unknown = [name for name in output_files
+                   if name not in band_numbers and name not in [index[0] for index in indices]]
+        if unknown:
+            raise ValueError(f'Outputs are neither input bands nor indices: {unknown}')
+
+        # Create the output rasters
+        profile = input_raster.profile.copy()
+        profile.update(count=1, dtype=dtype, nodata=nodata, BIGTIFF='IF_SAFER')
+        output_rasters = {name: rasterio.open(output_file, 'w', **profile)
+                          for name, output_file in output_files.items()}
+        read_lock = threading.Lock()
+        write_lock = threading.Lock()
+
+        # Define a function to process a window
+        def process_window(window):
+            # Read the bands of the window and mark missing values as NaN
+            with read_lock:
+                stack = input_raster.read([band_numbers[name] for name in needed], window=window)
+            bytes_read = stack.nbytes
+            stack = stack.astype('float64')
+            missing = stack == -32768
+            if input_nodata is not None:
+                missing |= stack == input_nodata
+            stack[missing] = np.nan
+            bands = dict(zip(needed, stack))
+
+            # Impute bands in order, using the results of earlier pairs
+            for band_1, band_2 in imputes:
+                bands[band_1] = np.where(np.isnan(bands[band_1]), bands[band_2], bands[band_1])
+
+            # Calculate normalized indices as in normalized_index
+            for name, band_1, band_2 in indices:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    normalized_metric = (bands[band_1] - bands[band_2]) / (bands[band_1] + bands[band_2] + 0.001)
+                bands[name] = np.trunc((normalized_metric * 10000) + 0.5)
+
+            # Write the outputs with missing values as no data
+            outputs = {name: np.where(np.isfinite(bands[name]), bands[name], nodata).astype(dtype)
+                       for name in output_files}
+            with write_lock:
+                for name, values in outputs.items():
+                    output_rasters[name].write(values, 1, window=window)
+            progress.update(pixels=int(window.height) * int(window.width), bytes_read=bytes_read,
+                            bytes_written=sum(values.nbytes for values in outputs.values()))
+
+        # Process windows in parallel and report progress
+        try:
+            windows = [window for block_index, window in input_raster.block_windows(1)]
+            progress = BlockProgress(len(windows), detail=detail)
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                futures = [executor.submit(process_window, window) for window in windows]
+                for future in as_completed(futures):
+                    future.result()
+            progress.finish()
+        finally:
+            for output_raster in output_rasters.values():
+                output_raster.close()
+
+    return output_files
+
+
+# Define a function to compute a normalized index raster
+def normalized_index_raster(input_file, band_1, band_2, output_file, band_names=None, dtype='int16',
+                            nodata=-32768, n_workers=4, detail=10):
+    """
+    Description: computes a normalized index raster from two bands of a multi-band raster one block window at a time
+    Inputs: input_file -- the path to a multi-band raster
+            band_1 -- the name of the band that will be positive in both numerator and denominator
+            band_2 -- the name of the band that will be subtracted in the numerator
+            output_file -- the path of the output raster
+            All other inputs are described in compute_spectral_rasters
+    Returned Value: returns the output file
+    Preconditions: requires rasterio
+    """
+    compute_spectral_rasters(input_file, {'index': output_file}, indices=[('index', band_1, band_2)],
+                             band_names=band_names, dtype=dtype, nodata=nodata, n_workers=n_workers, detail=detail)
+    return output_file
+
+
+# Define a function to compute an imputed band raster
+def impute_band_raster(input_file, band_1, band_2, output_file, band_names=None, dtype='int16', nodata=-32768,
+                       n_workers=4, detail=10):
+    """
+    Description: imputes missing values of one band of a multi-band raster using the values of another band one block window at a time
+    Inputs: input_file -- the path to a multi-band raster
+            band_1 -- the name of the band that contains the missing values
+            band_2 -- the name of the band that will fill the missing values
+            output_file -- the path of the output raster
+            All other inputs are described in compute_spectral_rasters
+    Returned Value: returns the output file
+    Preconditions: requires rasterio
+    """
+    compute_spectral_rasters(input_file, {band_1: output_file}, imputes=[(band_1, band_2)],
+                             band_names=band_names, dtype=dtype, nodata=nodata, n_workers=n_workers, detail=detail)
+    return output_file
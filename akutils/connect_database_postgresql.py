@@ -2,11 +2,58 @@
 # ---------------------------------------------------------------------------
 # Create connection to PostgreSQL database
 # Author: Timm Nawrocki, Alaska Center for Conservation Science
-# Last Updated: 2024-02-02
+# Last Updated: 2026-10-17
 # Usage: Python 3.9+
-# Description: "Create connection to PostgreSQL database" is a function that loads a PostgreSQL connection and returns that connection to a variable.
+# Description: "Create connection to PostgreSQL database" is a set of functions that load a PostgreSQL connection and return that connection to a variable, or hand out reusable connections from a pool.
 # ---------------------------------------------------------------------------
 
+# Define the authentication parameters read from the authentication file
+AUTHENTICATION_PARAMETERS = {
+    'hostaddr': 'host',
+    'port': 'port',
+    'user': 'user',
+    'password': 'password',
+    'dbname': 'dbname',
+    'sslmode': 'sslmode',
+    'sslrootcert': 'sslrootcert',
+    'sslcert': 'sslcert',
+    'sslkey': 'sslkey',
+}
+
+# Store parsed authentication files by path and modification time
+_authentication_cache = {}
+
+
+# Define a function to parse authentication parameters
+def authentication_parameters(authentication):
+    """
+    Description: parses the connection and authentication parameters of a csv file once and returns the cached parameters on later calls until the file is modified
+    Inputs: authentication -- a csv file containing the connection and authentication parameters
+    Returned Value: function returns a dictionary of connection parameters for psycopg2.
+    Preconditions: requires a csv file with parameter and value columns
+    """
+
+    # Import packages
+    import os
+    import pandas as pd
+
+    # Return the cached parameters if the file has not changed
+    path = os.path.abspath(authentication)
+    modified = os.stat(path).st_mtime_ns
+    cached = _authentication_cache.get(path)
+    if cached is not None and cached[0] == modified:
+        return dict(cached[1])
+
+    # Parse authentication parameters from csv
+    parameters = pd.read_csv(path)
+    parameter_dictionary = {
+        name: parameters.at[parameters.index[parameters['parameter'] == parameter][0], 'value']
+        for name, parameter in AUTHENTICATION_PARAMETERS.items()
+    }
+    _authentication_cache[path] = (modified, parameter_dictionary)
+    return dict(parameter_dictionary)
+
+
 # Define a function to create a connection to a PostgreSQL database
 def connect_database_postgresql(authentication):
     """
@@ -18,21 +65,9 @@ def connect_database_postgresql(authentication):
 
     # Import packages
     import psycopg2
-    import pandas as pd
 
     # Parse authentication parameters from csv
-    parameters = pd.read_csv(authentication)
-    parameter_dictionary = {
-        'hostaddr': parameters.at[parameters.index[parameters['parameter'] == 'host'][0], 'value'],
-        'port': parameters.at[parameters.index[parameters['parameter'] == 'port'][0], 'value'],
-        'user': parameters.at[parameters.index[parameters['parameter'] == 'user'][0], 'value'],
-        'password': parameters.at[parameters.index[parameters['parameter'] == 'password'][0], 'value'],
-        'dbname': parameters.at[parameters.index[parameters['parameter'] == 'dbname'][0], 'value'],
-        'sslmode': parameters.at[parameters.index[parameters['parameter'] == 'sslmode'][0], 'value'],
-        'sslrootcert': parameters.at[parameters.index[parameters['parameter'] == 'sslrootcert'][0], 'value'],
-        'sslcert': parameters.at[parameters.index[parameters['parameter'] == 'sslcert'][0], 'value'],
-        'sslkey': parameters.at[parameters.index[parameters['parameter'] == 'sslkey'][0], 'value'],
-    }
+    parameter_dictionary = authentication_parameters(authentication)
 
     # Establish database connection using authentication parameters
     try:
@@ -45,3 +80,228 @@ def connect_database_postgresql(authentication):
     print("Connection successful")
     # Return the database connection
     return connection
+
+
+# Define a class to hand out reusable connections to a PostgreSQL database
+class PostgreSQLConnectionPool:
+    """
+    Description: keeps a thread-safe pool of open connections to a PostgreSQL database, checks idle connections before reuse, and replaces broken connections
+    Inputs: 'authentication' -- a csv file containing the connection and authentication parameters, or a dictionary of connection parameters for psycopg2
+            'max_size' -- the maximum number of open connections; acquiring more waits until a connection is released
+            'min_size' -- the number of connections to open when the pool is created
+            'timeout' -- an optional number of seconds to wait for a connection before raising psycopg2.pool.PoolError
+            'check_interval' -- the number of idle seconds after which a connection is checked with a query before reuse
+            'autocommit' -- the autocommit setting of new connections
+    Returned Value: Returns a pool to use as a context manager or to pass to query_to_dataframe in place of a connection
+    Preconditions: requires psycopg2 and an existing PostgreSQL database with proper authentication
+    """
+
+    def __init__(self, authentication, max_size=4, min_size=0, timeout=None, check_interval=30, autocommit=False):
+        # Import packages
+        import threading
+        import time
+
+        if isinstance(authentication, dict):
+            self.parameters = dict(authentication)
+        else:
+            self.parameters = authentication_parameters(authentication)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.autocommit = autocommit
+        self.closed = False
+        self._idle = []
+        self._in_use = set()
+        self._opening = 0
+        self._condition = threading.Condition()
+        for connection_n in range(min(min_size, max_size)):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        # Import packages
+        import psycopg2
+
+        connection = psycopg2.connect(**self.parameters)
+        connection.autocommit = self.autocommit
+        return connection
+
+    def _healthy(self, connection, idle_seconds):
+        # Import packages
+        import psycopg2
+
+        # Skip the query for recently used connections
+        if connection.closed:
+            return False
+        if idle_seconds < self.check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not connection.autocommit:
+                connection.rollback()
+            return True
+        except (Exception, psycopg2.Error):
+            return False
+
+    def acquire(self, timeout=None):
+        """
+        Description: takes a healthy connection from the pool, opening a new connection if the pool is below its maximum size
+        Inputs: 'timeout' -- an optional number of seconds to wait, which defaults to the timeout of the pool
+        Returned Value: Returns an open connection that must be returned with release
+        Preconditions: raises psycopg2.pool.PoolError if the pool is closed or no connection is available before the timeout
+        """
+        # Import packages
+        import time
+        from psycopg2.pool import PoolError
+
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Take an idle connection or reserve a new one
+            with self._condition:
+                while True:
+                    if self.closed:
+                        raise PoolError('connection pool is closed')
+                    if self._idle:
+                        connection, released = self._idle.pop()
+                        self._in_use.add(connection)
+                        break
+                    if len(self._in_use) + self._opening < self.max_size:
+                        connection, released = None, None
+                        self._opening += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise PoolError('no connection available before the timeout')
+                    self._condition.wait(remaining)
+
+            # Open a new connection outside of the lock
+            if connection is None:
+                try:
+                    connection = self._connect()
+                finally:
+                    with self._condition:
+                        self._opening -= 1
+                        if connection is not None:
+                            self._in_use.add(connection)
+                        self._condition.notify()
+                return connection
+
+            # Check an idle connection and discard it if broken
+            if self._healthy(connection, time.monotonic() - released):
+                return connection
+            self._discard(connection)
+
+    def _discard(self, connection):
+        with self._condition:
+            self._in_use.discard(connection)
+            self._condition.notify()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def release(self, connection):
+        """
+        Description: returns a connection to the pool after rolling back any open transaction
+        Inputs: 'connection' -- a connection from acquire
+        Returned Value: no return
+        Preconditions: broken connections and connections released after the pool is closed are closed instead
+        """
+        # Import packages
+        import time
+        import psycopg2
+        import psycopg2.extensions
+
+        # Reset the connection state
+        if connection not in self._in_use:
+            raise ValueError('connection does not belong to this pool')
+        try:
+            if (not connection.closed and connection.info.transaction_status
+                    != psycopg2.extensions.TRANSACTION_STATUS_IDLE):
+                connection.rollback()
+        except (Exception, psycopg2.Error):
+            pass
+
+        # Return the connection to the idle connections
+        with self._condition:
+            if connection.closed or self.closed:
+                self._in_use.discard(connection)
+                self._condition.notify()
+                if not connection.closed:
+                    connection.close()
+                return
+            self._in_use.discard(connection)
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def connection(self):
+        """
+        Description: borrows a connection for the duration of a with block
+        Inputs: none
+        Returned Value: Returns a context manager that yields an open connection
+        Preconditions: none
+        """
+        # Import packages
+        import contextlib
+
+        @contextlib.contextmanager
+        def borrowed():
+            connection = self.acquire()
+            try:
+                yield connection
+            finally:
+                self.release(connection)
+
+        return borrowed()
+
+    def close(self):
+        """
+        Description: closes idle connections and closes connections in use when they are released
+        Inputs: none
+        Returned Value: no return
+        Preconditions: none
+        """
+        with self._condition:
+            self.closed = True
+            idle = self._idle
+            self._idle = []
+            self._condition.notify_all()
+        for connection, released in idle:
+            connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# Store shared connection pools by authentication file and settings
+_connection_pools = {}
+
+
+# Define a function to return a shared connection pool
+def connection_pool_postgresql(authentication, max_size=4, timeout=None, check_interval=30, autocommit=False):
+    """
+    Description: returns a connection pool shared by all calls with the same authentication file and settings, so that scripts can request connections inside loops without opening a new connection each time
+    Inputs: authentication -- a csv file containing the connection and authentication parameters
+            max_size -- the maximum number of open connections
+            timeout -- an optional number of seconds to wait for a connection
+            check_interval -- the number of idle seconds after which a connection is checked before reuse
+            autocommit -- the autocommit setting of new connections
+    Returned Value: function returns a PostgreSQLConnectionPool.
+    Preconditions: requires an existing PostgreSQL database with proper authentication by SSL set up and authentication files with the client
+    """
+
+    # Import packages
+    import os
+
+    # Create a pool if none is open for these settings
+    key = (os.path.abspath(authentication), max_size, timeout, check_interval, autocommit)
+    pool = _connection_pools.get(key)
+    if pool is None or pool.closed:
+        pool = PostgreSQLConnectionPool(authentication, max_size=max_size, timeout=timeout,
+                                        check_interval=check_interval, autocommit=autocommit)
+        _connection_pools[key] = pool
+    return pool
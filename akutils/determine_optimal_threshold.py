@@ -2,11 +2,14 @@
 # ---------------------------------------------------------------------------
 # Determine Optimal Threshold
 # Author: Timm Nawrocki
-# Last Updated: 2024-07-31
+# Last Updated: 2026-10-17
 # Usage: Must be executed in an Anaconda Python 3.12+ distribution.
 # Description: "Determine Optimal Threshold" is a set of functions that test presence thresholds for converting probabilistic predictions to binary predictions to determine a threshold value that minimizes the absolute value difference between sensitivity and specificity.
 # ---------------------------------------------------------------------------
 
+# Import profiling decorator
+from .end_timing import timed
+
 # Define a function to test presence threshold values
 def test_presence_threshold(predict_probability, threshold, y_test):
     """
@@ -49,37 +52,123 @@ def test_presence_threshold(predict_probability, threshold, y_test):
     # Return the thresholded probabilities and the performance metrics
     return sensitivity, specificity, auc, accuracy
 
+# Define a function to count confusion matrix outcomes for many threshold values at once
+def presence_threshold_counts(predict_probability, y_test, thresholds):
+    """
+    Description: counts true positives, false positives, true negatives, and false negatives for every threshold value in a single pass over the sorted probabilities
+    Inputs: 'predict_probability' -- the predicted probability values
+            'y_test' -- the observed binary values
+            'thresholds' -- an array of probability values to use as conversion thresholds to binary
+    Returned Value: Returns arrays of true positives, false positives, true negatives, and false negatives with one value per threshold
+    Preconditions: requires existing probability predictions and binary responses of the same shape
+    """
+
+    # Import packages
+    import numpy as np
+
+    # Convert inputs to arrays and keep thresholds in the precision of the probabilities
+    probability = np.asarray(predict_probability)
+    if not np.issubdtype(probability.dtype, np.floating):
+        probability = probability.astype(float)
+    observed = np.asarray(y_test).astype('int32')
+    thresholds = np.asarray(thresholds).astype(probability.dtype)
+
+    # Sort the probabilities once and accumulate the number of presences below each position
+    order = np.argsort(probability, kind='mergesort')
+    sorted_probability = probability[order]
+    presence_cumulative = np.concatenate(([0], np.cumsum(observed[order] == 1)))
+    total_count = sorted_probability.shape[0]
+    presence_count = presence_cumulative[-1]
+
+    # Locate the number of probabilities below each threshold
+    below_count = np.searchsorted(sorted_probability, thresholds, side='left')
+
+    # Determine error rates for all thresholds
+    false_negative = presence_cumulative[below_count]
+    true_negative = below_count - false_negative
+    true_positive = presence_count - false_negative
+    false_positive = (total_count - below_count) - true_positive
+
+    # Return the confusion matrix outcomes
+    return true_positive, false_positive, true_negative, false_negative
+
+
+# Define a function to calculate performance metrics for many threshold values at once
+@timed('threshold_sweep')
+def sweep_presence_thresholds(predict_probability, y_test, thresholds=None, exact=False):
+    """
+    Description: calculates sensitivity, specificity, and accuracy for a set of threshold values without re-thresholding the predictions for each value
+    Inputs: 'predict_probability' -- the predicted probability values
+            'y_test' -- the observed binary values
+            'thresholds' -- an optional array of threshold values; defaults to the values between 0.001 and 1 in steps of 0.001
+            'exact' -- a boolean that, if True, tests every distinct probability value as a threshold instead
+    Returned Value: Returns a dataframe of threshold, sensitivity, specificity, and accuracy values
+    Preconditions: requires existing probability predictions and binary responses of the same shape
+    """
+
+    # Import packages
+    import numpy as np
+    import pandas as pd
+
+    # Define the threshold values to test
+    if exact:
+        thresholds = np.unique(np.asarray(predict_probability).astype(float))
+    elif thresholds is None:
+        thresholds = np.arange(1, 1001) / 1000
+
+    # Count the confusion matrix outcomes for all thresholds
+    true_positive, false_positive, true_negative, false_negative = presence_threshold_counts(
+        predict_probability, y_test, thresholds)
+
+    # Calculate sensitivity, specificity, and accuracy
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sensitivity = true_positive / (true_positive + false_negative)
+        specificity = true_negative / (true_negative + false_positive)
+        accuracy = (true_negative + true_positive) / (true_negative + false_positive + false_negative + true_positive)
+
+    # Return the performance metrics per threshold
+    return pd.DataFrame({'threshold': thresholds,
+                         'sensitivity': sensitivity,
+                         'specificity': specificity,
+                         'accuracy': accuracy})
+
+
 # Define a function to test presence threshold values
-def determine_optimal_threshold(predict_probability, y_test):
+def determine_optimal_threshold(predict_probability, y_test, exact=False):
     """
     Description: determines the threshold value that minimizes the absolute value difference between sensitivity and specificity to one decimal percentage.
     Inputs: 'predict_probability' -- the predicted probability values
             'y_test' -- the observed binary values
+            'exact' -- a boolean that, if True, tests every distinct probability value instead of steps of 0.001
     Returned Value: Returns the optimal threshold value and the sensitivity, specificity, auc, and accuracy of the optimal threshold value
     Preconditions: requires existing probability predictions and binary responses of the same shape
     """
 
     # Import packages
     import numpy as np
+    from sklearn.metrics import roc_auc_score
+
+    # Calculate sensitivity and specificity values for all candidate thresholds
+    sweep_results = sweep_presence_thresholds(predict_probability, y_test, exact=exact)
 
-    # Iterate through numbers between 0 and 1000 to output a list of sensitivity and specificity values per threshold number
-    i = 1
-    sensitivity_list = []
-    specificity_list = []
-    while i <= 1000:
-        threshold = i / 1000
-        sensitivity, specificity, auc, accuracy = test_presence_threshold(predict_probability, threshold, y_test)
-        sensitivity_list.append(sensitivity)
-        specificity_list.append(specificity)
-        i = i + 1
-
-    # Calculate a list of absolute value difference between sensitivity and specificity and find the optimal threshold
-    difference_list = [np.absolute(a - b) for a, b in zip(sensitivity_list, specificity_list)]
-    value, threshold = min((value, threshold) for (threshold, value) in enumerate(difference_list))
-    threshold = threshold / 1000
+    # Calculate the absolute value difference between sensitivity and specificity and find the optimal threshold
+    difference = np.absolute(sweep_results['sensitivity'].to_numpy() - sweep_results['specificity'].to_numpy())
+    optimal_index = int(np.argmin(difference))
+    if exact:
+        threshold = float(sweep_results['threshold'].iloc[optimal_index])
+    else:
+        # The fixed grid reports the threshold one step below the minimum difference to match previous results
+        threshold = optimal_index / 1000
 
     # Calculate the performance of the optimal threshold
-    sensitivity, specificity, auc, accuracy = test_presence_threshold(predict_probability, threshold, y_test)
+    true_positive, false_positive, true_negative, false_negative = presence_threshold_counts(
+        predict_probability, y_test, [threshold])
+    sensitivity = true_positive[0] / (true_positive[0] + false_negative[0])
+    specificity = true_negative[0] / (true_negative[0] + false_positive[0])
+    accuracy = (true_negative[0] + true_positive[0]) / (true_negative[0] + false_positive[0] + false_negative[0] + true_positive[0])
+
+    # Calculate AUC score
+    auc = roc_auc_score(np.asarray(y_test).astype('int32'), np.asarray(predict_probability).astype(float))
 
     # Return the optimal threshold and the performance metrics of the optimal threshold
     return threshold, sensitivity, specificity, auc, accuracy
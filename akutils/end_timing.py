@@ -1,9 +1,294 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# End timing
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed in an Anaconda Python 3.12+ distribution.
+# Description: "End timing" is a set of functions that report elapsed time and, when profiling is enabled, record nested timings, CPU time, and peak memory of named stages.
+# ---------------------------------------------------------------------------
+
+# Store the active profiler, which is None while profiling is disabled
+_profiler = None
+
+
+# Define a class of stage that does nothing while profiling is disabled
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# Define a class to time a stage within a profiler
+class _Span:
+    __slots__ = ('profiler', 'name', 'path', 'depth', 'start', 'cpu_start', 'rss_start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        # Import packages
+        import time
+
+        # Nest the span under the open span of the same thread
+        stack = self.profiler._stack()
+        parent = stack[-1] if stack else None
+        self.path = self.name if parent is None else f'{parent.path}/{self.name}'
+        self.depth = len(stack)
+        stack.append(self)
+        self.rss_start = peak_rss_mb()
+        self.cpu_start = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Import packages
+        import threading
+        import time
+
+        end = time.perf_counter()
+        cpu_end = time.process_time()
+        peak = peak_rss_mb()
+        self.profiler._stack().pop()
+        self.profiler._record({'name': self.name,
+                               'path': self.path,
+                               'depth': self.depth,
+                               'thread': threading.current_thread().name,
+                               'start_seconds': self.start - self.profiler.origin,
+                               'seconds': end - self.start,
+                               'cpu_seconds': cpu_end - self.cpu_start,
+                               'peak_rss_mb': peak,
+                               'peak_rss_increase_mb': None if peak is None else peak - self.rss_start,
+                               'error': None if exc_type is None else exc_type.__name__})
+        return False
+
+
+# Define a class to record the timings of nested stages
+class Profiler:
+    """
+    Description: records the wall time, process CPU time, and resident memory high-water mark of named stages, nesting stages that are opened within other stages of the same thread
+    Inputs: none
+    Returned Value: Returns a profiler with span, summary, and write methods
+    Preconditions: CPU time is measured for the whole process, so it includes other threads that run during a stage; stages that run in worker processes are recorded only if profiling is enabled in those processes; the peak resident memory is the high-water mark of the whole process at the end of a stage, which may have been reached before the stage, so the increase of the high-water mark during the stage is recorded as well and is zero for stages that stayed below an earlier peak
+    """
+
+    def __init__(self):
+        # Import packages
+        import threading
+        import time
+
+        self.origin = time.perf_counter()
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def span(self, name):
+        """
+        Description: creates a context manager that times a named stage
+        Inputs: 'name' -- the name of the stage
+        Returned Value: Returns a context manager
+        Preconditions: none
+        """
+        return _Span(self, name)
+
+    def summary(self):
+        """
+        Description: aggregates the recorded spans by nested stage path
+        Inputs: none
+        Returned Value: Returns a list of dictionaries with the path, depth, count, total, mean, and maximum seconds, total CPU seconds, the largest process resident memory high-water mark at the end of the stage, the largest increase of that high-water mark during the stage, and the number of errors of each stage
+        Preconditions: none
+        """
+        # Aggregate the spans in the order that stages were first opened
+        with self._lock:
+            records = sorted(self.records, key=lambda record: record['start_seconds'])
+        stages = {}
+        for record in records:
+            stage = stages.setdefault(record['path'], {'path': record['path'],
+                                                       'depth': record['depth'],
+                                                       'count': 0,
+                                                       'seconds': 0.0,
+                                                       'max_seconds': 0.0,
+                                                       'cpu_seconds': 0.0,
+                                                       'peak_rss_mb': None,
+                                                       'peak_rss_increase_mb': None,
+                                                       'errors': 0})
+            stage['count'] += 1
+            stage['seconds'] += record['seconds']
+            stage['max_seconds'] = max(stage['max_seconds'], record['seconds'])
+            stage['cpu_seconds'] += record['cpu_seconds'] or 0.0
+            if record['peak_rss_mb'] is not None:
+                stage['peak_rss_mb'] = max(stage['peak_rss_mb'] or 0.0, record['peak_rss_mb'])
+            if record.get('peak_rss_increase_mb') is not None:
+                stage['peak_rss_increase_mb'] = max(stage['peak_rss_increase_mb'] or 0.0,
+                                                    record['peak_rss_increase_mb'])
+            if record['error'] is not None:
+                stage['errors'] += 1
+        for stage in stages.values():
+            stage['mean_seconds'] = stage['seconds'] / stage['count']
+        return list(stages.values())
+
+    def write(self, output_file, spans=False):
+        """
+        Description: writes the recorded timings to a JSON or CSV file
+        Inputs: 'output_file' -- the path of a .json file, which receives the summary and every span, or of a .csv file
+                'spans' -- if True, a CSV file receives every span instead of the summary
+        Returned Value: Returns the output file
+        Preconditions: peak_rss_mb is the resident memory high-water mark of the whole process at the end of each stage and peak_rss_increase_mb is the increase of that high-water mark during the stage
+        """
+        # Import packages
+        import csv
+        import json
+
+        # Write the summary and spans as JSON
+        if output_file.lower().endswith('.json'):
+            with self._lock:
+                records = list(self.records)
+            with open(output_file, 'w', encoding='utf-8') as json_file:
+                json.dump({'summary': self.summary(), 'spans': records}, json_file, indent=2)
+            return output_file
+
+        # Write the summary or spans as CSV
+        if spans:
+            with self._lock:
+                rows = list(self.records)
+            fields = ['name', 'path', 'depth', 'thread', 'start_seconds', 'seconds', 'cpu_seconds', 'peak_rss_mb',
+                      'peak_rss_increase_mb', 'error']
+        else:
+            rows = self.summary()
+            fields = ['path', 'depth', 'count', 'seconds', 'mean_seconds', 'max_seconds', 'cpu_seconds',
+                      'peak_rss_mb', 'peak_rss_increase_mb', 'errors']
+        with open(output_file, 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        return output_file
+
+
+# Define a function to read the peak resident memory of the process
+def peak_rss_mb():
+    """
+    Description: reads the peak resident memory of the current process
+    Inputs: none
+    Returned Value: Returns the resident memory high-water mark of the process since it started in megabytes, or None if it is not available
+    Preconditions: uses the resource module, which is not available on Windows
+    """
+
+    # Import packages
+    import sys
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # Convert kilobytes on Linux or bytes on macOS to megabytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+# Define a function to enable profiling
+def enable_profiling():
+    """
+    Description: starts recording the stages timed with span and timed in a new profiler
+    Inputs: none
+    Returned Value: Returns the active profiler
+    Preconditions: none
+    """
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+# Define a function to disable profiling
+def disable_profiling():
+    """
+    Description: stops recording stages
+    Inputs: none
+    Returned Value: Returns the profiler that was active, or None
+    Preconditions: none
+    """
+    global _profiler
+    profiler = _profiler
+    _profiler = None
+    return profiler
+
+
+# Define a function to return the active profiler
+def get_profiler():
+    """
+    Description: returns the active profiler
+    Inputs: none
+    Returned Value: Returns the active profiler, or None if profiling is disabled
+    Preconditions: none
+    """
+    return _profiler
+
+
+# Define a function to time a stage
+def span(name):
+    """
+    Description: times a named stage in the active profiler
+    Inputs: 'name' -- the name of the stage
+    Returned Value: Returns a context manager, which does nothing while profiling is disabled
+    Preconditions: none
+    """
+
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_SPAN
+    return profiler.span(name)
+
+
+# Define a decorator to time each call of a function as a stage
+def timed(name=None):
+    """
+    Description: creates a decorator that times each call of a function as a named stage in the active profiler
+    Inputs: 'name' -- the name of the stage; defaults to the name of the function
+    Returned Value: Returns a decorator
+    Preconditions: calls are made directly while profiling is disabled
+    """
+
+    # Import packages
+    import functools
+
+    def decorator(function):
+        stage = function.__name__ if name is None else name
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler
+            if profiler is None:
+                return function(*args, **kwargs)
+            with profiler.span(stage):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 def end_timing(iteration_start):
     """
     Description: calculates the amount of time that a process took
     Inputs: 'iteration_start' -- a time captured using time.time()
     Returned Value: no return
-    Preconditions: requires datetime and time
+    Preconditions: requires datetime and time; if profiling is enabled, the iteration is also recorded as an 'iteration' stage
     """
 
     # Import packages
@@ -15,6 +300,20 @@ def end_timing(iteration_start):
     iteration_elapsed = int(iteration_end - iteration_start)
     iteration_success_time = datetime.datetime.now()
 
+    # Record the iteration in the active profiler
+    profiler = _profiler
+    if profiler is not None:
+        profiler._record({'name': 'iteration',
+                          'path': 'iteration',
+                          'depth': 0,
+                          'thread': None,
+                          'start_seconds': time.perf_counter() - profiler.origin - (iteration_end - iteration_start),
+                          'seconds': iteration_end - iteration_start,
+                          'cpu_seconds': None,
+                          'peak_rss_mb': peak_rss_mb(),
+                          'peak_rss_increase_mb': None,
+                          'error': None})
+
     # Report success
     print(
         f'Completed at {iteration_success_time.strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=iteration_elapsed)})')
@@ -1,19 +1,284 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Geodatabase to dataframe
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed in an ArcGIS Pro Python 3.9+ distribution, or with a stand-in table reader.
+# Description: "Geodatabase to dataframe" is a set of functions that read a geodatabase table into pandas dataframes, optionally by selected columns, rows, and chunks, and keep columnar snapshots of tables for repeated reads.
+# ---------------------------------------------------------------------------
+
+# Define a class to read geodatabase tables with arcpy
+class ArcpyTableReader:
+    """
+    Description: reads field definitions and rows of geodatabase tables with arcpy
+    Inputs: none
+    Returned Value: Returns a table reader to pass to geodatabase_to_dataframe
+    Preconditions: requires arcpy
+    """
+
+    def list_fields(self, table):
+        """
+        Description: lists the fields of a table
+        Inputs: 'table' -- a table contained within a file geodatabase
+        Returned Value: Returns a list of (field name, field type) tuples
+        Preconditions: none
+        """
+        # Import packages
+        import arcpy
+
+        return [(field.name, field.type) for field in arcpy.ListFields(table)]
+
+    def search_cursor(self, table, columns, where_clause=None):
+        """
+        Description: opens a cursor over the rows of a table
+        Inputs: 'table' -- a table contained within a file geodatabase
+                'columns' -- a list of field names to read
+                'where_clause' -- an optional SQL expression that selects rows
+        Returned Value: Returns a context manager that iterates over row tuples
+        Preconditions: none
+        """
+        # Import packages
+        import arcpy
+
+        return arcpy.da.SearchCursor(table, columns, where_clause=where_clause)
+
+    def table_to_numpy(self, table, columns, where_clause=None, null_value=None):
+        """
+        Description: reads the rows of a table into a typed structured array
+        Inputs: 'table' -- a table contained within a file geodatabase
+                'columns' -- a list of field names to read
+                'where_clause' -- an optional SQL expression that selects rows
+                'null_value' -- an optional value that replaces nulls, which are not allowed in integer fields
+        Returned Value: Returns a numpy structured array
+        Preconditions: none
+        """
+        # Import packages
+        import arcpy
+
+        return arcpy.da.TableToNumPyArray(table, columns, where_clause=where_clause, null_value=null_value)
+
+    def table_state(self, table):
+        """
+        Description: summarizes the modification time and row count of a table
+        Inputs: 'table' -- a table contained within a file geodatabase
+        Returned Value: Returns a list of the latest modification time of the files of the table or geodatabase and the row count
+        Preconditions: the modification time is read from the geodatabase folder, so changes to any table of a file geodatabase refresh snapshots of all of its tables
+        """
+        # Import packages
+        import os
+        import arcpy
+
+        # Find the latest modification time of the geodatabase files or table file
+        path = os.path.abspath(table)
+        while path and not os.path.exists(path):
+            path = os.path.dirname(path) if os.path.dirname(path) != path else ''
+        modified = None
+        if os.path.isdir(path):
+            modified = max([entry.stat().st_mtime_ns for entry in os.scandir(path) if entry.is_file()], default=None)
+        elif path:
+            modified = os.stat(path).st_mtime_ns
+
+        return [modified, int(arcpy.management.GetCount(table)[0])]
+
+
+# Define a class to stand in for geodatabase tables with dataframes
+class DataFrameTableReader:
+    """
+    Description: reads tables from a dictionary of dataframes through the same interface as ArcpyTableReader so that geodatabase reads can be run without ArcGIS
+    Inputs: 'tables' -- a dictionary of table names and dataframes
+            'geometry_fields' -- a list of field names reported as geometry fields
+    Returned Value: Returns a table reader to pass to geodatabase_to_dataframe
+    Preconditions: where clauses are evaluated with pandas.DataFrame.query rather than as SQL
+    """
+
+    def __init__(self, tables, geometry_fields=('SHAPE',)):
+        self.tables = tables
+        self.geometry_fields = list(geometry_fields)
+
+    def list_fields(self, table):
+        # Import packages
+        from pandas.api import types
+
+        # Report field types with the names used by arcpy
+        fields = []
+        for name, dtype in self.tables[table].dtypes.items():
+            if name in self.geometry_fields:
+                field_type = 'Geometry'
+            elif types.is_integer_dtype(dtype):
+                field_type = 'Integer'
+            elif types.is_float_dtype(dtype):
+                field_type = 'Double'
+            elif types.is_datetime64_any_dtype(dtype):
+                field_type = 'Date'
+            else:
+                field_type = 'String'
+            fields.append((name, field_type))
+        return fields
+
+    def _select(self, table, columns, where_clause):
+        data = self.tables[table]
+        if where_clause is not None:
+            data = data.query(where_clause)
+        return data[list(columns)]
+
+    def search_cursor(self, table, columns, where_clause=None):
+        # Import packages
+        import contextlib
+
+        rows = self._select(table, columns, where_clause).itertuples(index=False, name=None)
+        return contextlib.nullcontext(rows)
+
+    def table_to_numpy(self, table, columns, where_clause=None, null_value=None):
+        data = self._select(table, columns, where_clause)
+        if null_value is not None:
+            data = data.fillna(null_value)
+        return data.to_records(index=False)
+
+    def table_state(self, table):
+        # Import packages
+        import pandas as pd
+
+        # Hash the contents in place of a modification time
+        data = self.tables[table].drop(columns=self.geometry_fields, errors='ignore')
+        return [int(pd.util.hash_pandas_object(data, index=False).sum()), len(data)]
+
+
+# Define a function to read a geodatabase table in chunks from a cursor
+def _cursor_chunks(reader, table, columns, where_clause, chunksize):
+    # Import packages
+    import itertools
+    import pandas as pd
+
+    # Convert each set of rows to a dataframe while holding the cursor open
+    with reader.search_cursor(table, columns, where_clause) as cursor:
+        while True:
+            rows = list(itertools.islice(cursor, chunksize))
+            if not rows:
+                break
+            yield pd.DataFrame(data=rows, columns=columns)
+
+
 # Define function to read geodatabase table to pandas dataframe
-def geodatabase_to_dataframe(table):
+def geodatabase_to_dataframe(table, columns=None, where_clause=None, chunksize=None, method='cursor', null_value=None,
+                             reader=None):
     """
     Description: creates a pandas dataframe from a geodatabase table
     Inputs: 'table' -- a table contained within a file geodatabase
-    Returned Value: returns a pandas dataframe
-    Preconditions: requires a pre-existing table in a file geodatabase
+            'columns' -- an optional list of field names to read; defaults to all non-geometry fields
+            'where_clause' -- an optional SQL expression that selects rows before they are read
+            'chunksize' -- an optional number of rows; if set, returns a generator of dataframes with up to chunksize rows
+            'method' -- either 'cursor' to read rows with a search cursor or 'numpy' to read typed columns with TableToNumPyArray
+            'null_value' -- an optional value that replaces nulls with the 'numpy' method, which does not allow nulls in integer fields
+            'reader' -- an optional table reader, such as a DataFrameTableReader; defaults to an ArcpyTableReader
+    Returned Value: returns a pandas dataframe, or a generator of dataframes if chunksize is set
+    Preconditions: requires a pre-existing table in a file geodatabase; the 'numpy' method reads the whole selection before splitting it into chunks
     """
 
     # Import packages
-    import arcpy
     import pandas as pd
 
+    # Select the fields to read
+    if reader is None:
+        reader = ArcpyTableReader()
+    if method == 'cursor':
+        excluded_types = ('Geometry',)
+    elif method == 'numpy':
+        excluded_types = ('Geometry', 'Blob', 'Raster')
+    else:
+        raise ValueError(f'Unknown read method: {method}')
+    if columns is None:
+        columns = [name for name, field_type in reader.list_fields(table) if field_type not in excluded_types]
+    else:
+        columns = list(columns)
+
+    # Convert the table to typed columns through a structured array
+    if method == 'numpy':
+        array = reader.table_to_numpy(table, columns, where_clause=where_clause, null_value=null_value)
+        if chunksize is None:
+            return pd.DataFrame(data=array, columns=columns)
+        return (pd.DataFrame(data=array[start:start + chunksize], columns=columns)
+                for start in range(0, len(array), chunksize))
+
+    # Convert table rows to pandas dataframes in chunks
+    if chunksize is not None:
+        return _cursor_chunks(reader, table, columns, where_clause, chunksize)
+
     # Convert table to pandas dataframe
-    columns = [field.name for field in arcpy.ListFields(table) if field.type != 'Geometry']
-    output_data = pd.DataFrame(data=arcpy.da.SearchCursor(table, columns), columns=columns)
+    with reader.search_cursor(table, columns, where_clause) as cursor:
+        output_data = pd.DataFrame(data=list(cursor), columns=columns)
+
+    # Return dataframe
+    return output_data
+
+
+# Define a function to read a geodatabase table through a columnar snapshot
+def geodatabase_snapshot(table, directory, columns=None, where_clause=None, method='cursor', null_value=None,
+                         reader=None, file_format='feather'):
+    """
+    Description: reads a geodatabase table from a memory-mapped Feather or Parquet snapshot, writing or refreshing the snapshot with geodatabase_to_dataframe when the table has changed
+    Inputs: 'table' -- a table contained within a file geodatabase
+            'directory' -- the directory of the snapshot files
+            'columns' -- an optional list of field names to read; defaults to all non-geometry fields
+            'where_clause' -- an optional SQL expression that selects rows before they are read
+            'method' -- either 'cursor' or 'numpy', as in geodatabase_to_dataframe
+            'null_value' -- an optional value that replaces nulls with the 'numpy' method
+            'reader' -- an optional table reader, such as a DataFrameTableReader; defaults to an ArcpyTableReader
+            'file_format' -- either 'feather' for uncompressed Feather files or 'parquet' for compressed Parquet files
+    Returned Value: returns a pandas dataframe
+    Preconditions: requires pyarrow; snapshots are keyed on the table path and read options and refreshed when the modification time or row count from the reader changes; tables with columns that Arrow cannot convert are read without a snapshot
+    """
+
+    # Import packages
+    import hashlib
+    import json
+    import os
+    import uuid
+    import pyarrow as pa
+
+    # Define the snapshot files of the table and read options
+    if file_format not in ('feather', 'parquet'):
+        raise ValueError(f'Unknown snapshot file format: {file_format}')
+    if reader is None:
+        reader = ArcpyTableReader()
+    os.makedirs(directory, exist_ok=True)
+    options = [os.path.abspath(table) if isinstance(reader, ArcpyTableReader) else table,
+               None if columns is None else list(columns), where_clause, method, null_value]
+    key = hashlib.sha256(json.dumps(options, default=str).encode()).hexdigest()
+    data_path = os.path.join(directory, f'{key}.{file_format}')
+    metadata_path = os.path.join(directory, f'{key}.json')
+
+    # Read the snapshot through a memory map if the table has not changed
+    state = reader.table_state(table)
+    try:
+        with open(metadata_path, 'r', encoding='utf-8') as metadata_file:
+            metadata = json.load(metadata_file)
+        if metadata['state'] == state:
+            if file_format == 'feather':
+                import pyarrow.feather as feather
+                return feather.read_table(data_path, memory_map=True).to_pandas()
+            import pyarrow.parquet as pq
+            return pq.read_table(data_path, memory_map=True).to_pandas()
+    except (FileNotFoundError, ValueError, KeyError, pa.ArrowException):
+        pass
+
+    # Read the table and write a new snapshot
+    output_data = geodatabase_to_dataframe(table, columns=columns, where_clause=where_clause, method=method,
+                                           null_value=null_value, reader=reader)
+    try:
+        arrow_table = pa.Table.from_pandas(output_data, preserve_index=False)
+    except (pa.ArrowException, TypeError, ValueError):
+        return output_data
+    temporary = f'.{uuid.uuid4().hex}'
+    if file_format == 'feather':
+        import pyarrow.feather as feather
+        feather.write_feather(arrow_table, data_path + temporary, compression='uncompressed')
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(arrow_table, data_path + temporary)
+    with open(metadata_path + temporary, 'w', encoding='utf-8') as metadata_file:
+        json.dump({'table': options[0], 'state': state}, metadata_file, default=str)
+    os.replace(data_path + temporary, data_path)
+    os.replace(metadata_path + temporary, metadata_path)
 
     # Return dataframe
     return output_data
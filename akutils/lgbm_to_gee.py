@@ -2,7 +2,7 @@
 # ---------------------------------------------------------------------------
 # LightGBM to GEE
 # Author: Timm Nawrocki, Matt Macander
-# Last Updated: 2025-10-02
+# Last Updated: 2026-10-17
 # Usage: Must be executed in an Anaconda Python 3.12+ distribution.
 # Description: "LightGBM to GEE" is a set of functions to convert LightGBM model boosters to GEE-compatible tree strings.
 # ---------------------------------------------------------------------------
@@ -10,116 +10,107 @@
 # Import packages
 import numpy as np
 import pandas as pd
+from .end_timing import timed
 
 def treedf_to_string(df):
     """
     Description: converts a parsed LightGBM tree dataframe to a GEE-compatible string.
     Inputs: 'df' -- a dataframe representing a single tree from a LightGBM model
     Returned Value: returns a string representation of the tree
-    Preconditions: requires a dataframe generated by lgbm_booster_to_tree_df
+    Preconditions: requires a dataframe generated by lgbm_booster_to_tree_df with the index reset for a single tree
     """
     # https://github.com/giswqs/geemap/blob/master/geemap/ml.py
     # the table representation does not have lef vs right node structure
     # so we need to add in right nodes in the correct location
-    # we do this by first calculating which nodes are right and then insert them at the correct index
+    # we do this by listing each split a second time with a ">" sign immediately before its right child
 
-    # get a dict of right node rows and assign key based on index where to insert
+    # convert the columns to lists of python values for fast access by row
+    node_id = df['node_id'].tolist()
+    node_depth = [int(depth) for depth in df['node_depth'].tolist()]
+    children_left = [int(child) for child in df['children_left'].tolist()]
+    children_right = [int(child) for child in df['children_right'].tolist()]
+    is_leaf = df['is_leaf'].tolist()
+    value = df['value'].tolist()
+    criterion = df['criterion'].tolist()
+    n_samples = df['n_samples'].tolist()
+    threshold = df['threshold'].tolist()
+    feature_name = df['feature_name'].tolist()
+    sign = df['sign'].tolist()
+    n_rows = len(node_depth)
+
+    # get the split row to insert before each right child
     inserts = {}
-    for row in df.itertuples():
-        child_r = row.children_right
-        if child_r > row.Index:
-            ordered_row = np.array(row)
-            ordered_row[-1] = ">"
-            inserts[child_r] = ordered_row[1:]  # drop index value
-    # sort the inserts as to keep track of the additive indexing
-    inserts_sorted = {k: inserts[k] for k in sorted(inserts.keys())}
-
-    # loop through the row inserts and add to table (array)
-    table_values = df.values
-    for i, k in enumerate(inserts_sorted.keys()):
-        table_values = np.insert(table_values, (k + i), inserts_sorted[k], axis=0)
-
-    # make the ordered table array into a dataframe
-    # note: df is dtype "object", need to cast later on
-    ordered_df = pd.DataFrame(table_values, columns=df.columns)
-
-    max_depth = np.max(ordered_df.node_depth.astype(int))
-    tree_str = f"1) root {df['n_samples'][0]} 9999 9999 ({df['criterion'].sum()})\n"
+    for index in range(n_rows):
+        if children_right[index] > index:
+            inserts[children_right[index]] = index
+
+    # order the rows as pairs of the source row and whether the row is an inserted right split
+    ordered = []
+    position = [0] * n_rows
+    for index in range(n_rows):
+        if index in inserts:
+            ordered.append((inserts[index], True))
+        position[index] = len(ordered)
+        ordered.append((index, False))
+
+    # map each node id to the first row with that id
+    node_row = {}
+    for index in range(n_rows):
+        node_row.setdefault(node_id[index], index)
+
+    max_depth = max(node_depth)
+    lines = [f"1) root {df['n_samples'][0]} 9999 9999 ({df['criterion'].sum()})\n"]
     previous_depth = -1
-    cnts = []
+    cnt = 0
+    depth_cnts = {}
     # loop through the nodes and calculate the node number and values per node
-    for row in ordered_df.itertuples():
-        node_depth = int(row.node_depth)
-        left = int(row.children_left)
-        right = int(row.children_right)
+    for order_index, (index, inserted) in enumerate(ordered):
+        depth = node_depth[index]
+        left = children_left[index]
+        right = children_right[index]
         if left != right:
-            if row.Index == 0:
+            if order_index == 0:
                 cnt = 2
-            elif previous_depth > node_depth:
-                depths = ordered_df.node_depth.values[: row.Index]
-                idx = np.where(depths == node_depth)[0][-1]
-                # cnt = (cnts[row.Index-1] // 2) + 1
-                cnt = cnts[idx] + 1
-            elif previous_depth < node_depth:
-                cnt = cnts[row.Index - 1] * 2
-            elif previous_depth == node_depth:
-                cnt = cnts[row.Index - 1] + 1
-
-            if node_depth == (max_depth - 1):
-                value = float(ordered_df.iloc[row.Index + 1].value)
-                samps = int(ordered_df.iloc[row.Index + 1].n_samples)
-                criterion = float(ordered_df.iloc[row.Index + 1].criterion)
+            elif previous_depth > depth:
+                # continue from the last original (not inserted) row at the same depth
+                cnt = depth_cnts[depth] + 1
+            elif previous_depth < depth:
+                cnt = cnt * 2
+            elif previous_depth == depth:
+                cnt = cnt + 1
+
+            row_sign = ">" if inserted else str(sign[index])
+            if depth == (max_depth - 1):
+                value_index = ordered[order_index + 1][0]
                 tail = " *\n"
             else:
-                if (
-                        (bool(ordered_df.loc[ordered_df.node_id == left].iloc[0].is_leaf))
-                        and (
-                        bool(
-                            int(row.Index)
-                            < int(ordered_df.loc[ordered_df.node_id == left].index[0])
-                        )
-                )
-                        and (str(row.sign) == "<=")
-                ):
-                    rowx = ordered_df.loc[ordered_df.node_id == left].iloc[0]
-                    tail = " *\n"
-                    value = float(rowx.value)
-                    samps = int(rowx.n_samples)
-                    criterion = float(rowx.criterion)
-
-                elif (
-                        (bool(ordered_df.loc[ordered_df.node_id == right].iloc[0].is_leaf))
-                        and (
-                        bool(
-                            int(row.Index)
-                            < int(ordered_df.loc[ordered_df.node_id == right].index[0])
-                        )
-                )
-                        and (str(row.sign) == ">")
-                ):
-                    rowx = ordered_df.loc[ordered_df.node_id == right].iloc[0]
+                left_index = node_row[left]
+                if is_leaf[left_index] and order_index < position[left_index] and row_sign == "<=":
+                    value_index = left_index
                     tail = " *\n"
-                    value = float(rowx.value)
-                    samps = int(rowx.n_samples)
-                    criterion = float(rowx.criterion)
-
                 else:
-                    value = float(row.value)
-                    samps = int(row.n_samples)
-                    criterion = float(row.criterion)
-                    tail = "\n"
+                    right_index = node_row[right]
+                    if is_leaf[right_index] and order_index < position[right_index] and row_sign == ">":
+                        value_index = right_index
+                        tail = " *\n"
+                    else:
+                        value_index = index
+                        tail = "\n"
 
             # extract out the information needed in each line
-            spacing = (node_depth + 1) * "  "  # for pretty printing
-            fname = str(row.feature_name)  # name of the feature (i.e. band name)
-            tresh = float(row.threshold)  # threshold
-            sign = str(row.sign)
+            spacing = (depth + 1) * "  "  # for pretty printing
+            fname = str(feature_name[index])  # name of the feature (i.e. band name)
+            tresh = float(threshold[index])  # threshold
+            samps = int(n_samples[value_index])
+            node_criterion = float(criterion[value_index])
+            node_value = float(value[value_index])
 
-            tree_str += f"{spacing}{cnt}) {fname} {sign} {tresh:.6f} {samps} {criterion:.4f} {value:.6f}{tail}"
-            previous_depth = node_depth
-        cnts.append(cnt)
+            lines.append(f"{spacing}{cnt}) {fname} {row_sign} {tresh:.6f} {samps} {node_criterion:.4f} {node_value:.6f}{tail}")
+            previous_depth = depth
+        if not inserted:
+            depth_cnts[depth] = cnt
 
-    return tree_str
+    return ''.join(lines)
 
 def lgbm_booster_to_tree_df(booster):
     """
@@ -165,3 +156,373 @@ def lgbm_booster_to_tree_df(booster):
     classifier_df_out = classifier_df_out.fillna(value={'threshold': -2, 'children_right': -1, 'children_left': -1, 'criterion': 0})
 
     return classifier_df_out
+
+def lgbm_tree_to_string(tree, feature_names):
+    """
+    Description: converts a single tree from a LightGBM model dump to a GEE-compatible string.
+    Inputs: 'tree' -- a tree dictionary from the 'tree_info' list of booster.dump_model()
+            'feature_names' -- the list of feature names from booster.dump_model()
+    Returned Value: returns a string representation of the tree identical to treedf_to_string
+    Preconditions: requires a tree with numerical splits only
+    """
+    root = tree['tree_structure']
+
+    # a tree without splits has no sample count or split gains in the tree dataframe used by treedf_to_string
+    if 'split_index' not in root:
+        return "1) root None 9999 9999 (0)\n"
+
+    # sum the split gains in node order (leaves count as zero) to match the root line of treedf_to_string
+    gains = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if 'split_index' in node:
+            gains.append(node['split_gain'])
+            stack.append(node['right_child'])
+            stack.append(node['left_child'])
+        else:
+            gains.append(0.0)
+    lines = [f"1) root {root['internal_count']} 9999 9999 ({np.sum(np.array(gains, dtype='float64'))})\n"]
+
+    # write the left and right branch of each split, numbering node k's children as 2k and 2k + 1
+    # each stack entry is a split node, its node number, its depth, and whether to write its right branch
+    stack = [(root, 1, 0, False)]
+    while stack:
+        node, number, depth, right_side = stack.pop()
+        if node['decision_type'] != '<=':
+            raise ValueError(f'GEE tree strings only support numerical splits, not "{node["decision_type"]}".')
+        child = node['right_child' if right_side else 'left_child']
+        child_split = 'split_index' in child
+
+        # a branch to a leaf reports the leaf values, otherwise the values of the split
+        if child_split:
+            samps = int(node['internal_count'])
+            criterion = float(node['split_gain'])
+            value = float(node['internal_value'])
+            tail = "\n"
+        else:
+            samps = int(child['leaf_count'])
+            criterion = 0.0
+            value = float(child['leaf_value'])
+            tail = " *\n"
+
+        spacing = (depth + 1) * "  "  # for pretty printing
+        fname = str(feature_names[node['split_feature']])  # name of the feature (i.e. band name)
+        tresh = float(node['threshold'])  # threshold
+        sign = ">" if right_side else "<="
+        cnt = 2 * number + right_side
+        lines.append(f"{spacing}{cnt}) {fname} {sign} {tresh:.6f} {samps} {criterion:.4f} {value:.6f}{tail}")
+
+        # write the right branch after the subtree of the left branch
+        if not right_side:
+            stack.append((node, number, depth, True))
+        if child_split:
+            stack.append((child, cnt, depth + 1, False))
+
+    return ''.join(lines)
+
+def lgbm_booster_to_strings(booster, chunk_iterations=100):
+    """
+    Description: converts a LightGBM booster object to GEE-compatible tree strings one tree at a time without creating a tree dataframe.
+    Inputs: 'booster' -- a LightGBM booster object
+            'chunk_iterations' -- the number of boosting iterations to dump from the booster at once
+    Returned Value: returns a generator of tree strings in tree order
+    Preconditions: requires a trained LightGBM model with numerical splits only
+    """
+    # dump the same iterations as booster.trees_to_dataframe, which uses the best iteration if one exists
+    trees_per_iteration = booster.num_model_per_iteration()
+    n_iterations = booster.num_trees() // trees_per_iteration
+    if booster.best_iteration > 0:
+        n_iterations = min(booster.best_iteration, n_iterations)
+
+    # dump the model in chunks of iterations so that memory does not grow with the size of the model
+    for start_iteration in range(0, n_iterations, chunk_iterations):
+        model = booster.dump_model(num_iteration=min(chunk_iterations, n_iterations - start_iteration),
+                                   start_iteration=start_iteration)
+        feature_names = model['feature_names']
+        trees = model['tree_info']
+        del model
+        for tree in trees:
+            yield lgbm_tree_to_string(tree, feature_names)
+
+@timed('tree_export')
+def lgbm_booster_to_file(booster, output_file, chunk_iterations=100):
+    """
+    Description: writes the GEE-compatible tree strings of a LightGBM booster object to a text file.
+    Inputs: 'booster' -- a LightGBM booster object
+            'output_file' -- the path of the output text file
+            'chunk_iterations' -- the number of boosting iterations to dump from the booster at once
+    Returned Value: returns the number of trees written; the file contains one tree per line with line breaks replaced by "#"
+    Preconditions: requires a trained LightGBM model with numerical splits only
+    """
+    # write each tree as it is converted, following the one tree per line format of geemap
+    tree_count = 0
+    with open(output_file, 'w') as file:
+        for tree_string in lgbm_booster_to_strings(booster, chunk_iterations=chunk_iterations):
+            file.write(tree_string.replace('\n', '#') + '\n')
+            tree_count += 1
+
+    return tree_count
+
+def compact_tree_string(tree_string, feature_codes=None):
+    """
+    Description: shortens a GEE-compatible tree string by removing trailing zeros from thresholds and values, rounding the unused criterion to whole numbers, and optionally replacing feature names with codes.
+    Inputs: 'tree_string' -- a tree string generated by treedf_to_string or lgbm_tree_to_string
+            'feature_codes' -- an optional dictionary of feature names to shorter feature codes
+    Returned Value: returns a shortened tree string that produces the same predictions
+    Preconditions: requires a tree string generated by treedf_to_string or lgbm_tree_to_string
+    """
+    # define a function to remove trailing zeros from a fixed precision number
+    def strip_zeros(number):
+        if '.' in number:
+            number = number.rstrip('0').rstrip('.')
+        return '0' if number == '-0' else number
+
+    lines = []
+    for line in tree_string.splitlines():
+        spacing = line[:len(line) - len(line.lstrip(' '))]
+        fields = line.lstrip(' ').split(' ')
+        if fields[1] == 'root':
+            # the root line reports the total criterion in parentheses
+            fields[5] = f"({float(fields[5][1:-1]):.0f})"
+        else:
+            # split lines report the node, feature, sign, threshold, samples, criterion, value, and optional leaf marker
+            if feature_codes is not None:
+                fields[1] = feature_codes[fields[1]]
+            fields[3] = strip_zeros(fields[3])
+            fields[5] = f"{float(fields[5]):.0f}"
+            fields[6] = strip_zeros(fields[6])
+        lines.append(spacing + ' '.join(fields) + '\n')
+
+    return ''.join(lines)
+
+def _tree_dfs_to_strings(tree_dfs, compact, feature_codes):
+    # convert a batch of single tree dataframes in a worker process
+    tree_strings = [treedf_to_string(tree_df) for tree_df in tree_dfs]
+    if compact:
+        tree_strings = [compact_tree_string(tree_string, feature_codes) for tree_string in tree_strings]
+    return tree_strings
+
+@timed('tree_export')
+def lgbm_booster_to_gee_files(booster, output_folder, prefix='trees', n_workers=1, trees_per_task=50,
+                              compact=False, feature_table=False, max_bytes=10000000):
+    """
+    Description: converts all trees of a LightGBM booster object to GEE-compatible tree strings across a process pool and writes them in tree order to size-bounded text files.
+    Inputs: 'booster' -- a LightGBM booster object
+            'output_folder' -- the folder in which to write the text files
+            'prefix' -- the prefix of the output file names
+            'n_workers' -- the number of worker processes used to convert trees
+            'trees_per_task' -- the number of trees sent to a worker process at once
+            'compact' -- if True, shortens each tree string with compact_tree_string
+            'feature_table' -- if True, replaces feature names with short codes and writes a table of the codes (requires compact)
+            'max_bytes' -- the maximum size of each text file; a single tree larger than this is written to its own file
+    Returned Value: returns a list of the text files written, in tree order, followed by the feature table if requested
+    Preconditions: requires a trained LightGBM model; each file contains one tree per line with line breaks replaced by "#"
+    """
+    # Import packages
+    import multiprocessing
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    if feature_table and not compact:
+        raise ValueError('A feature table requires compact output.')
+    os.makedirs(output_folder, exist_ok=True)
+    output_files = []
+
+    # split the parsed booster into single tree dataframes in tree order
+    tree_df = lgbm_booster_to_tree_df(booster)
+    tree_dfs = [group.reset_index(drop=True) for tree_index, group in tree_df.groupby('tree_index', sort=True)]
+    del tree_df
+    batches = [tree_dfs[start:start + trees_per_task] for start in range(0, len(tree_dfs), trees_per_task)]
+
+    # replace feature names with short codes and write the table of codes
+    feature_codes = None
+    if feature_table:
+        feature_names = booster.feature_name()
+        feature_codes = {name: f'b{index}' for index, name in enumerate(feature_names)}
+        table_file = os.path.join(output_folder, f'{prefix}_features.csv')
+        pd.DataFrame({'code': list(feature_codes.values()),
+                      'feature_name': feature_names}).to_csv(table_file, index=False)
+
+    # define a function to start a new size-bounded text file
+    def open_chunk():
+        chunk_file = os.path.join(output_folder, f'{prefix}_{len(output_files) + 1:03d}.txt')
+        output_files.append(chunk_file)
+        return open(chunk_file, 'w', encoding='utf-8')
+
+    # convert the trees serially or across a process pool, writing the results in tree order
+    if n_workers > 1:
+        # start workers with spawn because forking after LightGBM has initialized OpenMP can deadlock
+        executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'))
+        results = executor.map(_tree_dfs_to_strings, batches, [compact] * len(batches),
+                               [feature_codes] * len(batches))
+    else:
+        executor = None
+        results = (_tree_dfs_to_strings(batch, compact, feature_codes) for batch in batches)
+    file = None
+    chunk_bytes = 0
+    try:
+        for tree_strings in results:
+            for tree_string in tree_strings:
+                line = tree_string.replace('\n', '#') + '\n'
+                line_bytes = len(line.encode('utf-8'))
+                if file is None or (chunk_bytes > 0 and chunk_bytes + line_bytes > max_bytes):
+                    if file is not None:
+                        file.close()
+                    file = open_chunk()
+                    chunk_bytes = 0
+                file.write(line)
+                chunk_bytes += line_bytes
+    finally:
+        if file is not None:
+            file.close()
+        if executor is not None:
+            executor.shutdown()
+
+    if feature_table:
+        output_files.append(table_file)
+
+    return output_files
+
+def parse_gee_trees(tree_strings, feature_names):
+    """
+    Description: parses GEE-compatible tree strings into flat node arrays that can be evaluated locally.
+    Inputs: 'tree_strings' -- an iterable of tree strings, with line breaks written either as new lines or as "#"
+            'feature_names' -- the list of feature names or codes in the column order of the predictor matrix
+    Returned Value: returns a dictionary of node arrays with the root node of each tree, the feature index, threshold, left child, and right child of each split node, and the value of each leaf node; leaf nodes point to themselves
+    Preconditions: requires tree strings generated by treedf_to_string, lgbm_tree_to_string, or compact_tree_string
+    """
+    feature_index = {name: index for index, name in enumerate(feature_names)}
+    roots = []
+    features = []
+    thresholds = []
+    left = []
+    right = []
+    values = []
+    max_depth = 0
+
+    for tree_string in tree_strings:
+        # read the split, threshold, value, and leaf marker of each node number
+        nodes = {}
+        for line in tree_string.replace('#', '\n').splitlines()[1:]:
+            fields = line.split()
+            if not fields:
+                continue
+            nodes[int(fields[0][:-1])] = (fields[1], fields[2], float(fields[3]), float(fields[6]), fields[-1] == '*')
+
+        # number the nodes of the tree after the nodes of all previous trees
+        offset = len(values)
+        numbers = [1] + sorted(nodes)
+        local_index = {number: offset + index for index, number in enumerate(numbers)}
+        roots.append(offset)
+        for number in numbers:
+            index = local_index[number]
+            if number in nodes and nodes[number][4]:
+                # a leaf adds its value and points to itself
+                features.append(0)
+                thresholds.append(np.inf)
+                left.append(index)
+                right.append(index)
+                values.append(nodes[number][3])
+                max_depth = max(max_depth, number.bit_length() - 1)
+            elif 2 * number in nodes:
+                # a split sends values less than or equal to the threshold to node 2k and others to node 2k + 1
+                fname, sign, threshold = nodes[2 * number][:3]
+                features.append(feature_index[fname])
+                thresholds.append(threshold)
+                left.append(local_index[2 * number])
+                right.append(local_index[2 * number + 1])
+                values.append(0.0)
+            else:
+                # a tree without splits does not report a value
+                features.append(0)
+                thresholds.append(np.inf)
+                left.append(index)
+                right.append(index)
+                values.append(0.0)
+
+    return {'roots': np.array(roots, dtype='int64'),
+            'feature': np.array(features, dtype='int64'),
+            'threshold': np.array(thresholds, dtype='float64'),
+            'left': np.array(left, dtype='int64'),
+            'right': np.array(right, dtype='int64'),
+            'value': np.array(values, dtype='float64'),
+            'max_depth': max_depth}
+
+def predict_gee_trees(trees, X, n_classes=1, chunk_size=4194304):
+    """
+    Description: predicts the summed leaf values of parsed GEE tree strings for a predictor matrix, vectorized across rows and trees.
+    Inputs: 'trees' -- a dictionary of node arrays generated by parse_gee_trees
+            'X' -- a numpy array or dataframe of predictors in the column order used to parse the trees
+            'n_classes' -- the number of trees per boosting iteration, which are summed separately for each class
+            'chunk_size' -- the approximate number of row and tree pairs evaluated at once
+    Returned Value: returns an array of raw scores with one column per class when n_classes is greater than one
+    Preconditions: requires trees parsed by parse_gee_trees; missing values follow the greater than branch
+    """
+    X = np.asarray(X, dtype='float64')
+    n_features = X.shape[1]
+    roots = trees['roots'].astype('int32')
+    feature = trees['feature'].astype('int32')
+    threshold = trees['threshold']
+    left = trees['left'].astype('int32')
+    right = trees['right'].astype('int32')
+    is_leaf = left == np.arange(left.shape[0])
+    n_trees = roots.shape[0]
+    tree_class = np.arange(n_trees) % n_classes
+    scores = np.zeros((X.shape[0], n_classes), dtype='float64')
+    chunk_rows = max(1, chunk_size // max(1, n_trees))
+
+    # move every row down every tree one level at a time, dropping row and tree pairs once they reach a leaf
+    for start in range(0, X.shape[0], chunk_rows):
+        X_chunk = np.ascontiguousarray(X[start:start + chunk_rows])
+        n_rows = X_chunk.shape[0]
+        X_flat = X_chunk.ravel()
+        nodes = np.tile(roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows, dtype='int64') * n_features, n_trees)
+        active = np.arange(nodes.shape[0])
+        for depth in range(trees['max_depth']):
+            active_nodes = nodes[active]
+            split = ~is_leaf[active_nodes]
+            active = active[split]
+            active_nodes = active_nodes[split]
+            if active.shape[0] == 0:
+                break
+            go_left = X_flat[row_offset[active] + feature[active_nodes]] <= threshold[active_nodes]
+            nodes[active] = np.where(go_left, left[active_nodes], right[active_nodes])
+        leaf_values = trees['value'][nodes].reshape(n_rows, n_trees)
+        for class_index in range(n_classes):
+            scores[start:start + n_rows, class_index] = leaf_values[:, tree_class == class_index].sum(axis=1)
+
+    return scores[:, 0] if n_classes == 1 else scores
+
+def compare_gee_trees(booster, tree_strings, X, feature_names=None, chunk_size=4194304):
+    """
+    Description: compares the predictions of GEE-compatible tree strings to the raw scores of the LightGBM booster they were exported from.
+    Inputs: 'booster' -- a LightGBM booster object
+            'tree_strings' -- an iterable of tree strings exported from the booster
+            'X' -- a numpy array or dataframe of predictors
+            'feature_names' -- the feature names or codes used in the tree strings in the column order of X; defaults to the dataframe columns or the booster feature names
+            'chunk_size' -- the approximate number of row and tree pairs evaluated at once
+    Returned Value: returns a dictionary with the largest absolute difference, the row where it occurs, and the tree string and booster raw scores
+    Preconditions: requires tree strings exported from all trees of the booster
+    """
+    # use the column names of the predictors when the feature names are not provided
+    if feature_names is None:
+        feature_names = list(X.columns) if isinstance(X, pd.DataFrame) else booster.feature_name()
+
+    # predict the tree strings and the booster raw scores
+    n_classes = booster.num_model_per_iteration()
+    trees = parse_gee_trees(tree_strings, feature_names)
+    gee_score = predict_gee_trees(trees, X, n_classes=n_classes, chunk_size=chunk_size)
+    booster_score = booster.predict(X, raw_score=True)
+
+    # find the largest difference
+    difference = np.abs(gee_score - booster_score)
+    if difference.ndim > 1:
+        difference = difference.max(axis=1)
+    max_row = int(np.argmax(difference)) if difference.size > 0 else -1
+
+    return {'max_difference': float(difference[max_row]) if max_row >= 0 else 0.0,
+            'max_row': max_row,
+            'gee_score': gee_score,
+            'booster_score': booster_score}
@@ -2,188 +2,682 @@
 # ---------------------------------------------------------------------------
 # Optimization for LightGBM
 # Author: Timm Nawrocki
-# Last Updated: 2024-11-24
+# Last Updated: 2026-10-17
 # Usage: Must be executed in an Anaconda Python 3.12+ distribution.
 # Description: "Optimization for LightGBM" is a set of functions that perform Bayesian optimization on either a LightGBM classifier or regressor.
 # ---------------------------------------------------------------------------
 
-# Define a function to calculate the cross validated balanced accuracy score for the classifier
-def cross_val_bacc_classifier(estimator, data, all_variables, predictor_all, target_field, stratify_field, group_field):
+# Import profiling decorator
+from .end_timing import timed
+
+# Define the hyperparameter search space shared by the classifier and regressor
+LGBM_PBOUNDS = {
+    'num_leaves': (5, 200),
+    'max_depth': (3, 12),
+    'learning_rate': (0.001, 0.2),
+    'n_estimators': (50, 1000),
+    'min_split_gain': (0.001, 0.1),
+    'min_child_weight': (0.001, 1),
+    'min_child_samples': (1, 200),
+    'subsample': (0.3, 0.9),
+    'colsample_bytree': (0.3, 0.9),
+    'reg_alpha': (0, 5),
+    'reg_lambda': (0, 5)
+}
+
+# Define the fold plan used by worker processes during parallel optimization
+_worker_fold_plan = None
+
+
+# Define a class to store the inner cross validation splits and predictor matrix
+class FoldPlan:
+    """
+    Description: computes inner cross validation split indices and a single predictor matrix once so that repeated cross validation iterations only index into shared arrays
+    Inputs: 'data' -- the covariate data to conduct the model training and validation
+            'predictor_all' -- a list of predictor field names
+            'target_field' -- a list containing the response field name
+            'stratify_field' -- a list containing the field name used to stratify the splits
+            'group_field' -- a list containing the field name used to group the splits
+            'n_splits' -- the number of inner cross validation splits
+            'dtype' -- the data type of the predictor matrix
+            'predictors' -- an optional existing predictor matrix to use instead of converting the predictors in the data
+            'rows' -- an optional array of the predictor matrix rows that correspond to the rows of the data
+            'folds' -- an optional list of existing train and test index pairs to use instead of creating new splits
+            'shared_memory' -- an optional shared memory block that contains the predictor matrix
+    Returned Value: Returns a fold plan with predictors, target, and folds attributes
+    Preconditions: requires pre-processed X and y data
+    """
+
+    def __init__(self, data, predictor_all, target_field, stratify_field, group_field, n_splits=5, dtype='float32',
+                 predictors=None, rows=None, folds=None, shared_memory=None):
+        # Import packages
+        import numpy as np
+        from sklearn.model_selection import StratifiedGroupKFold
+
+        # Store the predictor matrix and response values
+        if predictors is None:
+            predictors = np.ascontiguousarray(data[predictor_all].to_numpy(dtype=dtype))
+        self.predictors = predictors
+        self.rows = rows
+        self.target = data[target_field[0]].to_numpy(dtype=float)
+        self.predictor_all = list(predictor_all)
+        self.n_splits = n_splits
+        self._shared_memory = shared_memory
+
+        # Create inner cross validation splits
+        if folds is None:
+            inner_cv_splits = StratifiedGroupKFold(n_splits=n_splits)
+            folds = [(train_index, test_index) for train_index, test_index in
+                     inner_cv_splits.split(np.zeros((self.target.shape[0], 1)),
+                                           data[stratify_field[0]].astype('int32'),
+                                           data[group_field[0]].astype('int32'))]
+        self.folds = folds
+
+        # Store binned LightGBM datasets and fingerprints once they are calculated
+        self._datasets = {}
+        self._dataset_min_child_samples = {}
+        self._filter_probes = {}
+        self._fingerprints = {}
+
+    def __len__(self):
+        return len(self.folds)
+
+    def __getstate__(self):
+        # Exclude LightGBM datasets, which cannot be copied between processes
+        state = self.__dict__.copy()
+        state['_datasets'] = {}
+        state['_dataset_min_child_samples'] = {}
+        state['_filter_probes'] = {}
+        # Pass a shared predictor matrix by reference to its shared memory block
+        if self._shared_memory is not None:
+            state['predictors'] = (self.predictors.shape, self.predictors.dtype.str)
+        return state
+
+    def __setstate__(self, state):
+        # Import packages
+        import numpy as np
+
+        # Attach to a shared predictor matrix
+        self.__dict__.update(state)
+        if self._shared_memory is not None:
+            shape, dtype = state['predictors']
+            self.predictors = np.ndarray(shape, dtype=dtype, buffer=self._shared_memory.buf)
+
+    def fold_predictors(self, index):
+        """
+        Description: returns the predictor rows for an array of fold plan row indices
+        Inputs: 'index' -- an array of row indices relative to the fold plan data
+        Returned Value: Returns a predictor matrix
+        Preconditions: none
+        """
+        if self.rows is not None:
+            index = self.rows[index]
+        return self.predictors[index]
+
+    def fingerprint(self, *settings):
+        """
+        Description: calculates a hash of the predictor matrix, response values, predictor names, inner splits, and any additional settings
+        Inputs: 'settings' -- additional values that change the cross validation scores, such as the model type
+        Returned Value: Returns a hexadecimal hash string
+        Preconditions: none
+        """
+        # Import packages
+        import hashlib
+
+        # Return the fingerprint if it has been calculated
+        if settings in self._fingerprints:
+            return self._fingerprints[settings]
+
+        # Hash the data and splits
+        predictors = self.predictors if self.rows is None else self.predictors[self.rows]
+        digest = hashlib.sha256()
+        digest.update(repr((self.predictor_all, predictors.shape, str(predictors.dtype), settings)).encode())
+        digest.update(predictors.tobytes())
+        digest.update(self.target.tobytes())
+        for train_index, test_index in self.folds:
+            digest.update(test_index.tobytes())
+        self._fingerprints[settings] = digest.hexdigest()
+        return self._fingerprints[settings]
+
+    def _filter_dataset(self, fold, model_type, min_child_samples):
+        # Import packages
+        import lightgbm as lgb
+        from sklearn.utils.class_weight import compute_sample_weight
+
+        # Construct the train dataset with the feature pre-filtering applied by the sklearn estimators
+        train_index = self.folds[fold][0]
+        y_inner = self.target[train_index]
+        weight = None
+        if model_type == 'classifier':
+            # Match the balanced class weights applied by LGBMClassifier
+            y_inner = y_inner.astype('int32')
+            weight = compute_sample_weight('balanced', y_inner)
+        dataset = lgb.Dataset(self.fold_predictors(train_index),
+                              label=y_inner,
+                              weight=weight,
+                              params={'min_data_in_leaf': min_child_samples, 'verbosity': -1},
+                              free_raw_data=True).construct()
+        kept = tuple(dataset.feature_num_bin(feature) > 0 for feature in range(dataset.num_feature()))
+        return dataset, kept
+
+    def _kept_features(self, fold, model_type, min_child_samples):
+        # Store the features kept at each probed min_child_samples and the datasets of each set of kept features
+        probes = self._filter_probes.setdefault((model_type, fold), {})
+        if not probes:
+            # Probe the bounds of the search space, since features are only removed as min_child_samples increases
+            for bound in LGBM_PBOUNDS['min_child_samples']:
+                dataset, kept = self._filter_dataset(fold, model_type, int(bound))
+                probes[int(bound)] = kept
+                self._store_train_dataset(model_type, fold, kept, int(bound), dataset)
+
+        # Use the features of a probe, or of two probes that bracket the value and keep the same features
+        if min_child_samples in probes:
+            return probes[min_child_samples]
+        lower = [probe for probe in probes if probe < min_child_samples]
+        upper = [probe for probe in probes if probe > min_child_samples]
+        if lower and upper and probes[max(lower)] == probes[min(upper)]:
+            return probes[max(lower)]
+
+        # Probe the value
+        dataset, kept = self._filter_dataset(fold, model_type, min_child_samples)
+        probes[min_child_samples] = kept
+        self._store_train_dataset(model_type, fold, kept, min_child_samples, dataset)
+        return kept
+
+    def _store_train_dataset(self, model_type, fold, kept, min_child_samples, dataset):
+        # Keep the dataset constructed with the lowest min_child_samples, since LightGBM cannot lower it later
+        key = (model_type, fold, 'train', kept)
+        if key not in self._datasets or min_child_samples < self._dataset_min_child_samples[key]:
+            self._datasets[key] = dataset
+            self._dataset_min_child_samples[key] = min_child_samples
+            self._datasets.pop((model_type, fold, 'test', kept), None)
+
+    def fold_dataset(self, fold, model_type, partition='train', min_child_samples=None):
+        """
+        Description: returns the binned LightGBM dataset for a partition of an inner cross validation split, constructing it on first use
+        Inputs: 'fold' -- the zero-based index of the inner cross validation split
+                'model_type' -- either 'classifier' or 'regressor'
+                'partition' -- either 'train' or 'test'; the test dataset uses the bins of the train dataset for validation
+                'min_child_samples' -- the min_child_samples of the model to train; features that cannot be split with this many samples on each side are removed as by LGBMClassifier and LGBMRegressor; if None, no features are removed
+        Returned Value: Returns a constructed LightGBM dataset
+        Preconditions: requires lightgbm; datasets are shared by values of min_child_samples that keep the same features
+        """
+        # Import packages
+        import lightgbm as lgb
+        from sklearn.utils.class_weight import compute_sample_weight
+
+        # Identify the set of features kept for the value of min_child_samples
+        kept = None
+        if min_child_samples is not None:
+            kept = self._kept_features(fold, model_type, int(min_child_samples))
+
+        # Construct the dataset if it has not been created
+        key = (model_type, fold, partition, kept)
+        if key not in self._datasets:
+            reference = None
+            params = {'feature_pre_filter': False, 'verbosity': -1}
+            if partition == 'test':
+                reference = self.fold_dataset(fold, model_type, min_child_samples=min_child_samples)
+                params = dict(reference.params)
+            partition_index = self.folds[fold][0 if partition == 'train' else 1]
+            y_inner = self.target[partition_index]
+            weight = None
+            if model_type == 'classifier':
+                # Match the balanced class weights applied by LGBMClassifier
+                y_inner = y_inner.astype('int32')
+                weight = compute_sample_weight('balanced', y_inner)
+            # Disable feature pre-filtering of train datasets with all features, and bin test datasets with the parameters of the train dataset, which also selects their features
+            self._datasets[key] = lgb.Dataset(self.fold_predictors(partition_index),
+                                              label=y_inner,
+                                              weight=weight,
+                                              reference=reference,
+                                              params=params,
+                                              free_raw_data=True).construct()
+        return self._datasets[key]
+
+    def clear_datasets(self):
+        """
+        Description: releases the binned LightGBM datasets so that their memory can be freed
+        Inputs: none
+        Returned Value: no return
+        Preconditions: datasets are constructed again on next use
+        """
+        self._datasets = {}
+        self._dataset_min_child_samples = {}
+        self._filter_probes = {}
+
+
+# Define a function to create a fold plan for the classifier
+def classifier_fold_plan(data, predictor_all, target_field, stratify_field, group_field, **kwargs):
+    """
+    Description: creates the inner cross validation fold plan used by the LightGBM classifier
+    Inputs: 'data' -- the covariate data to conduct the model training and validation
+            'kwargs' -- optional keyword arguments passed to FoldPlan
+            All other inputs are field name lists
+    Returned Value: Returns a fold plan
+    Preconditions: requires pre-processed X and y data
+    """
+    return FoldPlan(data, predictor_all, target_field, stratify_field, group_field, **kwargs)
+
+
+# Define a function to create a fold plan for the regressor
+def regressor_fold_plan(data, predictor_all, target_field, stratify_field, group_field, predictors=None, **kwargs):
+    """
+    Description: creates the inner cross validation fold plan used by the LightGBM regressor from the valid abundance observations
+    Inputs: 'data' -- the covariate data to conduct the model training and validation
+            'predictors' -- an optional existing predictor matrix aligned to all rows of the data
+            'kwargs' -- optional keyword arguments passed to FoldPlan
+            All other inputs are field name lists
+    Returned Value: Returns a fold plan
+    Preconditions: requires pre-processed X and y data
+    """
+    # Import packages
+    import numpy as np
+
+    # Limit data to valid abundance observations
+    valid = (data[target_field[0]] >= 0).to_numpy()
+    regress_inner = data[valid]
+    if predictors is not None:
+        kwargs['rows'] = np.flatnonzero(valid)
+    return FoldPlan(regress_inner, predictor_all, target_field, stratify_field, group_field,
+                    predictors=predictors, **kwargs)
+
+
+# Define a function to round hyperparameter values to the values used by LightGBM
+def effective_lgbm_parameters(parameters):
+    """
+    Description: converts the continuous values proposed by the optimizer to the values used to train a model, so that points that produce the same model can be identified
+    Inputs: 'parameters' -- a dictionary of hyperparameter values keyed by the names in LGBM_PBOUNDS
+    Returned Value: Returns a dictionary of hyperparameter values with integer parameters truncated
+    Preconditions: none
+    """
+    integer_parameters = ['num_leaves', 'max_depth', 'n_estimators', 'min_child_samples']
+    return {key: int(parameters[key]) if key in integer_parameters else float(parameters[key])
+            for key in LGBM_PBOUNDS}
+
+
+# Define a function to create a LightGBM estimator from a set of hyperparameter values
+def create_lgbm_estimator(model_type, parameters, n_jobs=2):
+    """
+    Description: creates a LightGBM classifier or regressor with a particular set of hyperparameter values
+    Inputs: 'model_type' -- either 'classifier' or 'regressor'
+            'parameters' -- a dictionary of hyperparameter values keyed by the names in LGBM_PBOUNDS
+            'n_jobs' -- the number of threads used by LightGBM
+    Returned Value: Returns an unfitted LightGBM estimator
+    Preconditions: requires lightgbm
+    """
+
+    # Import packages
+    from lightgbm import LGBMClassifier
+    from lightgbm import LGBMRegressor
+
+    # Define estimator parameters shared by the classifier and regressor
+    effective = effective_lgbm_parameters(parameters)
+    estimator_parameters = {
+        'boosting_type': 'gbdt',
+        'num_leaves': effective['num_leaves'],
+        'max_depth': effective['max_depth'],
+        'learning_rate': effective['learning_rate'],
+        'n_estimators': effective['n_estimators'],
+        'min_split_gain': effective['min_split_gain'],
+        'min_child_weight': effective['min_child_weight'],
+        'min_child_samples': effective['min_child_samples'],
+        'subsample': effective['subsample'],
+        'subsample_freq': 1,
+        'colsample_bytree': effective['colsample_bytree'],
+        'reg_alpha': effective['reg_alpha'],
+        'reg_lambda': effective['reg_lambda'],
+        'n_jobs': n_jobs,
+        'importance_type': 'gain',
+        'verbosity': -1
+    }
+
+    # Define estimator
+    if model_type == 'classifier':
+        estimator = LGBMClassifier(objective='binary', class_weight='balanced', **estimator_parameters)
+    elif model_type == 'regressor':
+        estimator = LGBMRegressor(objective='regression', **estimator_parameters)
+    else:
+        raise ValueError(f'Model type must be either "classifier" or "regressor", not "{model_type}".')
+
+    return estimator
+
+
+# Define a function to train an estimator on one inner cross validation split
+@timed('cv_fold')
+def predict_inner_fold(estimator, fold_plan, fold, model_type):
+    """
+    Description: trains an estimator on the train partition of an inner cross validation split and predicts the test partition
+    Inputs: 'estimator' -- an unfitted LightGBM estimator
+            'fold_plan' -- a fold plan containing the split indices and predictor matrix
+            'fold' -- the zero-based index of the inner cross validation split
+            'model_type' -- either 'classifier' or 'regressor'
+    Returned Value: Returns the presence probabilities or predicted values of the test partition
+    Preconditions: requires a fold plan created by classifier_fold_plan or regressor_fold_plan
+    """
+
+    # Identify X and y inner train and test splits
+    train_index, test_index = fold_plan.folds[fold]
+    y_inner = fold_plan.target[train_index]
+    if model_type == 'classifier':
+        y_inner = y_inner.astype('int32')
+
+    # Train estimator on the inner train data
+    estimator.fit(fold_plan.fold_predictors(train_index), y_inner)
+
+    # Predict inner test data
+    if model_type == 'classifier':
+        return estimator.predict_proba(fold_plan.fold_predictors(test_index))[:, 1]
+    return estimator.predict(fold_plan.fold_predictors(test_index))
+
+
+# Define a function to convert a set of hyperparameter values to LightGBM training parameters
+def lgbm_train_parameters(model_type, parameters, n_jobs=2):
+    """
+    Description: converts a set of hyperparameter values to the parameters and number of boosting rounds used by the native LightGBM training API
+    Inputs: 'model_type' -- either 'classifier' or 'regressor'
+            'parameters' -- a dictionary of hyperparameter values keyed by the names in LGBM_PBOUNDS
+            'n_jobs' -- the number of threads used by LightGBM
+    Returned Value: Returns a dictionary of training parameters and the number of boosting rounds
+    Preconditions: the parameters match those set by create_lgbm_estimator
+    """
+
+    # Define training parameters
+    effective = effective_lgbm_parameters(parameters)
+    train_parameters = {
+        'boosting_type': 'gbdt',
+        'objective': 'binary' if model_type == 'classifier' else 'regression',
+        'num_leaves': effective['num_leaves'],
+        'max_depth': effective['max_depth'],
+        'learning_rate': effective['learning_rate'],
+        'min_split_gain': effective['min_split_gain'],
+        'min_child_weight': effective['min_child_weight'],
+        'min_child_samples': effective['min_child_samples'],
+        'subsample': effective['subsample'],
+        'subsample_freq': 1,
+        'colsample_bytree': effective['colsample_bytree'],
+        'reg_alpha': effective['reg_alpha'],
+        'reg_lambda': effective['reg_lambda'],
+        'n_jobs': n_jobs,
+        'verbosity': -1
+    }
+
+    return train_parameters, effective['n_estimators']
+
+
+# Define a function to train a booster on one inner cross validation split using a binned dataset
+@timed('cv_fold')
+def train_inner_fold(model_type, parameters, fold_plan, fold, n_jobs=2, early_stopping_rounds=None):
+    """
+    Description: trains a LightGBM booster on the binned dataset of an inner cross validation split and predicts the test partition
+    Inputs: 'model_type' -- either 'classifier' or 'regressor'
+            'parameters' -- a dictionary of hyperparameter values keyed by the names in LGBM_PBOUNDS
+            'fold_plan' -- a fold plan containing the split indices and predictor matrix
+            'fold' -- the zero-based index of the inner cross validation split
+            'n_jobs' -- the number of threads used by LightGBM
+            'early_stopping_rounds' -- if set, stops boosting when the score on the inner test partition has not improved for this many rounds
+    Returned Value: Returns the presence probabilities or predicted values of the test partition and the number of boosting rounds used
+    Preconditions: without early stopping, produces the same predictions as predict_inner_fold with an estimator from create_lgbm_estimator
+    """
+
+    # Import packages
+    import lightgbm as lgb
+
+    # Use the inner test partition as the validation set for early stopping
+    train_parameters, num_boost_round = lgbm_train_parameters(model_type, parameters, n_jobs=n_jobs)
+    valid_sets = None
+    callbacks = None
+    if early_stopping_rounds:
+        valid_sets = [fold_plan.fold_dataset(fold, model_type, partition='test',
+                                             min_child_samples=train_parameters['min_child_samples'])]
+        callbacks = [lgb.early_stopping(early_stopping_rounds, verbose=False)]
+
+    # Train booster on the binned inner train data
+    booster = lgb.train(train_parameters,
+                        fold_plan.fold_dataset(fold, model_type,
+                                               min_child_samples=train_parameters['min_child_samples']),
+                        num_boost_round=num_boost_round,
+                        valid_sets=valid_sets,
+                        callbacks=callbacks)
+    if early_stopping_rounds and booster.best_iteration > 0:
+        num_boost_round = booster.best_iteration
+
+    # Predict inner test data
+    test_index = fold_plan.folds[fold][1]
+    return booster.predict(fold_plan.fold_predictors(test_index), num_iteration=num_boost_round), num_boost_round
+
+
+# Define a class to prune poorly performing points after a subset of inner cross validation splits
+class SuccessiveHalvingPruner:
+    """
+    Description: stops the evaluation of a point when its score after a rung of completed inner splits is not in the top fraction of scores from previous points at the same rung
+    Inputs: 'rungs' -- the numbers of completed inner splits at which points are compared
+            'reduction_factor' -- the inverse of the fraction of points that continue past each rung
+            'min_points' -- the number of points that must reach a rung before any point is pruned there
+    Returned Value: Returns a pruner to pass to optimize_lgbmclassifier or optimize_lgbmregressor
+    Preconditions: a pruner stores scores for a single optimization run
+    """
+
+    def __init__(self, rungs=(1, 2), reduction_factor=3, min_points=5):
+        self.rungs = sorted(rungs)
+        self.reduction_factor = reduction_factor
+        self.min_points = min_points
+        self.rung_scores = {rung: [] for rung in self.rungs}
+
+    def keep(self, rung, score):
+        """
+        Description: records the score of a point at a rung and decides whether to continue its evaluation
+        Inputs: 'rung' -- the number of completed inner splits
+                'score' -- the cross validation score of the completed inner splits
+        Returned Value: Returns True if the point should continue and False if it should be pruned
+        Preconditions: none
+        """
+        # Import packages
+        import numpy as np
+
+        # Compare the score to the scores of previous points
+        previous_scores = self.rung_scores[rung]
+        previous_scores.append(score)
+        if len(previous_scores) < self.min_points:
+            return True
+        cutoff = np.quantile(previous_scores, 1 - (1 / self.reduction_factor))
+        return bool(score >= cutoff)
+
+
+# Define a class to track the evaluation of a point across inner cross validation splits
+class _PointEvaluation:
+
+    def __init__(self, model_type, parameters, fold_plan, pruner=None):
+        import numpy as np
+        import time
+        self.model_type = model_type
+        self.parameters = parameters
+        self.fold_plan = fold_plan
+        self.pruner = pruner
+        self.predictions = np.zeros(fold_plan.target.shape)
+        self.rounds = {}
+        self.submitted = []
+        self.pruned = False
+        self.rung_scores = {}
+        self.start = time.time()
+
+    @property
+    def finished(self):
+        return self.pruned or len(self.rounds) == len(self.fold_plan)
+
+    def next_folds(self):
+        # Release inner splits up to the next rung, or all remaining splits without a pruner
+        limit = len(self.fold_plan)
+        if self.pruner is not None and not self.pruned:
+            limit = min([rung for rung in self.pruner.rungs if rung > len(self.rounds)] + [limit])
+        folds = [fold for fold in range(limit) if fold not in self.submitted]
+        self.submitted.extend(folds)
+        return folds
+
+    def complete(self, fold, predictions, rounds):
+        import numpy as np
+        self.predictions[self.fold_plan.folds[fold][1]] = predictions
+        self.rounds[fold] = rounds
+        completed = len(self.rounds)
+        # Compare the completed splits at a rung once all released splits have finished
+        if (self.pruner is not None and completed in self.pruner.rungs and completed < len(self.fold_plan)
+                and completed == len(self.submitted)):
+            rows = np.concatenate([self.fold_plan.folds[fold_n][1] for fold_n in sorted(self.rounds)])
+            score = score_inner_predictions(self.model_type, self.fold_plan, self.predictions, rows=rows)
+            self.rung_scores[completed] = score
+            self.pruned = not self.pruner.keep(completed, score)
+
+    def result(self):
+        import numpy as np
+        import time
+        folds = sorted(self.rounds)
+        rows = np.concatenate([self.fold_plan.folds[fold][1] for fold in folds])
+        return {
+            'params': dict(self.parameters),
+            'target': score_inner_predictions(self.model_type, self.fold_plan, self.predictions, rows=rows),
+            'fold_scores': [score_inner_predictions(self.model_type, self.fold_plan, self.predictions,
+                                                    rows=self.fold_plan.folds[fold][1]) for fold in folds],
+            'n_estimators': int(np.mean([self.rounds[fold] for fold in folds])),
+            'pruned': self.pruned,
+            'rung_scores': dict(self.rung_scores),
+            'seconds': time.time() - self.start
+        }
+
+
+# Define a function to evaluate a point serially across inner cross validation splits
+def evaluate_lgbm_point(model_type, parameters, fold_plan, n_jobs=2, early_stopping_rounds=None, pruner=None,
+                        cache=None):
+    """
+    Description: conducts cross validation of a LightGBM classifier or regressor with a particular set of hyperparameter values, reusing the binned dataset of each inner split and optionally stopping early or pruning
+    Inputs: 'model_type' -- either 'classifier' or 'regressor'
+            'parameters' -- a dictionary of hyperparameter values keyed by the names in LGBM_PBOUNDS
+            'fold_plan' -- a fold plan containing the split indices and predictor matrix
+            'n_jobs' -- the number of threads used by LightGBM
+            'early_stopping_rounds' -- if set, stops boosting when the inner test score has not improved for this many rounds
+            'pruner' -- an optional SuccessiveHalvingPruner
+            'cache' -- an optional EvaluationCache that returns the result of a previous point with the same effective hyperparameter values
+    Returned Value: Returns a dictionary with the parameters, cross validation score, per-split scores, mean boosting rounds, pruned status, and elapsed seconds
+    Preconditions: requires a fold plan created by classifier_fold_plan or regressor_fold_plan
+    """
+
+    # Return the cached result of a point that produces the same model
+    if cache is not None:
+        key = cache.key(fold_plan.fingerprint(model_type, early_stopping_rounds), parameters)
+        result = _cached_result(cache, key, parameters)
+        if result is not None:
+            return result
+
+    # Train the inner splits released by the pruner until the point is finished
+    evaluation = _PointEvaluation(model_type, parameters, fold_plan, pruner=pruner)
+    while not evaluation.finished:
+        for fold in evaluation.next_folds():
+            predictions, rounds = train_inner_fold(model_type, parameters, fold_plan, fold,
+                                                   n_jobs=n_jobs, early_stopping_rounds=early_stopping_rounds)
+            evaluation.complete(fold, predictions, rounds)
+    result = evaluation.result()
+
+    # Store the result
+    if cache is not None:
+        cache.put(key, result)
+
+    return result
+
+
+# Define a function to calculate the cross validation score of a set of hyperparameter values using binned datasets
+def cross_validate_lgbm(model_type, parameters, fold_plan, n_jobs=2):
+    """
+    Description: conducts cross validation of a LightGBM classifier or regressor with a particular set of hyperparameter values, reusing the binned dataset of each inner split
+    Inputs: 'model_type' -- either 'classifier' or 'regressor'
+            'parameters' -- a dictionary of hyperparameter values keyed by the names in LGBM_PBOUNDS
+            'fold_plan' -- a fold plan containing the split indices and predictor matrix
+            'n_jobs' -- the number of threads used by LightGBM
+    Returned Value: Returns the cross validation score
+    Preconditions: requires a fold plan created by classifier_fold_plan or regressor_fold_plan
+    """
+    return evaluate_lgbm_point(model_type, parameters, fold_plan, n_jobs=n_jobs)['target']
+
+
+# Define a function to score the combined inner test predictions
+def score_inner_predictions(model_type, fold_plan, predictions, rows=None):
+    """
+    Description: calculates the balanced accuracy of a classifier or the negative mean squared error of a regressor from the combined inner test predictions
+    Inputs: 'model_type' -- either 'classifier' or 'regressor'
+            'fold_plan' -- a fold plan containing the observed response values
+            'predictions' -- an array of inner test predictions aligned to the fold plan rows
+            'rows' -- an optional array of row indices to score; defaults to all rows
+    Returned Value: Returns the cross validation score
+    Preconditions: requires predictions for every scored row of the fold plan
+    """
+
     # Import packages
     import numpy as np
-    import pandas as pd
-    from sklearn.model_selection import StratifiedGroupKFold
     from sklearn.metrics import balanced_accuracy_score
+    from sklearn.metrics import mean_squared_error
     from akutils import determine_optimal_threshold
 
-    # Create inner cv splits
-    inner_cv_splits = StratifiedGroupKFold(n_splits=5)
-    inner_split = ['inner_split_n']
-
-    # Create an empty data frame to store the inner cross validation splits
-    inner_train = pd.DataFrame(columns=all_variables + inner_split)
-    inner_test = pd.DataFrame(columns=all_variables + inner_split)
-
-    # Create an empty data frame to store the inner test results
-    inner_results = pd.DataFrame(columns=all_variables + inner_split + ['y_abs', 'y_pres'])
-
-    # Create inner cross validation splits
-    count = 1
-    for train_index, test_index in inner_cv_splits.split(data,
-                                                         data[stratify_field[0]].astype('int32'),
-                                                         data[group_field[0]].astype('int32')):
-        # Split the data into train and test partitions
-        train = data.iloc[train_index]
-        test = data.iloc[test_index]
-        # Insert iteration to train
-        train = train.assign(inner_split_n=count)
-        # Insert iteration to test
-        test = test.assign(inner_split_n=count)
-        # Append to data frames
-        inner_train = pd.concat([inner_train if not inner_train.empty else None,
-                                 train],
-                                axis=0)
-        inner_test = pd.concat([inner_test if not inner_test.empty else None,
-                                test],
-                               axis=0)
-        # Increase counter
-        count += 1
-    inner_cv_length = count - 1
-
-    # Reset indices
-    inner_train = inner_train.reset_index()
-    inner_test = inner_test.reset_index()
-
-    # Iterate through inner cross validation splits
-    inner_cv_i = 1
-    while inner_cv_i <= inner_cv_length:
-        inner_train_iteration = inner_train[inner_train[inner_split[0]] == inner_cv_i].copy()
-        inner_test_iteration = inner_test[inner_test[inner_split[0]] == inner_cv_i].copy()
-
-        # Identify X and y inner train and test splits
-        X_class_inner = inner_train_iteration[predictor_all].astype(float).copy()
-        y_class_inner = inner_train_iteration[target_field[0]].astype('int32').copy()
-        X_test_inner = inner_test_iteration[predictor_all].astype(float).copy()
-
-        # Train regressor on the inner train data
-        estimator.fit(X_class_inner, y_class_inner)
-
-        # Predict inner test data
-        probability_inner = estimator.predict_proba(X_test_inner)
-
-        # Assign predicted values to inner test data frame
-        inner_test_iteration = inner_test_iteration.assign(y_abs=probability_inner[:, 0])
-        inner_test_iteration = inner_test_iteration.assign(y_pres=probability_inner[:, 1])
-
-        # Add the test results to output data frame
-        inner_results = pd.concat([inner_results if not inner_results.empty else None,
-                                   inner_test_iteration],
-                                  axis=0)
-
-        # Increase n value
-        inner_cv_i += 1
+    # Select the rows to score
+    observed = fold_plan.target
+    if rows is not None:
+        observed = observed[rows]
+        predictions = predictions[rows]
+
+    # Calculate negative mean squared error for the regressor
+    if model_type == 'regressor':
+        return -(mean_squared_error(observed, predictions))
 
     # Calculate the optimal threshold and performance of the presence-absence classification
+    y_class_observed = observed.astype('int32')
     threshold, sensitivity, specificity, auc, accuracy = determine_optimal_threshold(
-        inner_results['y_pres'],
-        inner_results[target_field[0]]
+        predictions,
+        y_class_observed
     )
 
     # Convert probability to presence-absence
-    presence_zeros = np.zeros(inner_results['y_pres'].shape)
-    presence_zeros[inner_results['y_pres'] >= threshold] = 1
+    y_class_predicted = np.zeros(predictions.shape, dtype='int32')
+    y_class_predicted[predictions >= threshold] = 1
 
-    # Assign binary prediction values to test data frame
-    inner_results = inner_results.assign(y_pred=presence_zeros)
+    # Calculate balanced accuracy
+    return balanced_accuracy_score(y_class_observed, y_class_predicted)
 
-    # Calculate negative mean squared error
-    y_class_observed = inner_results[target_field[0]].astype('int32').copy()
-    y_class_predicted = inner_results['y_pred'].astype('int32').copy()
-    bacc = balanced_accuracy_score(y_class_observed, y_class_predicted)
+
+# Define a function to calculate the cross validated balanced accuracy score for the classifier
+def cross_val_bacc_classifier(estimator, data, all_variables, predictor_all, target_field, stratify_field, group_field,
+                              fold_plan=None):
+    # Import packages
+    import numpy as np
+
+    # Create inner cv splits
+    if fold_plan is None:
+        fold_plan = classifier_fold_plan(data, predictor_all, target_field, stratify_field, group_field)
+
+    # Iterate through inner cross validation splits and store the inner test results
+    y_pres = np.zeros(fold_plan.target.shape)
+    for fold, (train_index, test_index) in enumerate(fold_plan.folds):
+        y_pres[test_index] = predict_inner_fold(estimator, fold_plan, fold, 'classifier')
+
+    # Calculate balanced accuracy
+    bacc = score_inner_predictions('classifier', fold_plan, y_pres)
 
     return bacc
 
 
 # Define a function to calculate the cross validated negative mean squared error for the regressor
-def cross_val_nmse_regressor(estimator, data, all_variables, predictor_all, target_field, stratify_field, group_field):
+def cross_val_nmse_regressor(estimator, data, all_variables, predictor_all, target_field, stratify_field, group_field,
+                             fold_plan=None):
     # Import packages
-    import pandas as pd
-    from sklearn.model_selection import StratifiedGroupKFold
-    from sklearn.metrics import mean_squared_error
-
-    # Limit data to valid abundance observations
-    regress_inner = data[data[target_field[0]] >= 0].copy()
+    import numpy as np
 
     # Create inner cv splits
-    inner_cv_splits = StratifiedGroupKFold(n_splits=5)
-    inner_split = ['inner_split_n']
-
-    # Create an empty data frame to store the inner cross validation splits
-    inner_train = pd.DataFrame(columns=all_variables + inner_split)
-    inner_test = pd.DataFrame(columns=all_variables + inner_split)
-
-    # Create an empty data frame to store the inner test results
-    inner_results = pd.DataFrame(columns=all_variables + inner_split + ['y_pred'])
-
-    # Create inner cross validation splits
-    count = 1
-    for train_index, test_index in inner_cv_splits.split(regress_inner,
-                                                         regress_inner[stratify_field[0]].astype('int32'),
-                                                         regress_inner[group_field[0]].astype('int32')):
-        # Split the data into train and test partitions
-        train = regress_inner.iloc[train_index]
-        test = regress_inner.iloc[test_index]
-        # Insert iteration to train
-        train = train.assign(inner_split_n=count)
-        # Insert iteration to test
-        test = test.assign(inner_split_n=count)
-        # Append to data frames
-        inner_train = pd.concat([inner_train if not inner_train.empty else None,
-                                 train],
-                                axis=0)
-        inner_test = pd.concat([inner_test if not inner_test.empty else None,
-                                test],
-                               axis=0)
-        # Increase counter
-        count += 1
-    inner_cv_length = count - 1
-
-    # Reset indices
-    inner_train = inner_train.reset_index()
-    inner_test = inner_test.reset_index()
-
-    # Iterate through inner cross validation splits
-    inner_cv_i = 1
-    while inner_cv_i <= inner_cv_length:
-        inner_train_iteration = inner_train[inner_train[inner_split[0]] == inner_cv_i].copy()
-        inner_test_iteration = inner_test[inner_test[inner_split[0]] == inner_cv_i].copy()
-
-        # Identify X and y inner train and test splits
-        X_regress_inner = inner_train_iteration[predictor_all].astype(float).copy()
-        y_regress_inner = inner_train_iteration[target_field[0]].astype(float).copy()
-        X_test_inner = inner_test_iteration[predictor_all].astype(float).copy()
-
-        # Train regressor on the inner train data
-        estimator.fit(X_regress_inner, y_regress_inner)
-
-        # Predict inner test data
-        prediction_inner = estimator.predict(X_test_inner)
-
-        # Assign predicted values to inner test data frame
-        inner_test_iteration = inner_test_iteration.assign(y_pred=prediction_inner)
-
-        # Add the test results to output data frame
-        inner_results = pd.concat([inner_results if not inner_results.empty else None,
-                                   inner_test_iteration],
-                                  axis=0)
-
-        # Increase n value
-        inner_cv_i += 1
+    if fold_plan is None:
+        fold_plan = regressor_fold_plan(data, predictor_all, target_field, stratify_field, group_field)
+
+    # Iterate through inner cross validation splits and store the inner test results
+    y_pred = np.zeros(fold_plan.target.shape)
+    for fold, (train_index, test_index) in enumerate(fold_plan.folds):
+        y_pred[test_index] = predict_inner_fold(estimator, fold_plan, fold, 'regressor')
 
     # Calculate negative mean squared error
-    y_regress_observed = inner_results[target_field[0]].astype(float).copy()
-    y_regress_predicted = inner_results['y_pred'].astype(float).copy()
-    nmse = -(mean_squared_error(y_regress_observed, y_regress_predicted))
+    nmse = score_inner_predictions('regressor', fold_plan, y_pred)
 
     return nmse
 
@@ -192,45 +686,34 @@ def cross_val_nmse_regressor(estimator, data, all_variables, predictor_all, targ
 def lgbmclassifier_cv(num_leaves, max_depth, learning_rate, n_estimators,
                       min_split_gain, min_child_weight, min_child_samples,
                       subsample, colsample_bytree, reg_alpha, reg_lambda,
-                      data, all_variables, predictor_all, target_field, stratify_field, group_field):
+                      data, all_variables, predictor_all, target_field, stratify_field, group_field,
+                      fold_plan=None, n_jobs=2):
     """
     Description: conducts cross validation of a LightGBM regressor with a particular set of hyperparameter values
     Inputs: 'data' -- the covariate data to conduct the model training and validation
             'targets' -- the response data to conduct the model training and validation
             'groups' -- the group data for the cross validation method
+            'fold_plan' -- an optional precomputed fold plan; created from the data if not provided
+            'n_jobs' -- the number of threads used by LightGBM
             All other inputs are set by other functions
     Returned Value: Returns the cross validation score
     Preconditions: requires pre-processed X and y data
     """
 
-    # Import packages
-    from lightgbm import LGBMClassifier
-    from sklearn.model_selection import StratifiedGroupKFold
-
-    # Define cross validation
-    cv_splits = StratifiedGroupKFold(n_splits=5, shuffle=True)
-
     # Define estimator
-    estimator = LGBMClassifier(
-        boosting_type='gbdt',
-        num_leaves=int(num_leaves),
-        max_depth=int(max_depth),
-        learning_rate=learning_rate,
-        n_estimators=int(n_estimators),
-        objective='binary',
-        class_weight='balanced',
-        min_split_gain=min_split_gain,
-        min_child_weight=min_child_weight,
-        min_child_samples=int(min_child_samples),
-        subsample=subsample,
-        subsample_freq=1,
-        colsample_bytree=colsample_bytree,
-        reg_alpha=reg_alpha,
-        reg_lambda=reg_lambda,
-        n_jobs=2,
-        importance_type='gain',
-        verbosity=-1
-    )
+    estimator = create_lgbm_estimator('classifier', {
+        'num_leaves': num_leaves,
+        'max_depth': max_depth,
+        'learning_rate': learning_rate,
+        'n_estimators': n_estimators,
+        'min_split_gain': min_split_gain,
+        'min_child_weight': min_child_weight,
+        'min_child_samples': min_child_samples,
+        'subsample': subsample,
+        'colsample_bytree': colsample_bytree,
+        'reg_alpha': reg_alpha,
+        'reg_lambda': reg_lambda
+    }, n_jobs=n_jobs)
 
     # Define cross validation
     bacc = cross_val_bacc_classifier(estimator,
@@ -239,7 +722,8 @@ def lgbmclassifier_cv(num_leaves, max_depth, learning_rate, n_estimators,
                                      predictor_all,
                                      target_field,
                                      stratify_field,
-                                     group_field)
+                                     group_field,
+                                     fold_plan=fold_plan)
 
     return bacc
 
@@ -248,40 +732,34 @@ def lgbmclassifier_cv(num_leaves, max_depth, learning_rate, n_estimators,
 def lgbmregressor_cv(num_leaves, max_depth, learning_rate, n_estimators,
                      min_split_gain, min_child_weight, min_child_samples,
                      subsample, colsample_bytree, reg_alpha, reg_lambda,
-                     data, all_variables, predictor_all, target_field, stratify_field, group_field):
+                     data, all_variables, predictor_all, target_field, stratify_field, group_field,
+                     fold_plan=None, n_jobs=2):
     """
     Description: conducts cross validation of a LightGBM regressor with a particular set of hyperparameter values
     Inputs: 'data' -- the covariate data to conduct the model training and validation
             'targets' -- the response data to conduct the model training and validation
             'groups' -- the group data for the cross validation method
+            'fold_plan' -- an optional precomputed fold plan; created from the data if not provided
+            'n_jobs' -- the number of threads used by LightGBM
             All other inputs are set by other functions
     Returned Value: Returns the cross validation score
     Preconditions: requires pre-processed X and y data
     """
 
-    # Import packages
-    from lightgbm import LGBMRegressor
-
     # Define estimator
-    estimator = LGBMRegressor(
-        boosting_type='gbdt',
-        num_leaves=int(num_leaves),
-        max_depth=int(max_depth),
-        learning_rate=learning_rate,
-        n_estimators=int(n_estimators),
-        objective='regression',
-        min_split_gain=min_split_gain,
-        min_child_weight=min_child_weight,
-        min_child_samples=int(min_child_samples),
-        subsample=subsample,
-        subsample_freq=1,
-        colsample_bytree=colsample_bytree,
-        reg_alpha=reg_alpha,
-        reg_lambda=reg_lambda,
-        n_jobs=2,
-        importance_type='gain',
-        verbosity=-1
-    )
+    estimator = create_lgbm_estimator('regressor', {
+        'num_leaves': num_leaves,
+        'max_depth': max_depth,
+        'learning_rate': learning_rate,
+        'n_estimators': n_estimators,
+        'min_split_gain': min_split_gain,
+        'min_child_weight': min_child_weight,
+        'min_child_samples': min_child_samples,
+        'subsample': subsample,
+        'colsample_bytree': colsample_bytree,
+        'reg_alpha': reg_alpha,
+        'reg_lambda': reg_lambda
+    }, n_jobs=n_jobs)
 
     # Define cross validation
     nmse = cross_val_nmse_regressor(estimator,
@@ -290,14 +768,506 @@ def lgbmregressor_cv(num_leaves, max_depth, learning_rate, n_estimators,
                                     predictor_all,
                                     target_field,
                                     stratify_field,
-                                    group_field)
+                                    group_field,
+                                    fold_plan=fold_plan)
 
     # Return mean score across all cross validation partitions
     return nmse
 
 
+# Define a function to convert an evaluation result to a JSON-compatible dictionary
+def _serialize_result(result):
+    return {
+        'params': {key: float(value) for key, value in result['params'].items()},
+        'target': float(result['target']),
+        'fold_scores': [float(score) for score in result['fold_scores']],
+        'n_estimators': int(result['n_estimators']),
+        'pruned': bool(result['pruned']),
+        'rung_scores': {str(rung): float(score) for rung, score in result['rung_scores'].items()},
+        'seconds': float(result['seconds'])
+    }
+
+
+# Define a function to restore an evaluation result from a JSON-compatible dictionary
+def _deserialize_result(entry):
+    entry = dict(entry)
+    entry['rung_scores'] = {int(rung): score for rung, score in entry.get('rung_scores', {}).items()}
+    return entry
+
+
+# Define a class to cache cross validation results by data fingerprint and effective hyperparameters
+class EvaluationCache:
+    """
+    Description: stores completed evaluation results in a least recently used memory cache and, if a directory is provided, as JSON files so that points that produce the same model are not evaluated again within or across optimizations
+    Inputs: 'max_size' -- the maximum number of results kept in memory
+            'directory' -- an optional directory for the on-disk cache
+    Returned Value: Returns a cache to pass to optimize_lgbmclassifier or optimize_lgbmregressor
+    Preconditions: results are only shared between optimizations with the same fold plan fingerprint
+    """
+
+    def __init__(self, max_size=1024, directory=None):
+        # Import packages
+        import collections
+        import os
+
+        self.max_size = max_size
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._memory = collections.OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(fingerprint, parameters):
+        """
+        Description: calculates the cache key of a point
+        Inputs: 'fingerprint' -- the fingerprint of the fold plan and settings
+                'parameters' -- a dictionary of hyperparameter values keyed by the names in LGBM_PBOUNDS
+        Returned Value: Returns a hexadecimal hash string
+        Preconditions: none
+        """
+        # Import packages
+        import hashlib
+        import json
+
+        # Hash the fingerprint with the effective hyperparameter values
+        effective = json.dumps(effective_lgbm_parameters(parameters), sort_keys=True)
+        return hashlib.sha256((fingerprint + effective).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Description: returns a cached result from memory or disk
+        Inputs: 'key' -- the cache key of a point
+        Returned Value: Returns the cached evaluation result or None
+        Preconditions: none
+        """
+        # Import packages
+        import json
+        import os
+
+        # Search the memory cache
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+
+        # Search the disk cache
+        if self.directory is not None:
+            path = os.path.join(self.directory, f'{key}.json')
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as cache_file:
+                    result = _deserialize_result(json.load(cache_file))
+                self._remember(key, result)
+                self.hits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    def put(self, key, result):
+        """
+        Description: stores a completed evaluation result in memory and on disk
+        Inputs: 'key' -- the cache key of a point
+                'result' -- an evaluation result
+        Returned Value: no return
+        Preconditions: pruned results are not stored
+        """
+        # Import packages
+        import json
+        import os
+
+        if result['pruned']:
+            return
+        self._remember(key, result)
+
+        # Write the result to disk through a temporary file so that readers never see a partial file
+        if self.directory is not None:
+            path = os.path.join(self.directory, f'{key}.json')
+            temporary_path = f'{path}.{os.getpid()}.tmp'
+            with open(temporary_path, 'w', encoding='utf-8') as cache_file:
+                json.dump(_serialize_result(result), cache_file)
+            os.replace(temporary_path, path)
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+
+# Define a function to return a cached result for a point
+def _cached_result(cache, key, parameters):
+    import time
+    start = time.time()
+    result = cache.get(key)
+    if result is None:
+        return None
+    result = dict(result)
+    result['params'] = dict(parameters)
+    result['seconds'] = time.time() - start
+    return result
+
+
+# Define a class to store evaluated points in an append-only log on disk
+class OptimizationLog(list):
+    """
+    Description: stores the evaluation result of each optimization point and, if a path is provided, appends each result as a line of JSON so that an interrupted optimization can be resumed
+    Inputs: 'path' -- an optional file path for the log; previous results with a matching fingerprint are loaded
+            'fingerprint' -- a hash identifying the data, inner splits, and settings of the optimization
+    Returned Value: Returns a list of evaluation results
+    Preconditions: results from logs with a different fingerprint are ignored
+    """
+
+    def __init__(self, path=None, fingerprint=None):
+        # Import packages
+        import json
+        import os
+
+        super().__init__()
+        self.path = path
+        self.fingerprint = fingerprint
+
+        # Load previous results with a matching fingerprint
+        if path is not None and os.path.exists(path):
+            skipped = 0
+            with open(path, 'r', encoding='utf-8') as log_file:
+                for line in log_file:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Ignore a partially written final line from an interrupted run
+                        skipped += 1
+                        continue
+                    if entry.pop('fingerprint', None) != fingerprint:
+                        skipped += 1
+                        continue
+                    super().append(_deserialize_result(entry))
+            print(f'Loaded {len(self)} evaluated points from {path} ({skipped} entries skipped)')
+
+    def append(self, result):
+        # Import packages
+        import datetime
+        import json
+        import os
+
+        super().append(result)
+
+        # Write the result to the log
+        if self.path is not None:
+            entry = {'fingerprint': self.fingerprint}
+            entry.update(_serialize_result(result))
+            entry['completed'] = datetime.datetime.now().isoformat(timespec='seconds')
+            with open(self.path, 'a', encoding='utf-8') as log_file:
+                log_file.write(json.dumps(entry) + '\n')
+                log_file.flush()
+                os.fsync(log_file.fileno())
+
+
+# Define a function to open the optimization log of a LightGBM classifier or regressor
+def lgbm_optimization_log(checkpoint, model_type, fold_plan, early_stopping_rounds=None, pruner=None, n_workers=1,
+                          batch_size=None):
+    """
+    Description: opens the optimization log for a model type and fold plan, loading previous results if the checkpoint file exists
+    Inputs: 'checkpoint' -- an optional file path for the log; if None, results are only kept in memory
+            'model_type' -- either 'classifier' or 'regressor'
+            'fold_plan' -- a fold plan containing the split indices and predictor matrix
+            'early_stopping_rounds' -- the early stopping setting, which changes the cross validation scores
+            'pruner' -- the optional SuccessiveHalvingPruner, whose settings change which points are pruned
+            'n_workers' -- the number of worker processes, which selects serial or batched evaluation
+            'batch_size' -- the number of points evaluated concurrently, which changes the suggested points; defaults to the number of workers
+    Returned Value: Returns an optimization log
+    Preconditions: logs written with different pruner settings or a different serial or batched mode are not resumed
+    """
+
+    # Identify the pruner settings and the sequence of suggested points
+    pruner_settings = None if pruner is None else (tuple(pruner.rungs), pruner.reduction_factor, pruner.min_points)
+    mode = 'serial' if n_workers <= 1 else ('batch', n_workers if batch_size is None else batch_size)
+
+    return OptimizationLog(checkpoint, fold_plan.fingerprint(model_type, early_stopping_rounds, pruner_settings, mode))
+
+
+# Define a function to store the fold plan in a worker process
+def _initialize_worker(fold_plan):
+    global _worker_fold_plan
+    _worker_fold_plan = fold_plan
+
+
+# Define a function to train one inner cross validation split in a worker process
+def _train_inner_fold(model_type, parameters, fold, n_jobs, early_stopping_rounds):
+    return train_inner_fold(model_type, parameters, _worker_fold_plan, fold,
+                            n_jobs=n_jobs, early_stopping_rounds=early_stopping_rounds)
+
+
+# Define a function to suggest a batch of distinct points from an optimizer
+def suggest_lgbm_batch(optimizer, batch_size, random_state=314):
+    """
+    Description: suggests a batch of points to evaluate in parallel by registering each suggestion with the worst observed score on a copy of the optimizer before suggesting the next point
+    Inputs: 'optimizer' -- a BayesianOptimization object with the registered results so far
+            'batch_size' -- the number of points to suggest
+            'random_state' -- the random state of the copied optimizer
+    Returned Value: Returns a list of parameter dictionaries
+    Preconditions: requires bayes_opt
+    """
+
+    # Import packages
+    from bayes_opt import BayesianOptimization
+
+    # Copy the registered results to a silent optimizer
+    proxy = BayesianOptimization(f=None,
+                                 pbounds=LGBM_PBOUNDS,
+                                 random_state=random_state,
+                                 verbose=0,
+                                 allow_duplicate_points=True)
+    for result in optimizer.res:
+        proxy.register(params=result['params'], target=result['target'])
+
+    # Suggest points, assuming each pending point will perform as poorly as the worst observed point
+    lie = min([result['target'] for result in optimizer.res], default=None)
+    points = []
+    while len(points) < batch_size:
+        point = proxy.suggest()
+        points.append(point)
+        if lie is not None:
+            proxy.register(params=point, target=lie)
+
+    return points
+
+
+# Define a function to evaluate a batch of points across a process pool
+def evaluate_lgbm_batch(executor, model_type, fold_plan, points, n_jobs, early_stopping_rounds=None, pruner=None,
+                        cache=None):
+    """
+    Description: trains the inner cross validation splits of every point concurrently and scores each point
+    Inputs: 'executor' -- a process pool initialized with the fold plan
+            'model_type' -- either 'classifier' or 'regressor'
+            'fold_plan' -- the fold plan used to initialize the process pool
+            'points' -- a list of parameter dictionaries
+            'n_jobs' -- the number of threads used by LightGBM in each worker
+            'early_stopping_rounds' -- if set, stops boosting when the inner test score has not improved for this many rounds
+            'pruner' -- an optional SuccessiveHalvingPruner; splits beyond a rung are submitted only after the point passes the rung
+            'cache' -- an optional EvaluationCache; points with the same effective hyperparameter values are evaluated once
+    Returned Value: Returns a list of evaluation results in the order of the points
+    Preconditions: requires a process pool created by maximize_parallel
+    """
+
+    # Import packages
+    from concurrent.futures import FIRST_COMPLETED
+    from concurrent.futures import wait
+
+    # Define a function to submit the released inner splits of a point
+    futures = {}
+
+    def submit_folds(evaluation):
+        for fold in evaluation.next_folds():
+            future = executor.submit(_train_inner_fold, model_type, evaluation.parameters, fold,
+                                     n_jobs, early_stopping_rounds)
+            futures[future] = (evaluation, fold)
+
+    # Return cached results and submit the first inner splits of every distinct point
+    fingerprint = fold_plan.fingerprint(model_type, early_stopping_rounds)
+    point_keys = [EvaluationCache.key(fingerprint, point) for point in points]
+    results = [None] * len(points)
+    evaluations = {}
+    for point_n, (point, key) in enumerate(zip(points, point_keys)):
+        if cache is not None:
+            results[point_n] = _cached_result(cache, key, point)
+        if results[point_n] is None and key not in evaluations:
+            evaluations[key] = _PointEvaluation(model_type, point, fold_plan, pruner=pruner)
+            submit_folds(evaluations[key])
+
+    # Collect inner split predictions and release further splits as points pass each rung
+    while futures:
+        done, pending = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            evaluation, fold = futures.pop(future)
+            predictions, rounds = future.result()
+            evaluation.complete(fold, predictions, rounds)
+            if not evaluation.finished:
+                submit_folds(evaluation)
+
+    # Store the new results and assign them to every point with the same key
+    for key, evaluation in evaluations.items():
+        evaluations[key] = evaluation.result()
+        if cache is not None:
+            cache.put(key, evaluations[key])
+    for point_n, (point, key) in enumerate(zip(points, point_keys)):
+        if results[point_n] is None:
+            results[point_n] = dict(evaluations[key], params=dict(point))
+
+    return results
+
+
+# Define a function to run Bayesian optimization with parallel evaluation of points and inner splits
+def maximize_parallel(optimizer, model_type, fold_plan, init_points, n_iter, n_workers, n_jobs, batch_size=None,
+                      early_stopping_rounds=None, pruner=None, records=None, init_offset=0, cache=None):
+    """
+    Description: runs the random and Bayesian search iterations of an optimizer in batches evaluated across a process pool
+    Inputs: 'optimizer' -- a BayesianOptimization object over LGBM_PBOUNDS
+            'model_type' -- either 'classifier' or 'regressor'
+            'fold_plan' -- a fold plan containing the split indices and predictor matrix
+            'init_points' -- the number of random search iterations to perform initially
+            'n_iter' -- the number of Bayesian search iterations to perform
+            'n_workers' -- the number of worker processes
+            'n_jobs' -- the total number of cores to divide between worker processes and LightGBM threads
+            'batch_size' -- the number of points to evaluate concurrently; defaults to the number of workers
+            'early_stopping_rounds' -- if set, stops boosting when the inner test score has not improved for this many rounds
+            'pruner' -- an optional SuccessiveHalvingPruner
+            'records' -- an optional list to which the evaluation result of each point is appended
+            'init_offset' -- the number of random search points that were already evaluated in a previous run
+            'cache' -- an optional EvaluationCache
+    Returned Value: no return; results are registered with the optimizer
+    Preconditions: requires bayes_opt and lightgbm
+    """
+
+    # Import packages
+    import multiprocessing
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Divide cores between worker processes and LightGBM threads
+    if batch_size is None:
+        batch_size = n_workers
+    worker_jobs = max(1, n_jobs // n_workers)
+    if records is None:
+        records = []
+
+    # Draw the random search points
+    random_state = np.random.RandomState(314)
+    initial_points = [{key: random_state.uniform(*bounds) for key, bounds in LGBM_PBOUNDS.items()}
+                      for point_n in range(init_points)][init_offset:]
+
+    # Define a function to evaluate and register a batch of points
+    def register_batch(executor, points):
+        results = evaluate_lgbm_batch(executor, model_type, fold_plan, points, worker_jobs,
+                                      early_stopping_rounds=early_stopping_rounds, pruner=pruner, cache=cache)
+        for result in results:
+            records.append(result)
+            optimizer.register(params=result['params'], target=result['target'])
+
+    # Start workers with spawn because forking after LightGBM has initialized OpenMP can deadlock
+    with ProcessPoolExecutor(max_workers=n_workers,
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_initialize_worker,
+                             initargs=(fold_plan,)) as executor:
+        # Evaluate the random search points
+        for start in range(0, len(initial_points), batch_size):
+            register_batch(executor, initial_points[start:start + batch_size])
+
+        # Evaluate the Bayesian search points
+        iteration = 0
+        while iteration < n_iter:
+            points = suggest_lgbm_batch(optimizer,
+                                        min(batch_size, n_iter - iteration),
+                                        random_state=314 + len(optimizer.res))
+            register_batch(executor, points)
+            iteration += len(points)
+
+
+# Define a function to select the best hyperparameters from the evaluated points
+def select_lgbm_parameters(records, early_stopping_rounds=None):
+    """
+    Description: selects the hyperparameters of the best point that was evaluated on all inner cross validation splits
+    Inputs: 'records' -- a list of evaluation results
+            'early_stopping_rounds' -- if set, the number of estimators is replaced with the mean number of boosting rounds kept by early stopping
+    Returned Value: Returns a dictionary of hyperparameters
+    Preconditions: requires at least one point that was not pruned
+    """
+
+    # Find the first point with the maximum score among points that were not pruned
+    completed = [record for record in records if not record['pruned']]
+    best = max(completed, key=lambda record: record['target'])
+    parameters = dict(best['params'])
+    if early_stopping_rounds:
+        parameters['n_estimators'] = float(best['n_estimators'])
+
+    return parameters
+
+
+# Define a function to run the Bayesian optimization of a LightGBM classifier or regressor
+def run_lgbm_optimization(model_type, objective, fold_plan, init_points, n_iter, n_workers=1, n_jobs=2, batch_size=None,
+                          early_stopping_rounds=None, pruner=None, records=None, cache=None, verbose=2):
+    """
+    Description: creates a Bayesian optimizer over LGBM_PBOUNDS and runs it serially or across a process pool
+    Inputs: 'model_type' -- either 'classifier' or 'regressor'
+            'objective' -- the function evaluated by the serial optimizer, which must append its results to records
+            'fold_plan' -- a fold plan containing the split indices and predictor matrix
+            'records' -- a list or optimization log to which the evaluation result of each point is appended; points already in the log are not evaluated again; the serial optimizer replays them in order so that a resumed run suggests the same points as an uninterrupted run, and in both modes they count against init_points and n_iter
+            'verbose' -- the verbosity of the optimizer
+            All other inputs are described in optimize_lgbmclassifier
+    Returned Value: Returns the hyperparameters from the iteration with the best cross validation performance
+    Preconditions: requires bayes_opt and lightgbm
+    """
+
+    # Import packages
+    import numpy as np
+    from bayes_opt import BayesianOptimization
+
+    # Restore the pruner scores of points evaluated in a previous run
+    if records is None:
+        records = []
+    completed = len(records)
+    previous = list(records)
+    if pruner is not None:
+        for record in previous:
+            for rung, score in record['rung_scores'].items():
+                # Skip rungs that the current pruner does not compare
+                if rung in pruner.rung_scores:
+                    pruner.rung_scores[rung].append(score)
+    remaining_iter = max(0, n_iter - max(0, completed - init_points))
+
+    # Create the optimizer
+    optimizer = BayesianOptimization(
+        f=objective if n_workers <= 1 else None,
+        pbounds=LGBM_PBOUNDS,
+        random_state=314,
+        verbose=verbose,
+        allow_duplicate_points=True
+    )
+
+    # Run the optimization across a process pool after registering the points evaluated in a previous run
+    if n_workers > 1:
+        for record in records:
+            optimizer.register(params=record['params'], target=record['target'])
+        maximize_parallel(optimizer, model_type, fold_plan, init_points, remaining_iter, n_workers, n_jobs, batch_size,
+                          early_stopping_rounds=early_stopping_rounds, pruner=pruner, records=records,
+                          init_offset=min(completed, init_points), cache=cache)
+
+    # Run the optimization serially as in maximize, replaying the points of a previous run so that the random state, Gaussian process, and acquisition function continue as in an uninterrupted run
+    else:
+        optimizer.logger.log_optimization_start(optimizer.space.keys)
+        initial_points = optimizer.random_sample(max(init_points, 1))
+        n_points = len(initial_points) + n_iter
+        while len(optimizer.space) < n_points:
+            point_n = len(optimizer.space)
+            point = initial_points[point_n] if point_n < len(initial_points) else optimizer.suggest()
+            if previous and all(np.isclose(previous[0]['params'][key], value) for key, value in point.items()):
+                optimizer.register(params=point, target=previous.pop(0)['target'])
+                continue
+
+            # Register the remaining logged points once a point differs and count them against the iterations
+            if previous:
+                for record in previous:
+                    optimizer.register(params=record['params'], target=record['target'])
+                previous = []
+                continue
+            optimizer.probe(point, lazy=False)
+        optimizer.logger.log_optimization_end()
+        for record in previous:
+            optimizer.register(params=record['params'], target=record['target'])
+
+    # Return the best point that was evaluated on all inner splits
+    if pruner is not None or early_stopping_rounds:
+        return select_lgbm_parameters(records, early_stopping_rounds=early_stopping_rounds)
+    return optimizer.max['params']
+
+
 # Define a function to optimize hyperparameters for a LightGBM classifier
-def optimize_lgbmclassifier(init_points, n_iter, data, all_variables, predictor_all, target_field, stratify_field, group_field):
+def optimize_lgbmclassifier(init_points, n_iter, data, all_variables, predictor_all, target_field, stratify_field, group_field,
+                            n_workers=1, n_jobs=2, batch_size=None, early_stopping_rounds=None, pruner=None,
+                            checkpoint=None, cache=None):
     """
     Description: applies Bayesian optimization to the hyperparameters of a LightGBM classifier
     Inputs: 'data' -- the covariate data to conduct the model training and validation
@@ -305,14 +1275,26 @@ def optimize_lgbmclassifier(init_points, n_iter, data, all_variables, predictor_
             'groups' -- the group data for the cross validation method
             'init_points' -- the number of random search iterations to perform initially
             'n_iter' -- the number of Bayesian search iterations to perform
+            'n_workers' -- the number of worker processes; values above 1 evaluate points and inner splits in parallel
+            'n_jobs' -- the total number of cores to divide between worker processes and LightGBM threads
+            'batch_size' -- the number of points to evaluate concurrently; defaults to the number of workers
+            'early_stopping_rounds' -- if set, uses each inner test partition to stop boosting when the score has not improved for this many rounds and returns the mean number of rounds kept as n_estimators
+            'pruner' -- an optional SuccessiveHalvingPruner that stops evaluating points that perform poorly on the first inner splits
+            'checkpoint' -- an optional file path to which every evaluated point is appended; a later run on the same data resumes from the points in the file
+            'cache' -- an optional EvaluationCache shared between optimizations; points that produce the same model as a cached point are not evaluated again
     Returned Value: Returns the hyperparameters from the iteration with the best cross validation performance
     Preconditions: requires pre-processed X and y data
     """
 
-    # Import packages
-    from bayes_opt import BayesianOptimization
+    # Compute the inner cross validation splits once for all optimization iterations
+    fold_plan = classifier_fold_plan(data, predictor_all, target_field, stratify_field, group_field)
+
+    # Open the log of evaluated points, resuming from the checkpoint if it exists
+    records = lgbm_optimization_log(checkpoint, 'classifier', fold_plan, early_stopping_rounds, pruner=pruner,
+                                    n_workers=n_workers, batch_size=batch_size)
 
     # Define a function to return hyperparameters from an optimization iteration
+
     def lgbmclassifier_params(num_leaves, max_depth, learning_rate, n_estimators,
                               min_split_gain, min_child_weight, min_child_samples,
                               subsample, colsample_bytree, reg_alpha, reg_lambda):
@@ -320,55 +1302,36 @@ def optimize_lgbmclassifier(init_points, n_iter, data, all_variables, predictor_
         Description: returns the hyperparameter values from a cross validation set
         Inputs: All inputs are set by other functions
         Returned Value: Returns a set of hyperparameters
-        Preconditions: this function wraps lgbmclassifier_cv
+        Preconditions: this function wraps evaluate_lgbm_point, which matches lgbmclassifier_cv without early stopping or pruning
         '''
 
-        return lgbmclassifier_cv(
-            num_leaves=num_leaves,
-            max_depth=max_depth,
-            learning_rate=learning_rate,
-            n_estimators=n_estimators,
-            min_split_gain=min_split_gain,
-            min_child_weight=min_child_weight,
-            min_child_samples=min_child_samples,
-            subsample=subsample,
-            colsample_bytree=colsample_bytree,
-            reg_alpha=reg_alpha,
-            reg_lambda=reg_lambda,
-            data=data,
-            all_variables=all_variables,
-            predictor_all=predictor_all,
-            target_field=target_field,
-            stratify_field=stratify_field,
-            group_field=group_field
-        )
+        result = evaluate_lgbm_point('classifier', {
+            'num_leaves': num_leaves,
+            'max_depth': max_depth,
+            'learning_rate': learning_rate,
+            'n_estimators': n_estimators,
+            'min_split_gain': min_split_gain,
+            'min_child_weight': min_child_weight,
+            'min_child_samples': min_child_samples,
+            'subsample': subsample,
+            'colsample_bytree': colsample_bytree,
+            'reg_alpha': reg_alpha,
+            'reg_lambda': reg_lambda
+        }, fold_plan, n_jobs=n_jobs, early_stopping_rounds=early_stopping_rounds, pruner=pruner, cache=cache)
+        records.append(result)
 
-    optimizer = BayesianOptimization(
-        f=lgbmclassifier_params,
-        pbounds={
-            'num_leaves': (5, 200),
-            'max_depth': (3, 12),
-            'learning_rate': (0.001, 0.2),
-            'n_estimators': (50, 1000),
-            'min_split_gain': (0.001, 0.1),
-            'min_child_weight': (0.001, 1),
-            'min_child_samples': (1, 200),
-            'subsample': (0.3, 0.9),
-            'colsample_bytree': (0.3, 0.9),
-            'reg_alpha': (0, 5),
-            'reg_lambda': (0, 5)
-        },
-        random_state=314,
-        verbose=2
-    )
-    optimizer.maximize(init_points=init_points, n_iter=n_iter)
+        return result['target']
 
-    return optimizer.max['params']
+    return run_lgbm_optimization('classifier', lgbmclassifier_params, fold_plan, init_points, n_iter,
+                                 n_workers=n_workers, n_jobs=n_jobs, batch_size=batch_size,
+                                 early_stopping_rounds=early_stopping_rounds, pruner=pruner, records=records,
+                                 cache=cache)
 
 
 # Define a function to optimize hyperparameters for a LightGBM regressor
-def optimize_lgbmregressor(init_points, n_iter, data, all_variables, predictor_all, target_field, stratify_field,
-                           group_field):
+def optimize_lgbmregressor(init_points, n_iter, data, all_variables, predictor_all, target_field, stratify_field, group_field,
+                           n_workers=1, n_jobs=2, batch_size=None, early_stopping_rounds=None, pruner=None,
+                           checkpoint=None, cache=None):
     """
     Description: applies Bayesian optimization to the hyperparameters of a LightGBM regressor
     Inputs: 'data' -- the covariate data to conduct the model training and validation
@@ -376,14 +1339,26 @@ def optimize_lgbmregressor(init_points, n_iter, data, all_variables, predictor_a
             'groups' -- the group data for the cross validation method
             'init_points' -- the number of random search iterations to perform initially
             'n_iter' -- the number of Bayesian search iterations to perform
+            'n_workers' -- the number of worker processes; values above 1 evaluate points and inner splits in parallel
+            'n_jobs' -- the total number of cores to divide between worker processes and LightGBM threads
+            'batch_size' -- the number of points to evaluate concurrently; defaults to the number of workers
+            'early_stopping_rounds' -- if set, uses each inner test partition to stop boosting when the score has not improved for this many rounds and returns the mean number of rounds kept as n_estimators
+            'pruner' -- an optional SuccessiveHalvingPruner that stops evaluating points that perform poorly on the first inner splits
+            'checkpoint' -- an optional file path to which every evaluated point is appended; a later run on the same data resumes from the points in the file
+            'cache' -- an optional EvaluationCache shared between optimizations; points that produce the same model as a cached point are not evaluated again
     Returned Value: Returns the hyperparameters from the iteration with the best cross validation performance
     Preconditions: requires pre-processed X and y data
     """
 
-    # Import packages
-    from bayes_opt import BayesianOptimization
+    # Compute the inner cross validation splits once for all optimization iterations
+    fold_plan = regressor_fold_plan(data, predictor_all, target_field, stratify_field, group_field)
+
+    # Open the log of evaluated points, resuming from the checkpoint if it exists
+    records = lgbm_optimization_log(checkpoint, 'regressor', fold_plan, early_stopping_rounds, pruner=pruner,
+                                    n_workers=n_workers, batch_size=batch_size)
 
     # Define a function to return hyperparameters from an optimization iteration
+
     def lgbmregressor_params(num_leaves, max_depth, learning_rate, n_estimators,
                              min_split_gain, min_child_weight, min_child_samples,
                              subsample, colsample_bytree, reg_alpha, reg_lambda):
@@ -391,47 +1366,187 @@ def optimize_lgbmregressor(init_points, n_iter, data, all_variables, predictor_a
         Description: returns the hyperparameter values from a cross validation set
         Inputs: All inputs are set by other functions
         Returned Value: Returns a set of hyperparameters
-        Preconditions: this function wraps lgbmregressor_cv
+        Preconditions: this function wraps evaluate_lgbm_point, which matches lgbmregressor_cv without early stopping or pruning
         '''
 
-        return lgbmregressor_cv(
-            num_leaves=num_leaves,
-            max_depth=max_depth,
-            learning_rate=learning_rate,
-            n_estimators=n_estimators,
-            min_split_gain=min_split_gain,
-            min_child_weight=min_child_weight,
-            min_child_samples=min_child_samples,
-            subsample=subsample,
-            colsample_bytree=colsample_bytree,
-            reg_alpha=reg_alpha,
-            reg_lambda=reg_lambda,
-            data=data,
-            all_variables=all_variables,
-            predictor_all=predictor_all,
-            target_field=target_field,
-            stratify_field=stratify_field,
-            group_field=group_field
-        )
+        result = evaluate_lgbm_point('regressor', {
+            'num_leaves': num_leaves,
+            'max_depth': max_depth,
+            'learning_rate': learning_rate,
+            'n_estimators': n_estimators,
+            'min_split_gain': min_split_gain,
+            'min_child_weight': min_child_weight,
+            'min_child_samples': min_child_samples,
+            'subsample': subsample,
+            'colsample_bytree': colsample_bytree,
+            'reg_alpha': reg_alpha,
+            'reg_lambda': reg_lambda
+        }, fold_plan, n_jobs=n_jobs, early_stopping_rounds=early_stopping_rounds, pruner=pruner, cache=cache)
+        records.append(result)
 
-    optimizer = BayesianOptimization(
-        f=lgbmregressor_params,
-        pbounds={
-            'num_leaves': (5, 200),
-            'max_depth': (3, 12),
-            'learning_rate': (0.001, 0.2),
-            'n_estimators': (50, 1000),
-            'min_split_gain': (0.001, 0.1),
-            'min_child_weight': (0.001, 1),
-            'min_child_samples': (1, 200),
-            'subsample': (0.3, 0.9),
-            'colsample_bytree': (0.3, 0.9),
-            'reg_alpha': (0, 5),
-            'reg_lambda': (0, 5)
-        },
-        random_state=314,
-        verbose=2
-    )
-    optimizer.maximize(init_points=init_points, n_iter=n_iter)
+        return result['target']
 
-    return optimizer.max['params']
+    return run_lgbm_optimization('regressor', lgbmregressor_params, fold_plan, init_points, n_iter,
+                                 n_workers=n_workers, n_jobs=n_jobs, batch_size=batch_size,
+                                 early_stopping_rounds=early_stopping_rounds, pruner=pruner, records=records,
+                                 cache=cache)
+
+
+# Define a function to copy the predictors of a data frame to shared memory
+def share_predictors(data, predictor_all, dtype='float32'):
+    """
+    Description: copies the predictors of a data frame into a single matrix in shared memory that worker processes can read without copying
+    Inputs: 'data' -- the covariate data to conduct the model training and validation
+            'predictor_all' -- a list of predictor field names
+            'dtype' -- the data type of the predictor matrix
+    Returned Value: Returns the shared memory block and the predictor matrix backed by it
+    Preconditions: the caller must close and unlink the shared memory block when finished
+    """
+
+    # Import packages
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    # Create the shared memory block
+    shape = (len(data), len(predictor_all))
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1] * dtype.itemsize))
+    predictors = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    # Copy the predictors one column at a time to avoid a second full copy of the data
+    for column_n, name in enumerate(predictor_all):
+        predictors[:, column_n] = data[name].to_numpy(dtype=dtype)
+
+    return block, predictors
+
+
+# Define a function to run one optimization of a batch in a worker process
+def _optimize_lgbm_job(model_type, fold_plan, init_points, n_iter, n_jobs, early_stopping_rounds, pruning,
+                       checkpoint, cache_directory):
+    # Import packages
+    import time
+
+    # Define the pruner, cache, and log of the optimization
+    start = time.time()
+    pruner = SuccessiveHalvingPruner() if pruning else None
+    cache = EvaluationCache(directory=cache_directory) if cache_directory is not None else None
+    records = lgbm_optimization_log(checkpoint, model_type, fold_plan, early_stopping_rounds, pruner=pruner)
+
+    # Define a function to return the score of an optimization iteration
+    def lgbm_params(**parameters):
+        result = evaluate_lgbm_point(model_type, parameters, fold_plan, n_jobs=n_jobs,
+                                     early_stopping_rounds=early_stopping_rounds, pruner=pruner, cache=cache)
+        records.append(result)
+        return result['target']
+
+    # Run the optimization
+    parameters = run_lgbm_optimization(model_type, lgbm_params, fold_plan, init_points, n_iter, n_jobs=n_jobs,
+                                       early_stopping_rounds=early_stopping_rounds, pruner=pruner, records=records,
+                                       cache=cache, verbose=0)
+    score = max(record['target'] for record in records if not record['pruned'])
+
+    return parameters, score, len(records), time.time() - start
+
+
+# Define a function to optimize hyperparameters for many response fields that share the same covariates
+def optimize_lgbm_targets(init_points, n_iter, data, predictor_all, target_fields, stratify_field, group_field,
+                          model_types=('classifier', 'regressor'), n_workers=1, n_jobs=2,
+                          early_stopping_rounds=None, pruning=False, checkpoint_directory=None, cache_directory=None):
+    """
+    Description: applies Bayesian optimization to LightGBM classifiers and regressors for many response fields, sharing one predictor matrix and the inner cross validation splits across all optimizations
+    Inputs: 'init_points' -- the number of random search iterations to perform initially
+            'n_iter' -- the number of Bayesian search iterations to perform
+            'data' -- the covariate data to conduct the model training and validation
+            'predictor_all' -- a list of predictor field names
+            'target_fields' -- a list of response field names
+            'stratify_field' -- a list containing the field name used to stratify the splits; if None, each response field stratifies its own splits
+            'group_field' -- a list containing the field name used to group the splits
+            'model_types' -- the model types to optimize for every response field, or a dictionary of model types per response field
+            'n_workers' -- the number of worker processes; each worker runs one optimization at a time
+            'n_jobs' -- the total number of cores to divide between worker processes and LightGBM threads
+            'early_stopping_rounds' -- if set, uses each inner test partition to stop boosting when the score has not improved for this many rounds
+            'pruning' -- if True, each optimization uses a SuccessiveHalvingPruner
+            'checkpoint_directory' -- an optional directory for one checkpoint file per response field and model type
+            'cache_directory' -- an optional directory for an on-disk EvaluationCache
+    Returned Value: Returns a dataframe with the best score, hyperparameters, number of evaluated points, and elapsed seconds per response field and model type
+    Preconditions: requires pre-processed X and y data; classifier response fields must be binary and regressor response fields use only values greater than or equal to zero
+    """
+
+    # Import packages
+    import multiprocessing
+    import os
+    import numpy as np
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Copy the predictors to shared memory once for all optimizations
+    block, predictors = share_predictors(data, predictor_all)
+    jobs = []
+    try:
+        # Create the fold plan of each optimization, reusing splits that have the same rows and strata
+        split_cache = {}
+        for target in target_fields:
+            job_model_types = model_types[target] if isinstance(model_types, dict) else model_types
+            job_stratify = stratify_field if stratify_field is not None else [target]
+            fields = list(dict.fromkeys([target, job_stratify[0], group_field[0]]))
+            for model_type in job_model_types:
+                if model_type == 'classifier':
+                    valid = np.ones(len(data), dtype=bool)
+                elif model_type == 'regressor':
+                    valid = (data[target] >= 0).to_numpy()
+                else:
+                    raise ValueError(f'Model type must be either "classifier" or "regressor", not "{model_type}".')
+                split_key = (job_stratify[0], valid.tobytes())
+                fold_plan = FoldPlan(data.loc[valid, fields], predictor_all, [target], job_stratify, group_field,
+                                     predictors=predictors,
+                                     rows=None if valid.all() else np.flatnonzero(valid),
+                                     folds=split_cache.get(split_key),
+                                     shared_memory=block)
+                split_cache[split_key] = fold_plan.folds
+                checkpoint = None
+                if checkpoint_directory is not None:
+                    os.makedirs(checkpoint_directory, exist_ok=True)
+                    checkpoint = os.path.join(checkpoint_directory, f'{target}_{model_type}.jsonl')
+                jobs.append((target, model_type, fold_plan, checkpoint))
+
+        # Run the optimizations serially or across a process pool
+        worker_jobs = max(1, n_jobs // max(1, n_workers))
+        results = []
+        if n_workers > 1:
+            # Start workers with spawn because forking after LightGBM has initialized OpenMP can deadlock
+            with ProcessPoolExecutor(max_workers=n_workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [executor.submit(_optimize_lgbm_job, model_type, fold_plan, init_points, n_iter,
+                                           worker_jobs, early_stopping_rounds, pruning, checkpoint, cache_directory)
+                           for target, model_type, fold_plan, checkpoint in jobs]
+                for (target, model_type, fold_plan, checkpoint), future in zip(jobs, futures):
+                    results.append((target, model_type) + future.result())
+                    print(f'Completed optimization of {model_type} for {target}')
+        else:
+            for target, model_type, fold_plan, checkpoint in jobs:
+                results.append((target, model_type) + _optimize_lgbm_job(
+                    model_type, fold_plan, init_points, n_iter, worker_jobs, early_stopping_rounds, pruning,
+                    checkpoint, cache_directory))
+                # Release the binned datasets of the finished optimization before starting the next one
+                fold_plan.clear_datasets()
+                print(f'Completed optimization of {model_type} for {target}')
+
+    # Release the shared memory block once no arrays refer to it
+    finally:
+        jobs.clear()
+        fold_plan = predictors = None
+        try:
+            block.close()
+        except BufferError:
+            pass
+        block.unlink()
+
+    # Assemble the best hyperparameters and scores per response field and model type
+    rows = []
+    for target, model_type, parameters, score, n_points, seconds in results:
+        row = {'target_field': target, 'model_type': model_type, 'score': score}
+        row.update({key: float(value) for key, value in parameters.items()})
+        row.update({'n_points': n_points, 'seconds': seconds})
+        rows.append(row)
+
+    return pd.DataFrame(rows)
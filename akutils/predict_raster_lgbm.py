@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Predict raster for LightGBM
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed in an Anaconda Python 3.12+ distribution.
+# Description: "Predict raster for LightGBM" is a set of functions that predict a LightGBM classifier or regressor over covariate rasters one batch of block windows at a time.
+# ---------------------------------------------------------------------------
+
+# Define a function to open covariate rasters
+def open_covariate_rasters(covariate_files):
+    """
+    Description: opens covariate rasters and maps each covariate name to a raster dataset and band number
+    Inputs: 'covariate_files' -- a dictionary of covariate names and single-band raster paths, or the path to a multi-band raster with band descriptions as covariate names
+    Returned Value: Returns a list of open datasets and a dictionary of covariate names to (dataset, band number) pairs
+    Preconditions: requires rasterio and rasters that share the same grid
+    """
+
+    # Import packages
+    import rasterio
+
+    # Open a multi-band raster
+    if isinstance(covariate_files, dict):
+        datasets = [rasterio.open(covariate_file) for covariate_file in covariate_files.values()]
+        bands = {name: (dataset, 1) for name, dataset in zip(covariate_files, datasets)}
+    else:
+        datasets = [rasterio.open(covariate_files)]
+        bands = {name: (datasets[0], number) for number, name in enumerate(datasets[0].descriptions, start=1)
+                 if name is not None}
+
+    # Check that all rasters share the same grid
+    for dataset in datasets[1:]:
+        if (dataset.shape != datasets[0].shape or dataset.transform != datasets[0].transform
+                or dataset.crs != datasets[0].crs):
+            for opened in datasets:
+                opened.close()
+            raise ValueError(f'Covariate raster {dataset.name} does not share the grid of {datasets[0].name}.')
+
+    return datasets, bands
+
+
+# Define a function to convert a batch of prediction values to output raster values
+def convert_raster_predictions(prediction, threshold=None, scale=1, dtype='int16'):
+    """
+    Description: converts model predictions to output raster values by applying a presence threshold or by scaling and rounding
+    Inputs: 'prediction' -- an array of predicted probabilities or values
+            'threshold' -- an optional probability threshold; predictions greater than or equal to the threshold become 1 and all others become 0
+            'scale' -- the multiplier applied to predictions without a threshold before rounding to integers
+            'dtype' -- the data type of the output raster
+    Returned Value: Returns an array of output raster values
+    Preconditions: requires numpy
+    """
+
+    # Import packages
+    import numpy as np
+
+    # Apply the threshold or scale the predictions
+    if threshold is not None:
+        return (prediction >= threshold).astype(dtype)
+    return np.rint(prediction * scale).astype(dtype)
+
+
+# Define a function to predict a LightGBM model over covariate rasters
+def predict_lgbm_raster(covariate_files, predictor_all, model, output_file, preprocess=None, threshold=None,
+                        scale=1, windows_per_batch=4, n_workers=2, n_jobs=2, dtype='int16', nodata=-32768,
+                        detail=10):
+    """
+    Description: predicts a LightGBM classifier or regressor over covariate rasters, overlapping reads, predictions, and writes of batches of block windows across a thread pool
+    Inputs: 'covariate_files' -- a dictionary of covariate names and single-band raster paths, or the path to a multi-band raster with band descriptions as covariate names
+            'predictor_all' -- a list of predictor field names in the order used to train the model
+            'model' -- a LightGBM booster, a fitted LightGBM estimator, or the path to a saved LightGBM model
+            'output_file' -- the path of the output raster
+            'preprocess' -- an optional function that accepts a dataframe of covariates and predictor_all and returns a dataframe of predictors, such as foliar_cover_predictors; by default, missing values are filled with -32768
+            'threshold' -- an optional probability threshold, such as from determine_optimal_threshold, to convert predicted probabilities to presence and absence
+            'scale' -- the multiplier applied to predictions without a threshold before rounding to integers
+            'windows_per_batch' -- the number of block windows combined in each predict call
+            'n_workers' -- the number of threads that process batches
+            'n_jobs' -- the total number of cores to divide between threads for LightGBM prediction
+            'dtype' -- the data type of the output raster
+            'nodata' -- the no data value of the output raster, written where all covariates are missing
+            'detail' -- the number of progress reports passed to BlockProgress
+    Returned Value: Returns the output file
+    Preconditions: requires rasterio, lightgbm, and covariate rasters that share the same grid; a binary classifier booster predicts probabilities and a regressor booster predicts values; multiclass boosters are not supported
+    """
+
+    # Import packages
+    import threading
+    import lightgbm as lgb
+    import numpy as np
+    import pandas as pd
+    import rasterio
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    from .raster_block_progress import BlockProgress
+
+    # Load the booster
+    if isinstance(model, lgb.Booster):
+        booster = model
+    elif hasattr(model, 'booster_'):
+        booster = model.booster_
+    else:
+        booster = lgb.Booster(model_file=model)
+
+    # Check that the booster predicts a single value per pixel
+    if booster.num_model_per_iteration() > 1:
+        raise ValueError(f'Raster prediction requires a single-output model, but the booster predicts '
+                         f'{booster.num_model_per_iteration()} classes.')
+
+    # Open the covariate rasters and create the output raster
+    datasets, bands = open_covariate_rasters(covariate_files)
+    try:
+        template = datasets[0]
+        profile = template.profile.copy()
+        profile.update(count=1, dtype=dtype, nodata=nodata, compress='lzw', BIGTIFF='IF_SAFER')
+        output_raster = rasterio.open(output_file, 'w', **profile)
+        read_lock = threading.Lock()
+        write_lock = threading.Lock()
+        thread_jobs = max(1, n_jobs // max(1, n_workers))
+
+        # Define a function to read, predict, and write a batch of windows
+        def process_batch(windows):
+            # Read the covariates of each window with missing values as NaN
+            bytes_read = 0
+            with read_lock:
+                frames = []
+                for window in windows:
+                    columns = {}
+                    for name, (dataset, number) in bands.items():
+                        values = dataset.read(number, window=window)
+                        bytes_read += values.nbytes
+                        values = values.astype('float64')
+                        if dataset.nodata is not None:
+                            values[values == dataset.nodata] = np.nan
+                        columns[name] = values.ravel()
+                    frames.append(pd.DataFrame(columns))
+            covariate_data = pd.concat(frames, ignore_index=True)
+            missing = covariate_data.isna().all(axis=1).to_numpy()
+
+            # Process the predictors
+            if preprocess is not None:
+                covariate_data = preprocess(covariate_data, predictor_all)
+            else:
+                covariate_data = covariate_data[predictor_all].fillna(-32768).astype('int32')
+
+            # Predict the batch and convert the predictions to output values
+            prediction = booster.predict(covariate_data[predictor_all].to_numpy(), num_threads=thread_jobs)
+            output = convert_raster_predictions(prediction, threshold=threshold, scale=scale, dtype=dtype)
+            output[missing] = nodata
+
+            # Write each window of the batch
+            start = 0
+            with write_lock:
+                for window in windows:
+                    size = int(window.height) * int(window.width)
+                    output_raster.write(output[start:start + size].reshape(int(window.height), int(window.width)),
+                                        1, window=window)
+                    start += size
+            progress.update(windows=len(windows), pixels=output.size, bytes_read=bytes_read,
+                            bytes_written=output.nbytes)
+
+        # Process batches of windows, keeping a limited number of batches in memory
+        try:
+            windows = [window for block_index, window in template.block_windows(1)]
+            batches = [windows[start:start + windows_per_batch] for start in range(0, len(windows), windows_per_batch)]
+            progress = BlockProgress(len(windows), detail=detail)
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                pending = set()
+                for batch in batches:
+                    if len(pending) >= 2 * n_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    pending.add(executor.submit(process_batch, batch))
+                for future in pending:
+                    future.result()
+            progress.finish()
+        finally:
+            output_raster.close()
+    finally:
+        for dataset in datasets:
+            dataset.close()
+
+    return output_file
@@ -2,40 +2,730 @@
 # ---------------------------------------------------------------------------
 # Query PostgreSQL database to return data frame
 # Author: Timm Nawrocki, Alaska Center for Conservation Science
-# Last Updated: 2020-11-10
+# Last Updated: 2026-10-17
 # Usage: Can be executed in an Anaconda Python 3.7 distribution or an ArcGIS Pro Python 3.6 distribution.
 # Description: "Query PostgreSQL database to return data frame" is a function that queries a PostgreSQL connection and returns the query results as a Pandas dataframe.
 # ---------------------------------------------------------------------------
 
-# Define a function to create a connection to a PostgreSQL database
-def query_to_dataframe(connection, query):
+# Import profiling decorator
+from .end_timing import span, timed
+
+# Define the pandas data types of PostgreSQL type codes; integers use nullable types so that chunks share types
+POSTGRESQL_DTYPES = {
+    16: 'boolean',  # boolean
+    20: 'Int64',  # bigint
+    21: 'Int16',  # smallint
+    23: 'Int32',  # integer
+    700: 'float32',  # real
+    701: 'float64',  # double precision
+    1700: 'float64',  # numeric
+    1082: 'datetime64[ns]',  # date
+    1114: 'datetime64[ns]',  # timestamp without time zone
+}
+
+
+# Define a function to determine the pandas data types of query results
+def cursor_dtypes(description):
+    """
+    Description: determines the pandas data types of query result columns from a cursor description
+    Inputs: description -- the description of a cursor that has executed a query
+    Returned Value: Function returns a dictionary of column names and pandas data types; columns of other types are omitted and remain objects
+    Preconditions: requires a cursor description from psycopg2
+    """
+    return {column.name: POSTGRESQL_DTYPES[column.type_code] for column in description
+            if column.type_code in POSTGRESQL_DTYPES}
+
+
+# Define a class to fetch query results from a server-side cursor in chunks
+class _QueryChunks:
+    """
+    Description: iterates over query results as typed dataframes with up to itersize rows, timing the fetch and conversion of each chunk as a 'query_chunk' stage while the chunks are consumed
+    Inputs: 'cursor' -- a server-side cursor that has executed a query
+            'rows' -- the first set of fetched rows
+            'itersize' -- the number of rows to fetch at a time
+            'pool' -- an optional connection pool to which the connection is returned when the chunks are closed
+            'connection' -- the pooled connection of the cursor
+    Returned Value: Returns an iterator of dataframes that closes the cursor and releases the connection when it is exhausted, closed, used as a context manager, or garbage collected
+    Preconditions: none
+    """
+
+    def __init__(self, cursor, rows, itersize, pool=None, connection=None):
+        self._cursor = cursor
+        self._rows = rows
+        self._itersize = itersize
+        self._pool = pool
+        self._connection = connection
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # Import packages
+        import pandas as pd
+
+        # Convert the fetched rows to a typed dataframe and fetch the next set of rows
+        if self._cursor is None:
+            raise StopIteration
+        try:
+            with span('query_chunk'):
+                rows = self._cursor.fetchmany(self._itersize) if self._rows is None else self._rows
+                if rows:
+                    column_names = [desc[0] for desc in self._cursor.description]
+                    dtypes = cursor_dtypes(self._cursor.description)
+                    chunk = pd.DataFrame.from_records(rows, columns=column_names).astype(dtypes)
+            self._rows = None
+            if not rows:
+                raise StopIteration
+        except BaseException:
+            self.close()
+            raise
+        return chunk
+
+    def close(self):
+        """
+        Description: closes the cursor and returns a pooled connection to its pool
+        Inputs: none
+        Returned Value: no return
+        Preconditions: closing more than once has no effect
+        """
+        cursor, self._cursor = self._cursor, None
+        connection, self._connection = self._connection, None
+        self._rows = None
+        try:
+            if cursor is not None:
+                cursor.close()
+        finally:
+            if connection is not None:
+                self._pool.release(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+# Define a function to query a PostgreSQL database
+@timed('query')
+def query_to_dataframe(connection, query, itersize=None, chunks=False, parameters=None, cache=None, raise_errors=False):
     """
     Description: queries a PostgreSQL connection and returns results as a dataframe.
-    Inputs: connection -- an existing Python connection to the PostgreSQL database
+    Inputs: connection -- an existing Python connection to the PostgreSQL database, or a PostgreSQLConnectionPool to borrow a connection from for the duration of the query
             query -- a SQL query to execute on the database
-    Returned Value: Function returns connection to PostgreSQL database.
-    Preconditions: requires an existing PostgreSQL connection created with the create_connection_postgresql function
+            itersize -- an optional number of rows to fetch at a time from a server-side cursor; if set, results are fetched in chunks and concatenated into typed columns
+            chunks -- if True, returns an iterator of dataframes with up to itersize rows (default 10000) instead of a single dataframe; the iterator closes its cursor and returns a pooled connection when it is exhausted or closed
+            parameters -- an optional sequence or dictionary of query parameters passed to the cursor
+            cache -- an optional QueryResultCache; results are loaded from the cache if present and stored in it otherwise; ignored if chunks is True
+            raise_errors -- if True, raises query errors instead of printing them and returning 1
+    Returned Value: Function returns a dataframe of query results, or an iterator of dataframes if chunks is True.
+    Preconditions: requires an existing PostgreSQL connection created with the create_connection_postgresql function; when profiling is enabled, the 'query' stage times the query and the first fetch, and each chunk fetched afterwards is timed as a 'query_chunk' stage
     """
 
     # Import packages
+    import uuid
     import psycopg2
     import pandas as pd
 
-    # Create a cursor object to execute the query
-    cursor = connection.cursor()
-    # Execute the query and define column names
+    # Borrow a connection from a pool, keeping it until an iterator of chunks is exhausted or closed
+    if hasattr(connection, 'acquire'):
+        pool = connection
+        connection = pool.acquire()
+        try:
+            query_result = query_to_dataframe(connection, query, itersize=itersize, chunks=chunks,
+                                              parameters=parameters, cache=cache, raise_errors=raise_errors)
+        except BaseException:
+            pool.release(connection)
+            raise
+        if chunks and not isinstance(query_result, int):
+            query_result._pool = pool
+            query_result._connection = connection
+            return query_result
+        pool.release(connection)
+        return query_result
+
+    # Load the results from the cache if present
+    if cache is not None and not chunks:
+        key = cache.key(connection, query, parameters)
+        query_result = cache.get(key, connection)
+        if query_result is not None:
+            return query_result
+        query_result = query_to_dataframe(connection, query, itersize=itersize, parameters=parameters,
+                                          raise_errors=raise_errors)
+        if isinstance(query_result, pd.DataFrame):
+            cache.put(key, query_result, connection, query)
+        return query_result
+
+    # Fetch all results at once unless a chunked query is requested
+    if itersize is None and not chunks:
+        # Create a cursor object to execute the query
+        cursor = connection.cursor()
+        # Execute the query and define column names
+        try:
+            cursor.execute(query, parameters)
+            column_names = [desc[0] for desc in cursor.description]
+        # Return error if query fails
+        except (Exception, psycopg2.DatabaseError) as error:
+            cursor.close()
+            if raise_errors:
+                raise
+            print("Error: %s" % error)
+            return 1
+
+        # Store query results as pandas dataframe
+        query_result = pd.DataFrame(cursor.fetchall(), columns=column_names)
+        cursor.close()
+
+        # Return dataframe
+        return query_result
+
+    # Create a server-side cursor, which must be held across commits on autocommit connections
+    if itersize is None:
+        itersize = 10000
+    cursor = connection.cursor(name=f'query_to_dataframe_{uuid.uuid4().hex}', withhold=connection.autocommit)
+    cursor.itersize = itersize
+    # Execute the query and fetch the first chunk, which defines the column names
     try:
-        cursor.execute(query)
-        column_names = [desc[0] for desc in cursor.description]
+        cursor.execute(query, parameters)
+        rows = cursor.fetchmany(itersize)
     # Return error if query fails
     except (Exception, psycopg2.DatabaseError) as error:
+        # A server-side cursor that failed to open cannot be closed on the server
+        try:
+            cursor.close()
+        except psycopg2.Error:
+            pass
+        if raise_errors:
+            raise
         print("Error: %s" % error)
-        cursor.close()
         return 1
 
-    # Store query results as pandas dataframe
-    query_result = pd.DataFrame(cursor.fetchall(), columns=column_names)
-    cursor.close()
+    # Return an iterator of dataframe chunks
+    query_chunks = _QueryChunks(cursor, rows, itersize)
+    if chunks:
+        return query_chunks
+
+    # Concatenate the typed chunks into a single dataframe
+    return pd.concat(list(query_chunks), ignore_index=True)
+
+
+# Define a function to query a PostgreSQL database in bulk with COPY
+@timed('query')
+def copy_query_to_dataframe(connection, query, buffer='memory', engine=None):
+    """
+    Description: exports the results of a query from a PostgreSQL connection in bulk with COPY and parses them into a typed dataframe.
+    Inputs: connection -- an existing Python connection to the PostgreSQL database
+            query -- a SQL select query to execute on the database, without a trailing semicolon
+            buffer -- either 'memory' to hold the exported text in memory or 'file' to spool it to a temporary file
+            engine -- the CSV parser, either 'pyarrow' or the pandas 'c' parser; defaults to 'pyarrow' if it is installed
+    Returned Value: Function returns a dataframe of query results, with column types determined from the query description.
+    Preconditions: requires an existing PostgreSQL connection created with the create_connection_postgresql function; the 'pyarrow' parser reads nulls and empty strings as query_to_dataframe does, while the 'c' parser, which cannot tell quoted empty strings from nulls, exports nulls as \\N and so also reads text values equal to \\N as missing
+    """
+
+    # Import packages
+    import io
+    import tempfile
+    import psycopg2
+    import pandas as pd
+
+    # Select the parser, since only pyarrow tells quoted empty strings apart from the default CSV null
+    if engine is None:
+        try:
+            import pyarrow
+            engine = 'pyarrow'
+        except ImportError:
+            engine = 'c'
+    null_option = '' if engine == 'pyarrow' else ", NULL '\\N'"
+
+    # Describe the query result columns without fetching any rows
+    copy_file = io.BytesIO() if buffer == 'memory' else tempfile.TemporaryFile(mode='w+b')
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f'SELECT * FROM ({query}) AS copy_query LIMIT 0')
+            description = cursor.description
+            # Export the query results as CSV text
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true{null_option})", copy_file)
+        # Return error if query fails
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Error: %s" % error)
+            return 1
+        finally:
+            cursor.close()
+
+        # Define the types of the result columns
+        column_names = [desc[0] for desc in description]
+        dtypes = cursor_dtypes(description)
+        date_columns = [name for name, dtype in dtypes.items() if dtype.startswith('datetime64')]
+        copy_file.seek(0)
+
+        # Parse the exported text with pyarrow, reading only unquoted empty fields as nulls
+        if engine == 'pyarrow':
+            import pyarrow as pa
+            import pyarrow.csv as csv
+            arrow_types = {'boolean': (pa.bool_(), pd.BooleanDtype()),
+                           'Int64': (pa.int64(), pd.Int64Dtype()),
+                           'Int32': (pa.int32(), pd.Int32Dtype()),
+                           'Int16': (pa.int16(), pd.Int16Dtype()),
+                           'float32': (pa.float32(), None),
+                           'float64': (pa.float64(), None),
+                           'datetime64[ns]': (pa.timestamp('ns'), None)}
+            read_names = [f'column_{index}' for index in range(len(column_names))]
+            column_types = {read_name: arrow_types[dtypes[name]][0] if name in dtypes else pa.string()
+                            for read_name, name in zip(read_names, column_names)}
+            table = csv.read_csv(copy_file,
+                                 read_options=csv.ReadOptions(column_names=read_names, skip_rows=1),
+                                 convert_options=csv.ConvertOptions(column_types=column_types,
+                                                                    null_values=[''],
+                                                                    strings_can_be_null=True,
+                                                                    quoted_strings_can_be_null=False,
+                                                                    true_values=['t'],
+                                                                    false_values=['f']))
+            nullable_types = {arrow_type: pandas_type for arrow_type, pandas_type in arrow_types.values()
+                              if pandas_type is not None}
+            query_result = table.to_pandas(types_mapper=nullable_types.get)
+
+        # Parse the exported text with the pandas parser, reading floats exactly, since PostgreSQL writes the shortest text that round trips
+        else:
+            read_dtypes = {name: dtype for name, dtype in dtypes.items() if name not in date_columns}
+            read_dtypes.update({name: str for name in column_names if name not in dtypes})
+            query_result = pd.read_csv(copy_file, dtype=read_dtypes, parse_dates=date_columns, engine=engine,
+                                       keep_default_na=False, na_values=['\\N'], true_values=['t'],
+                                       false_values=['f'], float_precision='round_trip')
+    finally:
+        copy_file.close()
+    query_result.columns = column_names
+    query_result = query_result.astype({name: dtypes[name] for name in date_columns})
 
     # Return dataframe
     return query_result
+
+
+# Define a function to compare the run times of query methods
+def benchmark_query_to_dataframe(connection, query, repeats=3, itersize=50000):
+    """
+    Description: times query_to_dataframe with fetchall, query_to_dataframe with a server-side cursor, and copy_query_to_dataframe on the same query.
+    Inputs: connection -- an existing Python connection to the PostgreSQL database
+            query -- a SQL select query to execute on the database, without a trailing semicolon
+            repeats -- the number of times to run each method
+            itersize -- the number of rows fetched at a time by the server-side cursor
+    Returned Value: Function returns a dataframe with the method, the number of rows, and the minimum and mean seconds of each method.
+    Preconditions: requires an existing PostgreSQL connection created with the create_connection_postgresql function
+    """
+
+    # Import packages
+    import time
+    import pandas as pd
+
+    # Define the methods to compare
+    methods = {
+        'fetchall': lambda: query_to_dataframe(connection, query),
+        'server_cursor': lambda: query_to_dataframe(connection, query, itersize=itersize),
+        'copy_memory': lambda: copy_query_to_dataframe(connection, query, engine='c'),
+        'copy_file': lambda: copy_query_to_dataframe(connection, query, buffer='file', engine='c'),
+    }
+    try:
+        import pyarrow
+        methods['copy_pyarrow'] = lambda: copy_query_to_dataframe(connection, query, engine='pyarrow')
+    except ImportError:
+        pass
+
+    # Time each method
+    rows = []
+    for method, run in methods.items():
+        seconds = []
+        for repeat in range(repeats):
+            start = time.perf_counter()
+            result = run()
+            seconds.append(time.perf_counter() - start)
+        rows.append({'method': method,
+                     'rows': len(result) if isinstance(result, pd.DataFrame) else None,
+                     'min_seconds': min(seconds),
+                     'mean_seconds': sum(seconds) / len(seconds)})
+
+    return pd.DataFrame(rows)
+
+
+# Define a function to normalize the text of a query
+def normalize_query(query):
+    """
+    Description: collapses whitespace and removes a trailing semicolon outside of quoted literals so that equivalent query text shares a cache key
+    Inputs: query -- a SQL query
+    Returned Value: Function returns the normalized query text
+    Preconditions: none
+    """
+
+    # Import packages
+    import re
+
+    # Collapse whitespace in the text between quoted literals and identifiers
+    parts = re.split(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")", query)
+    parts = [part if index % 2 else re.sub(r'\s+', ' ', part) for index, part in enumerate(parts)]
+    return ''.join(parts).strip().rstrip(';').strip()
+
+
+# Define a function to find the tables that a query reads
+def query_tables(connection, query):
+    """
+    Description: finds the tables named after FROM or JOIN in a query that exist in the database
+    Inputs: connection -- an existing Python connection to the PostgreSQL database
+            query -- a SQL query
+    Returned Value: Function returns a sorted list of table object identifiers
+    Preconditions: common table expression names and other names that are not relations are ignored
+    """
+
+    # Import packages
+    import re
+
+    # Search the query for relation names
+    names = set(re.findall(r'\b(?:from|join)\s+((?:"[^"]+"|[A-Za-z_][\w$]*)(?:\.(?:"[^"]+"|[A-Za-z_][\w$]*))?)',
+                           normalize_query(query), flags=re.IGNORECASE))
+    if not names:
+        return []
+
+    # Resolve the names to tables
+    cursor = connection.cursor()
+    try:
+        cursor.execute('SELECT DISTINCT to_regclass(name)::oid FROM unnest(%s) AS name WHERE to_regclass(name) IS NOT NULL',
+                       (sorted(names),))
+        tables = sorted(row[0] for row in cursor.fetchall())
+    finally:
+        cursor.close()
+    return tables
+
+
+# Define a function to summarize modifications to tables
+def table_signature(connection, tables):
+    """
+    Description: summarizes the inserted, updated, and deleted row counts, storage file, and size of each table
+    Inputs: connection -- an existing Python connection to the PostgreSQL database
+            tables -- a list of table object identifiers from query_tables
+    Returned Value: Function returns a list of [table, modified rows, storage file, bytes] values that changes when a table is modified
+    Preconditions: changes in size and storage file are seen immediately, but modification counts come from the cumulative statistics system, which other sessions report after a delay of up to about ten seconds
+    """
+
+    # Query the table statistics
+    if not tables:
+        return []
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""SELECT c.oid::bigint,
+                                 coalesce(s.n_tup_ins + s.n_tup_upd + s.n_tup_del, 0)::bigint,
+                                 c.relfilenode::bigint,
+                                 pg_relation_size(c.oid)::bigint
+                          FROM pg_class c LEFT JOIN pg_stat_all_tables s ON s.relid = c.oid
+                          WHERE c.oid = ANY(%s::oid[])
+                          ORDER BY c.oid""", (list(tables),))
+        signature = [list(row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    return signature
+
+
+# Define a class to cache query results on disk
+class QueryResultCache:
+    """
+    Description: stores query results as memory-mapped Arrow or Parquet files keyed on the normalized query text, the query parameters, and the database identity, with expiration by age or by table modification and a size limit with least recently used eviction
+    Inputs: 'directory' -- the directory of the cache files
+            'ttl' -- an optional number of seconds after which results expire
+            'max_bytes' -- the maximum total size of cached result files
+            'check_tables' -- if True, results expire when a table read by the query is modified, as summarized by table_signature; this runs a small catalog query on each load
+            'file_format' -- either 'arrow' for uncompressed Arrow IPC files or 'parquet' for compressed Parquet files
+    Returned Value: Returns a cache to pass to query_to_dataframe
+    Preconditions: requires pyarrow; columns of mixed Python objects that Arrow cannot convert are not cached
+    """
+
+    def __init__(self, directory, ttl=None, max_bytes=2 * 1024 ** 3, check_tables=False, file_format='arrow'):
+        # Import packages
+        import os
+
+        if file_format not in ('arrow', 'parquet'):
+            raise ValueError(f'Unknown cache file format: {file_format}')
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.check_tables = check_tables
+        self.file_format = file_format
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(connection, query, parameters=None):
+        """
+        Description: calculates the cache key of a query
+        Inputs: 'connection' -- an existing Python connection to the PostgreSQL database
+                'query' -- a SQL query
+                'parameters' -- an optional sequence or dictionary of query parameters
+        Returned Value: Returns a hexadecimal hash string
+        Preconditions: none
+        """
+        # Import packages
+        import hashlib
+        import json
+
+        # Hash the database identity with the normalized query and parameters
+        info = connection.info
+        identity = [info.host, info.port, info.dbname, info.user]
+        text = json.dumps([identity, normalize_query(query), parameters], sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _paths(self, key):
+        # Import packages
+        import os
+
+        return (os.path.join(self.directory, f'{key}.{self.file_format}'),
+                os.path.join(self.directory, f'{key}.json'))
+
+    def _remove(self, key):
+        # Import packages
+        import os
+
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get(self, key, connection=None):
+        """
+        Description: loads a cached query result if it has not expired
+        Inputs: 'key' -- the cache key of a query
+                'connection' -- an existing Python connection, required to check table modifications
+        Returned Value: Returns the cached dataframe or None
+        Preconditions: none
+        """
+        # Import packages
+        import json
+        import os
+        import time
+        import pyarrow as pa
+
+        # Read the entry metadata
+        data_path, metadata_path = self._paths(key)
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as metadata_file:
+                metadata = json.load(metadata_file)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+
+        # Expire results by age or by table modification
+        expired = self.ttl is not None and time.time() - metadata['created'] > self.ttl
+        if not expired and self.check_tables and connection is not None:
+            expired = table_signature(connection, metadata['tables']) != metadata['signature']
+        if expired:
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        # Load the result from a memory-mapped file
+        try:
+            if self.file_format == 'arrow':
+                with pa.memory_map(data_path, 'r') as source:
+                    table = pa.ipc.open_file(source).read_all()
+            else:
+                import pyarrow.parquet as pq
+                table = pq.read_table(data_path, memory_map=True)
+        except (FileNotFoundError, pa.ArrowException):
+            self._remove(key)
+            self.misses += 1
+            return None
+        query_result = table.to_pandas()
+
+        # Record the access time for least recently used eviction
+        os.utime(metadata_path)
+        self.hits += 1
+        return query_result
+
+    def put(self, key, query_result, connection=None, query=None):
+        """
+        Description: stores a query result and evicts the least recently used results above the size limit
+        Inputs: 'key' -- the cache key of a query
+                'query_result' -- a dataframe of query results
+                'connection' -- an existing Python connection, required to record table modifications
+                'query' -- the SQL query, required to record table modifications
+        Returned Value: Returns True if the result was stored and False otherwise
+        Preconditions: none
+        """
+        # Import packages
+        import json
+        import os
+        import time
+        import uuid
+        import pyarrow as pa
+
+        # Convert the result to an Arrow table
+        try:
+            table = pa.Table.from_pandas(query_result, preserve_index=False)
+        except (pa.ArrowException, TypeError, ValueError):
+            return False
+
+        # Record the table modification state before writing
+        tables = []
+        signature = []
+        if self.check_tables and connection is not None and query is not None:
+            tables = query_tables(connection, query)
+            signature = table_signature(connection, tables)
+
+        # Write the result and metadata to temporary files and move them into place
+        data_path, metadata_path = self._paths(key)
+        temporary = f'.{uuid.uuid4().hex}'
+        if self.file_format == 'arrow':
+            with pa.OSFile(data_path + temporary, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            import pyarrow.parquet as pq
+            pq.write_table(table, data_path + temporary)
+        metadata = {'created': time.time(),
+                    'bytes': os.path.getsize(data_path + temporary),
+                    'tables': tables,
+                    'signature': signature,
+                    'query': query}
+        with open(metadata_path + temporary, 'w', encoding='utf-8') as metadata_file:
+            json.dump(metadata, metadata_file)
+        os.replace(data_path + temporary, data_path)
+        os.replace(metadata_path + temporary, metadata_path)
+
+        # Evict results until the cache fits within the size limit
+        self.evict()
+        return True
+
+    def evict(self):
+        """
+        Description: removes expired results and then the least recently used results until the cache fits within the size limit
+        Inputs: none
+        Returned Value: Returns the number of removed results
+        Preconditions: none
+        """
+        # Import packages
+        import json
+        import os
+        import time
+
+        # List the cached results by access time
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as metadata_file:
+                    metadata = json.load(metadata_file)
+                entries.append((os.path.getmtime(path), name[:-5], metadata))
+            except (FileNotFoundError, ValueError):
+                continue
+        entries.sort(key=lambda entry: entry[0])
+
+        # Remove expired results, then the least recently used results
+        removed = 0
+        total = sum(metadata['bytes'] for accessed, key, metadata in entries)
+        now = time.time()
+        for accessed, key, metadata in entries:
+            if (self.ttl is not None and now - metadata['created'] > self.ttl) or total > self.max_bytes:
+                self._remove(key)
+                total -= metadata['bytes']
+                removed += 1
+        return removed
+
+    def clear(self):
+        """
+        Description: removes all cached results
+        Inputs: none
+        Returned Value: no return
+        Preconditions: none
+        """
+        # Import packages
+        import os
+
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                self._remove(name[:-5])
+
+
+# Define a function to run named queries concurrently
+async def query_to_dataframes_async(authentication, queries, max_connections=4, itersize=None, cache=None):
+    """
+    Description: runs a batch of named queries concurrently over a bounded number of pooled connections
+    Inputs: authentication -- a csv file containing the connection and authentication parameters, or an existing PostgreSQLConnectionPool
+            queries -- a dictionary of query names and SQL queries, or of query names and (query, parameters) tuples
+            max_connections -- the maximum number of queries that run at the same time
+            itersize -- an optional number of rows to fetch at a time from a server-side cursor for each query
+            cache -- an optional QueryResultCache shared by the queries
+    Returned Value: Function returns a dictionary of query names and dataframes for the queries that succeeded, and a dataframe with the name, number of rows, start and run seconds, and error message of each query
+    Preconditions: must be awaited in an event loop; queries run in worker threads because psycopg2 blocks, and a pool created from an authentication file is closed when the batch finishes
+    """
+
+    # Import packages
+    import asyncio
+    import time
+    import pandas as pd
+    from concurrent.futures import ThreadPoolExecutor
+    from .connect_database_postgresql import PostgreSQLConnectionPool
+
+    # Create a pool of connections unless one is provided
+    owned = not hasattr(authentication, 'acquire')
+    pool = PostgreSQLConnectionPool(authentication, max_size=max_connections) if owned else authentication
+    batch_start = time.perf_counter()
+
+    # Define a function to run and time a single query
+    def run_query(name, query):
+        parameters = None
+        if isinstance(query, tuple):
+            query, parameters = query
+        start = time.perf_counter()
+        try:
+            query_result = query_to_dataframe(pool, query, itersize=itersize, parameters=parameters, cache=cache,
+                                              raise_errors=True)
+            error = None
+        except Exception as exception:
+            query_result = None
+            error = f'{type(exception).__name__}: {str(exception).strip()}'
+        return name, query_result, start - batch_start, time.perf_counter() - start, error
+
+    # Run the queries in a bounded set of threads
+    loop = asyncio.get_running_loop()
+    try:
+        with ThreadPoolExecutor(max_workers=max_connections) as executor:
+            outcomes = await asyncio.gather(*[loop.run_in_executor(executor, run_query, name, query)
+                                              for name, query in queries.items()])
+    finally:
+        if owned:
+            pool.close()
+
+    # Collect the results and report
+    results = {name: query_result for name, query_result, start, seconds, error in outcomes if error is None}
+    report = pd.DataFrame([{'name': name,
+                            'rows': None if query_result is None else len(query_result),
+                            'start_seconds': start,
+                            'seconds': seconds,
+                            'error': error}
+                           for name, query_result, start, seconds, error in outcomes],
+                          columns=['name', 'rows', 'start_seconds', 'seconds', 'error'])
+    return results, report.astype({'rows': 'Int64'})
+
+
+# Define a function to run named queries concurrently from synchronous code
+def query_to_dataframes(authentication, queries, max_connections=4, itersize=None, cache=None):
+    """
+    Description: runs a batch of named queries concurrently with query_to_dataframes_async and waits for the results
+    Inputs: authentication -- a csv file containing the connection and authentication parameters, or an existing PostgreSQLConnectionPool
+            queries -- a dictionary of query names and SQL queries, or of query names and (query, parameters) tuples
+            max_connections -- the maximum number of queries that run at the same time
+            itersize -- an optional number of rows to fetch at a time from a server-side cursor for each query
+            cache -- an optional QueryResultCache shared by the queries
+    Returned Value: Function returns a dictionary of query names and dataframes for the queries that succeeded, and a dataframe report of each query
+    Preconditions: cannot be called from a running event loop, such as a notebook cell; await query_to_dataframes_async instead
+    """
+
+    # Import packages
+    import asyncio
+
+    return asyncio.run(query_to_dataframes_async(authentication, queries, max_connections=max_connections,
+                                                 itersize=itersize, cache=cache))
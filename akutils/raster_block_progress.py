@@ -1,3 +1,12 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Raster block progress
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed in an Anaconda Python 3.12+ distribution.
+# Description: "Raster block progress" is a function and a tracker class that report the progress of rasterio block processing.
+# ---------------------------------------------------------------------------
+
 def raster_block_progress(detail, windows, count, progress):
     """
     Description: tracks progress of rasterio block processing
@@ -34,3 +43,129 @@ def raster_block_progress(detail, windows, count, progress):
     
     # Return count
     return count, progress
+
+
+# Define the positions of the shared progress counters
+_WINDOWS = 0
+_PIXELS = 1
+_BYTES_READ = 2
+_BYTES_WRITTEN = 3
+_LAST_REPORT = 4
+_NEXT_STEP = 5
+
+
+# Define a class to track the progress and throughput of rasterio block processing
+class BlockProgress:
+    """
+    Description: tracks the progress of rasterio block processing in counters shared by threads or processes and reports the percentage completed, windows and pixels per second, megabytes read and written, and the estimated time remaining
+    Inputs: 'windows' -- an integer representing the total number of windows to be processed
+            'detail' -- an integer representing the number of reports to provide, as in raster_block_progress
+            'min_interval' -- the minimum number of seconds between reports; the final report is always printed
+            'context' -- an optional multiprocessing context; if provided, counters are kept in shared memory so that worker processes can report into the tracker
+            'output' -- the function that prints each report
+    Returned Value: Returns a tracker with update and finish methods
+    Preconditions: a tracker with a context must be passed to worker processes as process arguments or through a pool initializer
+    """
+
+    def __init__(self, windows, detail=10, min_interval=1.0, context=None, output=print):
+        # Import packages
+        import threading
+        import time
+
+        self.windows = windows
+        self.detail = detail
+        self.min_interval = min_interval
+        self.output = output
+        self.start = time.time()
+        if context is None:
+            self._values = [0.0] * 6
+            self._lock = threading.Lock()
+        else:
+            self._values = context.RawArray('d', 6)
+            self._lock = context.Lock()
+        self._values[_NEXT_STEP] = 1
+
+    def update(self, windows=1, pixels=0, bytes_read=0, bytes_written=0):
+        """
+        Description: adds completed work to the counters and prints a report when a new progress step is reached and the minimum interval has passed
+        Inputs: 'windows' -- the number of completed windows
+                'pixels' -- the number of pixels in the completed windows
+                'bytes_read' -- the number of bytes read for the completed windows
+                'bytes_written' -- the number of bytes written for the completed windows
+        Returned Value: Returns the number of completed windows
+        Preconditions: none
+        """
+        # Import packages
+        import time
+
+        # Add the work and check whether a report is due without formatting it
+        values = self._values
+        with self._lock:
+            values[_WINDOWS] += windows
+            values[_PIXELS] += pixels
+            values[_BYTES_READ] += bytes_read
+            values[_BYTES_WRITTEN] += bytes_written
+            completed = values[_WINDOWS]
+            step = int(completed / self.windows * self.detail) if self.windows else self.detail
+            if step < values[_NEXT_STEP]:
+                return int(completed)
+            now = time.time()
+            if completed < self.windows and now - values[_LAST_REPORT] < self.min_interval:
+                return int(completed)
+            values[_LAST_REPORT] = now
+            values[_NEXT_STEP] = step + 1
+            snapshot = list(values[:_LAST_REPORT])
+
+        # Print the report outside of the lock
+        self.output(self._format(snapshot, now, step))
+        return int(completed)
+
+    def stats(self):
+        """
+        Description: summarizes the current progress and throughput
+        Inputs: none
+        Returned Value: Returns a dictionary of completed windows, pixels, megabytes read and written, elapsed seconds, windows and pixels per second, and estimated seconds remaining
+        Preconditions: none
+        """
+        # Import packages
+        import time
+
+        with self._lock:
+            snapshot = list(self._values[:_LAST_REPORT])
+        return self._stats(snapshot, time.time())
+
+    def _stats(self, snapshot, now):
+        completed, pixels, bytes_read, bytes_written = snapshot
+        elapsed = max(now - self.start, 1e-9)
+        windows_per_second = completed / elapsed
+        remaining = self.windows - completed
+        return {'windows': int(completed),
+                'pixels': int(pixels),
+                'megabytes_read': bytes_read / 1e6,
+                'megabytes_written': bytes_written / 1e6,
+                'seconds': elapsed,
+                'windows_per_second': windows_per_second,
+                'pixels_per_second': pixels / elapsed,
+                'eta_seconds': remaining / windows_per_second if windows_per_second > 0 else None}
+
+    def _format(self, snapshot, now, step):
+        stats = self._stats(snapshot, now)
+        progress = int(step / self.detail * 100) if self.detail else 100
+        eta = 'unknown' if stats['eta_seconds'] is None else f'{stats["eta_seconds"]:.0f} s'
+        return (f'\tProgress completed {progress}%... '
+                f'({stats["windows"]}/{self.windows} windows, {stats["windows_per_second"]:.1f} windows/s, '
+                f'{stats["pixels_per_second"] / 1e6:.2f} Mpixels/s, read {stats["megabytes_read"]:.1f} MB, '
+                f'written {stats["megabytes_written"]:.1f} MB, ETA {eta})')
+
+    def finish(self):
+        """
+        Description: prints a summary of the completed work
+        Inputs: none
+        Returned Value: Returns the dictionary of stats
+        Preconditions: none
+        """
+        stats = self.stats()
+        self.output(f'\tCompleted {stats["windows"]} windows in {stats["seconds"]:.1f} s '
+                    f'({stats["windows_per_second"]:.1f} windows/s, {stats["pixels_per_second"] / 1e6:.2f} Mpixels/s, '
+                    f'read {stats["megabytes_read"]:.1f} MB, written {stats["megabytes_written"]:.1f} MB)')
+        return stats
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Tests for compute spectral metrics
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed with pytest in an Anaconda Python 3.12+ distribution.
+# Description: "Tests for compute spectral metrics" checks that the chunked covariate processing matches the processing of the whole dataframe.
+# ---------------------------------------------------------------------------
+
+import pytest
+
+
+# Define a function to create covariate data with missing values
+def covariate_data(n=1000, seed=0):
+    import numpy as np
+    import pandas as pd
+    from akutils.compute_spectral_metrics import S2_BANDS
+
+    rng = np.random.default_rng(seed)
+    data = {'site_code': [f'site_{index}' for index in range(n)]}
+    for season in (1, 2, 3):
+        for polarization in ('vv', 'vh'):
+            for orbit in 'ad':
+                values = rng.integers(-3000, 0, n).astype('float64')
+                values[rng.random(n) < 0.2] = np.nan
+                data[f's1_{season}_{polarization}{orbit}'] = values
+    for band in S2_BANDS:
+        data[f's2_0_{band}'] = rng.integers(0, 10000, n).astype('int32')
+        for season in range(1, 6):
+            values = rng.integers(0, 10000, n).astype('float64')
+            values[rng.random(n) < 0.2] = np.nan
+            data[f's2_{season}_{band}'] = values
+
+    # Add an elevation that is complete in the first 100 rows and missing across the chunk boundary
+    elevation = np.arange(n, dtype='float64') * 3
+    elevation[100:102] = np.nan
+    elevation[550:700] = np.nan
+    data['elevation'] = elevation
+    return pd.DataFrame(data)
+
+
+# Define a function to list the predictors of the covariate data
+def predictor_names(data):
+    from akutils.compute_spectral_metrics import FOLIAR_COVER_INDICES
+
+    predictors = [name for name in data.columns if name.startswith('s1') or name.startswith('s2')]
+    return predictors + [name for name, band_1, band_2 in FOLIAR_COVER_INDICES] + ['elevation']
+
+
+@pytest.mark.parametrize('chunksize', [7, 100, 333, 5000])
+def test_predictor_chunks_match_whole_dataframe(chunksize):
+    import pandas as pd
+    from akutils.compute_spectral_metrics import foliar_cover_predictor_chunks, foliar_cover_predictors
+
+    data = covariate_data()
+    predictors = predictor_names(data)
+    expected = foliar_cover_predictors(data.copy(), predictors)
+    chunks = foliar_cover_predictor_chunks(data, predictors, chunksize=chunksize)
+    pd.testing.assert_frame_equal(pd.concat(list(chunks)), expected, check_exact=True)
+
+
+def test_predictor_chunks_interpolate_integer_columns_across_chunks(tmp_path):
+    import pandas as pd
+    from akutils.compute_spectral_metrics import foliar_cover_predictor_chunks, foliar_cover_predictors
+
+    # Write a CSV file so that the first chunk reads the complete elevation as integers
+    data = covariate_data()
+    predictors = predictor_names(data)
+    source = tmp_path / 'covariates.csv'
+    data.astype({'elevation': 'Int64'}).to_csv(source, index=False)
+    first_chunk = next(pd.read_csv(source, chunksize=100))
+    assert first_chunk['elevation'].dtype.kind == 'i'
+
+    expected = foliar_cover_predictors(pd.read_csv(source), predictors)
+    output = pd.concat(list(foliar_cover_predictor_chunks(source, predictors, chunksize=100)), ignore_index=True)
+    assert output['elevation'].iloc[100:102].tolist() == [300, 303]
+    pd.testing.assert_frame_equal(output, expected, check_exact=True)
+
+
+def test_spectral_features_match_sequential_imputation_with_mixed_data_types():
+    import numpy as np
+    import pandas as pd
+    from akutils.compute_spectral_metrics import compute_spectral_features, impute_band_data
+
+    # Impute band b after band a reads it, in a stage whose data type groups would run the pair that writes b first
+    rng = np.random.default_rng(0)
+    n = 200
+    data = pd.DataFrame({'x': rng.integers(0, 100, n).astype('int32'),
+                         'y': rng.normal(size=n),
+                         'a': np.where(rng.random(n) < 0.3, np.nan, rng.normal(size=n)),
+                         'b': np.where(rng.random(n) < 0.3, -32768, rng.integers(0, 100, n)).astype('int32'),
+                         'c': rng.normal(size=n)})
+    imputes = (('x', 'y'), ('a', 'b'), ('b', 'c'))
+
+    expected = data.copy()
+    for band_1, band_2 in imputes:
+        expected[band_1] = impute_band_data(band_1, band_2, expected)
+    original = data.copy()
+    output = compute_spectral_features(data, imputes)
+    pd.testing.assert_frame_equal(output, expected, check_exact=True)
+    pd.testing.assert_frame_equal(data, original)
+
+
+def test_spectral_rasters_match_spectral_features_and_write_no_data(tmp_path):
+    pytest.importorskip('rasterio')
+    import numpy as np
+    import pandas as pd
+    import rasterio
+    from affine import Affine
+    from akutils.compute_spectral_metrics import compute_spectral_features, compute_spectral_rasters
+
+    # Write a small tiled raster with input no data values, -32768 values, and pixels missing in every band
+    rng = np.random.default_rng(0)
+    band_names = ['red', 'nir', 'red_0']
+    values = rng.integers(1, 10000, size=(3, 40, 50)).astype('int16')
+    values[0][rng.random((40, 50)) < 0.2] = -9999
+    values[0][rng.random((40, 50)) < 0.1] = -32768
+    values[1][rng.random((40, 50)) < 0.1] = -9999
+    values[:, :3, :3] = -9999
+    profile = {'driver': 'GTiff', 'width': 50, 'height': 40, 'count': 3, 'dtype': 'int16', 'nodata': -9999,
+               'crs': 'EPSG:3338', 'transform': Affine(10, 0, 0, 0, -10, 400), 'tiled': True, 'blockxsize': 16,
+               'blockysize': 16}
+    input_file = tmp_path / 'input.tif'
+    with rasterio.open(input_file, 'w', **profile) as input_raster:
+        input_raster.write(values)
+        input_raster.descriptions = tuple(band_names)
+    output_files = {'red': tmp_path / 'red.tif', 'ndvi': tmp_path / 'ndvi.tif'}
+    imputes = [('red', 'red_0')]
+    indices = [('ndvi', 'nir', 'red')]
+
+    # Process the blocks of the raster in parallel
+    compute_spectral_rasters(input_file, output_files, imputes=imputes, indices=indices, n_workers=3)
+    outputs = {}
+    for name, output_file in output_files.items():
+        with rasterio.open(output_file) as output_raster:
+            assert output_raster.nodata == -32768
+            assert output_raster.transform == profile['transform']
+            outputs[name] = output_raster.read(1).ravel()
+
+    # Missing inputs are written as no data
+    covariate_data = pd.DataFrame({name: values[number].ravel().astype('float64')
+                                   for number, name in enumerate(band_names)}).replace([-9999, -32768], np.nan)
+    red_missing = covariate_data['red'].isna() & covariate_data['red_0'].isna()
+    ndvi_missing = red_missing | covariate_data['nir'].isna()
+    assert red_missing.sum() >= 9 and (ndvi_missing & ~red_missing).sum() > 0
+    assert (outputs['red'][red_missing.to_numpy()] == -32768).all()
+    assert (outputs['ndvi'][ndvi_missing.to_numpy()] == -32768).all()
+
+    # Complete pixels match the dataframe processing
+    expected = compute_spectral_features(covariate_data.loc[~ndvi_missing], imputes, indices)
+    np.testing.assert_array_equal(outputs['red'][~ndvi_missing.to_numpy()], expected['red'].to_numpy())
+    np.testing.assert_array_equal(outputs['ndvi'][~ndvi_missing.to_numpy()], expected['ndvi'].to_numpy())
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Tests for determine optimal threshold
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed with pytest in an Anaconda Python 3.12+ distribution.
+# Description: "Tests for determine optimal threshold" checks the vectorized threshold sweep against fixed cases and the per-threshold tests.
+# ---------------------------------------------------------------------------
+
+import pytest
+
+pytest.importorskip('sklearn')
+
+
+def test_grid_threshold_reports_one_step_below_the_minimum_difference():
+    import numpy as np
+    from akutils.determine_optimal_threshold import determine_optimal_threshold, sweep_presence_thresholds
+
+    # Sensitivity and specificity are equal for thresholds above 0.4 up to 0.6
+    probability = np.array([0.1, 0.2, 0.3, 0.4, 0.6, 0.7, 0.8, 0.9])
+    observed = np.array([0, 0, 0, 1, 0, 1, 1, 1])
+    sweep_results = sweep_presence_thresholds(probability, observed)
+    difference = np.absolute(sweep_results['sensitivity'] - sweep_results['specificity'])
+    assert int(np.argmin(difference)) == 400
+    assert sweep_results['threshold'].iloc[400] == 0.401
+
+    # The reported threshold is the grid index divided by 1000 and includes the presence at 0.4
+    threshold, sensitivity, specificity, auc, accuracy = determine_optimal_threshold(probability, observed)
+    assert threshold == 0.4
+    assert (sensitivity, specificity, accuracy) == (1.0, 0.75, 0.875)
+    assert auc == 0.9375
+
+    # The exact threshold is the lowest probability of the minimum difference
+    threshold, sensitivity, specificity, auc, accuracy = determine_optimal_threshold(probability, observed, exact=True)
+    assert threshold == 0.6
+    assert (sensitivity, specificity, accuracy) == (0.75, 0.75, 0.75)
+
+
+def test_grid_sweep_matches_per_threshold_tests_and_exact_mode():
+    import numpy as np
+    from akutils.determine_optimal_threshold import (determine_optimal_threshold, sweep_presence_thresholds,
+                                                     test_presence_threshold)
+
+    # Round the probabilities to the grid so that every distinct probability is also a grid threshold
+    rng = np.random.default_rng(0)
+    observed = (rng.random(500) < 0.3).astype('int32')
+    probability = np.clip(np.round(rng.normal(0.3 + 0.3 * observed, 0.2), 3), 0.001, 1).astype('float32')
+    sweep_results = sweep_presence_thresholds(probability, observed)
+    for index in (0, 250, 333, 500, 999):
+        threshold = (index + 1) / 1000
+        sensitivity, specificity, auc, accuracy = test_presence_threshold(probability, threshold, observed)
+        assert sweep_results['sensitivity'].iloc[index] == sensitivity
+        assert sweep_results['specificity'].iloc[index] == specificity
+        assert sweep_results['accuracy'].iloc[index] == accuracy
+
+    # Exact mode finds the same minimum difference, at a threshold that classifies like the grid minimum
+    difference = np.absolute(sweep_results['sensitivity'] - sweep_results['specificity'])
+    optimal_index = int(np.argmin(difference))
+    grid_metrics = test_presence_threshold(probability, (optimal_index + 1) / 1000, observed)
+    exact_threshold, exact_sensitivity, exact_specificity, exact_auc, exact_accuracy = determine_optimal_threshold(
+        probability, observed, exact=True)
+    assert abs(exact_sensitivity - exact_specificity) == difference.min()
+    assert (exact_sensitivity, exact_specificity, exact_auc, exact_accuracy) == grid_metrics
+
+    # Grid mode keeps the threshold one step below the minimum difference
+    threshold, sensitivity, specificity, auc, accuracy = determine_optimal_threshold(probability, observed)
+    assert threshold == optimal_index / 1000
+    assert (sensitivity, specificity, auc, accuracy) == test_presence_threshold(probability, threshold, observed)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Tests for end timing
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed with pytest in an Anaconda Python 3.12+ distribution.
+# Description: "Tests for end timing" checks the memory recorded for profiled stages.
+# ---------------------------------------------------------------------------
+
+import pytest
+
+pytest.importorskip('resource')
+
+
+def test_stages_record_the_increase_of_the_memory_high_water_mark():
+    import numpy as np
+    from akutils.end_timing import Profiler, peak_rss_mb
+
+    profiler = Profiler()
+
+    # Raise the high-water mark in the first stage, whatever earlier tests used, and stay below it in the second stage
+    with profiler.span('allocate'):
+        block = np.ones(int((peak_rss_mb() + 64) * 1e6 / 8))
+        block.sum()
+    del block
+    with profiler.span('small'):
+        sum(range(1000))
+
+    stages = {stage['path']: stage for stage in profiler.summary()}
+    assert stages['allocate']['peak_rss_increase_mb'] >= 32
+    assert stages['small']['peak_rss_increase_mb'] < 1
+    assert stages['small']['peak_rss_mb'] >= stages['allocate']['peak_rss_mb']
+
+
+def test_written_summary_includes_the_memory_increase(tmp_path):
+    import csv
+    from akutils.end_timing import Profiler
+
+    profiler = Profiler()
+    with profiler.span('stage'):
+        pass
+    output_file = profiler.write(str(tmp_path / 'summary.csv'))
+    with open(output_file, newline='', encoding='utf-8') as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert 'peak_rss_increase_mb' in rows[0]
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Tests for LightGBM to GEE
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed with pytest in an Anaconda Python 3.12+ distribution.
+# Description: "Tests for LightGBM to GEE" checks that the tree string conversions agree with each other and with the booster.
+# ---------------------------------------------------------------------------
+
+import pytest
+
+pytest.importorskip('lightgbm')
+
+
+# Define a function to convert every tree of a booster with treedf_to_string
+def tree_df_strings(booster):
+    from akutils.lgbm_to_gee import lgbm_booster_to_tree_df, treedf_to_string
+
+    tree_df = lgbm_booster_to_tree_df(booster)
+    return [treedf_to_string(group.reset_index(drop=True))
+            for tree_index, group in tree_df.groupby('tree_index', sort=True)]
+
+
+# Define a function to create the tree dataframe of an unbalanced regression tree from lgbm_booster_to_tree_df
+def unbalanced_tree_df():
+    import pandas as pd
+
+    return pd.DataFrame({
+        'node_id': pd.array(range(13), dtype='Int64'),
+        'node_depth': [0, 1, 2, 3, 3, 2, 1, 2, 3, 3, 2, 3, 3],
+        'is_leaf': [False, False, False, True, True, True, False, False, True, True, False, True, True],
+        'children_left': pd.array([1, 2, 3, -1, -1, -1, 7, 8, -1, -1, 11, -1, -1], dtype='Int64'),
+        'children_right': pd.array([6, 5, 4, -1, -1, -1, 10, 9, -1, -1, 12, -1, -1], dtype='Int64'),
+        'value': [17.1546, 16.2861, 15.8768, 15.648824, 16.378208, 17.29379, 18.4574, 17.8966, 17.423019, 18.824054,
+                  19.27, 18.724303, 19.939664],
+        'criterion': [33944.0, 7425.069824, 1463.0, 0.0, 0.0, 0.0, 5468.220215, 3118.52002, 0.0, 0.0, 1790.609985,
+                      0.0, 0.0],
+        'n_samples': [300, 180, 128, 88, 40, 52, 120, 71, 47, 24, 49, 27, 22],
+        'threshold': [11.5, 12.5, 7.5, -2.0, -2.0, -2.0, 12.5, 16.5, -2.0, -2.0, 15.5, -2.0, -2.0],
+        'feature_name': ['a', 'b', 'a', None, None, None, 'b', 'a', None, None, 'a', None, None],
+        'sign': ['<='] * 13})
+
+
+def test_treedf_to_string_matches_the_previous_output_for_an_unbalanced_tree():
+    from akutils.lgbm_to_gee import treedf_to_string
+
+    # The expected string was written by the implementation that inserted the right branches with np.insert
+    expected = ('1) root 300 9999 9999 (53209.420044)\n'
+                '  2) a <= 11.500000 300 33944.0000 17.154600\n'
+                '    4) b <= 12.500000 180 7425.0698 16.286100\n'
+                '      8) a <= 7.500000 88 0.0000 15.648824 *\n'
+                '      9) a > 7.500000 40 0.0000 16.378208 *\n'
+                '    5) b > 12.500000 52 0.0000 17.293790 *\n'
+                '  3) a > 11.500000 300 33944.0000 17.154600\n'
+                '    6) b <= 12.500000 120 5468.2202 18.457400\n'
+                '      12) a <= 16.500000 47 0.0000 17.423019 *\n'
+                '      13) a > 16.500000 24 0.0000 18.824054 *\n'
+                '    7) b > 12.500000 120 5468.2202 18.457400\n'
+                '      14) a <= 15.500000 27 0.0000 18.724303 *\n'
+                '      15) a > 15.500000 22 0.0000 19.939664 *\n')
+    assert treedf_to_string(unbalanced_tree_df()) == expected
+
+
+@pytest.mark.parametrize('params', [{'objective': 'multiclass', 'num_class': 3, 'num_leaves': 15},
+                                    {'num_leaves': 31, 'max_depth': 6},
+                                    {'objective': 'binary', 'num_leaves': 63, 'min_data_in_leaf': 5}])
+def test_treedf_to_string_matches_the_model_dump_strings_on_trained_boosters(params):
+    import numpy as np
+    import pandas as pd
+    import lightgbm as lgb
+    from akutils.lgbm_to_gee import lgbm_booster_to_strings
+
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.normal(size=(2000, 5)), columns=['a', 'b', 'c', 'd', 'e'])
+    y = {'multiclass': (X['a'] + X['b'] > 0).astype(int) + (X['c'] > 1),
+         'regression': X['a'] * X['b'] + rng.normal(size=2000),
+         'binary': (X['a'] > X['d']).astype(int)}[params.get('objective', 'regression')]
+    booster = lgb.train({**params, 'verbosity': -1}, lgb.Dataset(X, y), 5)
+    assert tree_df_strings(booster) == list(lgbm_booster_to_strings(booster))
+
+
+def test_single_leaf_trees_match_treedf_to_string():
+    import numpy as np
+    import pandas as pd
+    import lightgbm as lgb
+    from akutils.lgbm_to_gee import lgbm_booster_to_strings, parse_gee_trees, predict_gee_trees
+
+    # Train trees without splits by requiring more samples per leaf than half of the rows
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(100, 3)), columns=['a', 'b', 'c'])
+    booster = lgb.train({'verbosity': -1, 'min_data_in_leaf': 80}, lgb.Dataset(X, X['a'] + rng.normal(size=100)), 3)
+
+    strings = list(lgbm_booster_to_strings(booster))
+    assert strings == tree_df_strings(booster)
+    assert strings[0] == '1) root None 9999 9999 (0)\n'
+    assert (predict_gee_trees(parse_gee_trees(strings, list(X.columns)), X) == 0).all()
+
+
+@pytest.mark.parametrize('params', [{'objective': 'multiclass', 'num_class': 3, 'num_leaves': 15},
+                                    {'num_leaves': 31, 'max_depth': 6},
+                                    {'objective': 'binary', 'num_leaves': 63, 'min_data_in_leaf': 5}])
+def test_parsed_tree_strings_match_booster_raw_scores(params):
+    import numpy as np
+    import pandas as pd
+    import lightgbm as lgb
+    from akutils.lgbm_to_gee import (compact_tree_string, compare_gee_trees, lgbm_booster_to_strings,
+                                     parse_gee_trees, predict_gee_trees)
+
+    # Use whole-number predictors away from zero so that every threshold lies halfway between observed values
+    rng = np.random.default_rng(2)
+    X = pd.DataFrame(rng.integers(1, 50, size=(2000, 4)).astype('float64'), columns=['a', 'b', 'c', 'd'])
+    y = {'multiclass': (X['a'] + X['b'] > 50).astype(int) + (X['c'] > 35),
+         'regression': X['a'] * X['b'] / 100 + rng.normal(size=2000),
+         'binary': (X['a'] > X['d']).astype(int)}[params.get('objective', 'regression')]
+    booster = lgb.train({**params, 'verbosity': -1}, lgb.Dataset(X, y), 20)
+    n_classes = booster.num_model_per_iteration()
+    strings = list(lgbm_booster_to_strings(booster))
+    assert min(abs(threshold) for threshold in parse_gee_trees(strings, list(X.columns))['threshold']) > 0.5
+
+    # Leaf values are written with six decimals, so scores differ by at most half of the last decimal per tree
+    tolerance = 5e-7 * booster.num_trees() / n_classes + 1e-9
+    booster_score = booster.predict(X, raw_score=True)
+    gee_score = predict_gee_trees(parse_gee_trees(strings, list(X.columns)), X, n_classes=n_classes, chunk_size=1000)
+    np.testing.assert_allclose(gee_score, booster_score, rtol=0, atol=tolerance)
+
+    # Compact strings with feature codes and the "#" line breaks of exported files give the same scores
+    codes = {name: f'f{index}' for index, name in enumerate(X.columns)}
+    compact_strings = [compact_tree_string(string, codes).replace('\n', '#') for string in strings]
+    comparison = compare_gee_trees(booster, compact_strings, X, feature_names=list(codes.values()))
+    assert comparison['max_difference'] <= tolerance
+    np.testing.assert_array_equal(comparison['gee_score'], gee_score)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Tests for optimization for LightGBM
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed with pytest in an Anaconda Python 3.12+ distribution.
+# Description: "Tests for optimization for LightGBM" checks that the binned dataset cross validation matches the estimator cross validation.
+# ---------------------------------------------------------------------------
+
+import pytest
+
+pytest.importorskip('lightgbm')
+
+
+# Define a function to create covariate data with a predictor that is present in 1% of rows
+def low_count_data(n=3000, seed=0):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    predictors = rng.normal(size=(n, 6))
+    predictor_all = [f'x{index}' for index in range(6)] + ['rare']
+    data = pd.DataFrame(predictors, columns=predictor_all[:6])
+    data['rare'] = (rng.random(n) < 0.01).astype(int)
+    logit = predictors[:, 0] + 0.5 * predictors[:, 1] - 0.7 * predictors[:, 2] + 2 * data['rare']
+    data['presence'] = (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(int)
+    data['cover'] = np.clip(30 + 10 * predictors[:, 3] + 20 * data['rare'] + rng.normal(size=n) * 5, 0, 100)
+    data['strata'] = data['presence']
+    data['group'] = rng.integers(0, 200, n)
+    return data, predictor_all
+
+
+@pytest.mark.parametrize('min_child_samples', [5, 40, 150])
+@pytest.mark.parametrize('model_type', ['classifier', 'regressor'])
+def test_binned_cross_validation_matches_estimators(model_type, min_child_samples):
+    from akutils.optimization_lgbm import classifier_fold_plan, regressor_fold_plan
+    from akutils.optimization_lgbm import cross_validate_lgbm, lgbmclassifier_cv, lgbmregressor_cv
+
+    data, predictor_all = low_count_data()
+    parameters = {'num_leaves': 31, 'max_depth': 6, 'learning_rate': 0.1, 'n_estimators': 60,
+                  'min_split_gain': 0.01, 'min_child_weight': 0.01, 'min_child_samples': min_child_samples,
+                  'subsample': 0.7, 'colsample_bytree': 0.5, 'reg_alpha': 0.1, 'reg_lambda': 0.1}
+    fields = (['presence'] if model_type == 'classifier' else ['cover'], ['strata'], ['group'])
+    if model_type == 'classifier':
+        fold_plan = classifier_fold_plan(data, predictor_all, *fields)
+        estimator_score = lgbmclassifier_cv(**parameters, data=data, all_variables=None, predictor_all=predictor_all,
+                                            target_field=fields[0], stratify_field=fields[1], group_field=fields[2],
+                                            fold_plan=fold_plan)
+    else:
+        fold_plan = regressor_fold_plan(data, predictor_all, *fields)
+        estimator_score = lgbmregressor_cv(**parameters, data=data, all_variables=None, predictor_all=predictor_all,
+                                           target_field=fields[0], stratify_field=fields[1], group_field=fields[2],
+                                           fold_plan=fold_plan)
+
+    assert cross_validate_lgbm(model_type, parameters, fold_plan) == pytest.approx(estimator_score, abs=1e-9)
+
+
+def test_binned_datasets_are_shared_by_min_child_samples_that_keep_the_same_features():
+    from akutils.optimization_lgbm import classifier_fold_plan
+
+    data, predictor_all = low_count_data()
+    fold_plan = classifier_fold_plan(data, predictor_all, ['presence'], ['strata'], ['group'])
+
+    # Values below the count of the rare predictor keep it and values above it remove it
+    assert fold_plan.fold_dataset(0, 'classifier', min_child_samples=5) is \
+        fold_plan.fold_dataset(0, 'classifier', min_child_samples=1)
+    assert fold_plan.fold_dataset(0, 'classifier', min_child_samples=150) is \
+        fold_plan.fold_dataset(0, 'classifier', min_child_samples=200)
+    assert fold_plan.fold_dataset(0, 'classifier', min_child_samples=5) is not \
+        fold_plan.fold_dataset(0, 'classifier', min_child_samples=150)
+
+
+def test_resumed_serial_optimization_matches_uninterrupted_run(tmp_path):
+    import json
+    from akutils.optimization_lgbm import optimize_lgbmclassifier
+
+    data, predictor_all = low_count_data(n=600)
+    fields = (['presence'], ['strata'], ['group'])
+    complete_path = tmp_path / 'complete.jsonl'
+    resumed_path = tmp_path / 'resumed.jsonl'
+
+    # Resume from a log interrupted after the random search points and one Bayesian search point
+    expected = optimize_lgbmclassifier(3, 3, data, None, predictor_all, *fields, checkpoint=str(complete_path))
+    lines = complete_path.read_text().splitlines(keepends=True)
+    resumed_path.write_text(''.join(lines[:4]))
+    parameters = optimize_lgbmclassifier(3, 3, data, None, predictor_all, *fields, checkpoint=str(resumed_path))
+
+    def logged_points(path):
+        return [json.loads(line)['params'] for line in path.read_text().splitlines()]
+
+    assert logged_points(resumed_path) == logged_points(complete_path)
+    assert parameters == expected
+
+    # Resuming a completed log does not evaluate any points
+    assert optimize_lgbmclassifier(3, 3, data, None, predictor_all, *fields,
+                                   checkpoint=str(complete_path)) == expected
+    assert len(logged_points(complete_path)) == 6
+
+
+def test_serial_target_optimizations_release_datasets_between_jobs(monkeypatch):
+    from akutils import optimization_lgbm
+
+    data, predictor_all = low_count_data(n=600)
+    data['presence_2'] = 1 - data['presence']
+    optimize_job = optimization_lgbm._optimize_lgbm_job
+    fold_plans = []
+
+    # Check that earlier fold plans hold no datasets when each optimization starts
+    def recorded_job(model_type, fold_plan, *args):
+        assert all(not previous._datasets for previous in fold_plans)
+        fold_plans.append(fold_plan)
+        result = optimize_job(model_type, fold_plan, *args)
+        assert fold_plan._datasets
+        return result
+
+    monkeypatch.setattr(optimization_lgbm, '_optimize_lgbm_job', recorded_job)
+    results = optimization_lgbm.optimize_lgbm_targets(2, 1, data, predictor_all, ['presence', 'presence_2'],
+                                                      ['strata'], ['group'], model_types=('classifier',))
+    assert len(results) == 2
+    assert all(not fold_plan._datasets for fold_plan in fold_plans)
+
+
+def test_resumed_optimization_skips_rungs_of_a_different_pruner():
+    from akutils.optimization_lgbm import LGBM_PBOUNDS, SuccessiveHalvingPruner, run_lgbm_optimization
+
+    # Log points from a pruner that compared scores at rungs 1 and 3
+    lower = {key: float(bounds[0]) for key, bounds in LGBM_PBOUNDS.items()}
+    upper = {key: float(bounds[1]) for key, bounds in LGBM_PBOUNDS.items()}
+    records = [{'params': lower, 'target': 0.5, 'pruned': False, 'rung_scores': {1: 0.5, 3: 0.4}},
+               {'params': upper, 'target': 0.6, 'pruned': False, 'rung_scores': {1: 0.6, 3: 0.5}}]
+
+    def objective(**point):
+        records.append({'params': point, 'target': 0.0, 'pruned': False, 'rung_scores': {}})
+        return 0.0
+
+    pruner = SuccessiveHalvingPruner(rungs=(1, 2))
+    run_lgbm_optimization('classifier', objective, None, 1, 1, pruner=pruner, records=records, verbose=0)
+    assert pruner.rung_scores == {1: [0.5, 0.6], 2: []}
+
+
+@pytest.mark.parametrize('n_logged, n_evaluated', [(6, 0), (4, 2), (1, 5)])
+def test_serial_optimization_counts_logged_points_against_the_iterations(n_logged, n_evaluated):
+    from akutils.optimization_lgbm import LGBM_PBOUNDS, run_lgbm_optimization
+
+    # Log points that the serial optimizer would not suggest, as from a batched run
+    records = [{'params': {key: bounds[0] + (bounds[1] - bounds[0]) * (point_n + 1) / 10
+                           for key, bounds in LGBM_PBOUNDS.items()},
+                'target': 0.1 * point_n, 'pruned': False, 'rung_scores': {}} for point_n in range(n_logged)]
+    evaluated = []
+
+    def objective(**point):
+        evaluated.append(point)
+        records.append({'params': point, 'target': 0.0, 'pruned': False, 'rung_scores': {}})
+        return 0.0
+
+    run_lgbm_optimization('classifier', objective, None, 3, 3, records=records, verbose=0)
+    assert len(evaluated) == n_evaluated
+    assert len(records) == 6
+
+
+def test_optimization_logs_are_not_resumed_with_a_different_mode_or_pruner(tmp_path):
+    from akutils.optimization_lgbm import SuccessiveHalvingPruner, classifier_fold_plan, lgbm_optimization_log
+
+    data, predictor_all = low_count_data(n=600)
+    fold_plan = classifier_fold_plan(data, predictor_all, ['presence'], ['strata'], ['group'])
+    checkpoint = str(tmp_path / 'log.jsonl')
+    log = lgbm_optimization_log(checkpoint, 'classifier', fold_plan, n_workers=2)
+    log.append({'params': {'num_leaves': 10.0}, 'target': 0.5, 'fold_scores': [0.5], 'n_estimators': 100,
+                'pruned': False, 'rung_scores': {}, 'seconds': 1.0})
+
+    assert len(lgbm_optimization_log(checkpoint, 'classifier', fold_plan, n_workers=2, batch_size=2)) == 1
+    assert len(lgbm_optimization_log(checkpoint, 'classifier', fold_plan, n_workers=4, batch_size=2)) == 1
+    assert len(lgbm_optimization_log(checkpoint, 'classifier', fold_plan)) == 0
+    assert len(lgbm_optimization_log(checkpoint, 'classifier', fold_plan, n_workers=4)) == 0
+    assert len(lgbm_optimization_log(checkpoint, 'classifier', fold_plan, n_workers=2,
+                                     pruner=SuccessiveHalvingPruner())) == 0
+
+
+def test_early_stopping_validation_datasets_use_the_parameters_of_their_reference():
+    import warnings
+    from akutils.optimization_lgbm import classifier_fold_plan, train_inner_fold
+
+    data, predictor_all = low_count_data(n=600)
+    fold_plan = classifier_fold_plan(data, predictor_all, ['presence'], ['strata'], ['group'])
+    parameters = {'num_leaves': 31, 'max_depth': 6, 'learning_rate': 0.1, 'n_estimators': 30,
+                  'min_split_gain': 0.01, 'min_child_weight': 0.01, 'min_child_samples': 20,
+                  'subsample': 0.7, 'colsample_bytree': 0.5, 'reg_alpha': 0.1, 'reg_lambda': 0.1}
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        for min_child_samples in (20, 150):
+            parameters['min_child_samples'] = min_child_samples
+            for fold in range(len(fold_plan)):
+                train_inner_fold('classifier', parameters, fold_plan, fold, early_stopping_rounds=5)
+    assert not [warning for warning in caught if 'Reference Dataset' in str(warning.message)]
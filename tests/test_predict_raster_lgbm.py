@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Tests for predict raster for LightGBM
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed with pytest in an Anaconda Python 3.12+ distribution.
+# Description: "Tests for predict raster for LightGBM" checks that windowed raster predictions match predictions of the same covariates in a dataframe.
+# ---------------------------------------------------------------------------
+
+import pytest
+
+pytest.importorskip('rasterio')
+pytest.importorskip('lightgbm')
+
+
+# Define a function to write a small tiled covariate raster with missing values
+def write_covariate_raster(covariate_file):
+    import numpy as np
+    import rasterio
+    from affine import Affine
+
+    # Pixels in the first rows are missing in every band and other pixels are missing in single bands
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 1000, size=(3, 40, 50)).astype('int16')
+    values[0][rng.random((40, 50)) < 0.1] = -9999
+    values[2][rng.random((40, 50)) < 0.1] = -9999
+    values[:, :2, :] = -9999
+    profile = {'driver': 'GTiff', 'width': 50, 'height': 40, 'count': 3, 'dtype': 'int16', 'nodata': -9999,
+               'crs': 'EPSG:3338', 'transform': Affine(10, 0, 0, 0, -10, 400), 'tiled': True, 'blockxsize': 16,
+               'blockysize': 16}
+    with rasterio.open(covariate_file, 'w', **profile) as covariate_raster:
+        covariate_raster.write(values)
+        covariate_raster.descriptions = ('a', 'b', 'c')
+    return values
+
+
+@pytest.mark.parametrize('objective', ['regression', 'binary'])
+def test_raster_predictions_match_dataframe_predictions(tmp_path, objective):
+    import numpy as np
+    import pandas as pd
+    import lightgbm as lgb
+    import rasterio
+    from akutils.predict_raster_lgbm import convert_raster_predictions, predict_lgbm_raster
+
+    # Train a model on covariates with missing values filled as in the raster prediction
+    covariate_file = tmp_path / 'covariates.tif'
+    values = write_covariate_raster(covariate_file)
+    covariate_data = pd.DataFrame({name: values[number].ravel().astype('float64')
+                                   for number, name in enumerate(['a', 'b', 'c'])}).replace(-9999, np.nan)
+    predictors = covariate_data.fillna(-32768).astype('int32')
+    response = predictors['a'] + predictors['b'] - predictors['c'] / 2
+    if objective == 'binary':
+        response = (response > response.median()).astype(int)
+    booster = lgb.train({'objective': objective, 'verbosity': -1, 'num_leaves': 7}, lgb.Dataset(predictors, response),
+                        10)
+    threshold = 0.5 if objective == 'binary' else None
+
+    # Predict the raster in batches of block windows
+    output_file = tmp_path / 'prediction.tif'
+    predict_lgbm_raster(str(covariate_file), ['c', 'a', 'b'], booster, output_file, threshold=threshold, scale=10,
+                        windows_per_batch=2, n_workers=2)
+    with rasterio.open(output_file) as output_raster:
+        assert output_raster.nodata == -32768
+        output = output_raster.read(1).ravel()
+
+    # Pixels missing in every covariate are no data and all other pixels match the dataframe predictions
+    missing = covariate_data.isna().all(axis=1).to_numpy()
+    assert missing.sum() == 100
+    assert (output[missing] == -32768).all()
+    expected = convert_raster_predictions(booster.predict(predictors[['c', 'a', 'b']].to_numpy()),
+                                          threshold=threshold, scale=10)
+    np.testing.assert_array_equal(output[~missing], expected[~missing])
+
+
+def test_raster_prediction_rejects_multiclass_models(tmp_path):
+    import numpy as np
+    import pandas as pd
+    import lightgbm as lgb
+    from akutils.predict_raster_lgbm import predict_lgbm_raster
+
+    covariate_file = tmp_path / 'covariates.tif'
+    write_covariate_raster(covariate_file)
+    rng = np.random.default_rng(0)
+    predictors = pd.DataFrame(rng.normal(size=(300, 3)), columns=['c', 'a', 'b'])
+    booster = lgb.train({'objective': 'multiclass', 'num_class': 3, 'verbosity': -1},
+                        lgb.Dataset(predictors, rng.integers(0, 3, 300)), 2)
+
+    output_file = tmp_path / 'prediction.tif'
+    with pytest.raises(ValueError, match='single-output'):
+        predict_lgbm_raster(str(covariate_file), ['c', 'a', 'b'], booster, output_file)
+    assert not output_file.exists()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Tests for query to dataframe
+# Author: Timm Nawrocki
+# Last Updated: 2026-10-17
+# Usage: Must be executed with pytest in an Anaconda Python 3.12+ distribution.
+# Description: "Tests for query to dataframe" checks that chunked queries close their cursors and return pooled connections.
+# ---------------------------------------------------------------------------
+
+import collections
+
+import pytest
+
+pytest.importorskip('psycopg2')
+
+# Define a column description with the attributes of a psycopg2 column
+Column = collections.namedtuple('Column', ['name', 'type_code'])
+
+
+# Define a class to stand in for a server-side cursor over a table of integers
+class TableCursor:
+
+    def __init__(self, n_rows):
+        self.rows = [(row_n, row_n * 2) for row_n in range(n_rows)]
+        self.description = [Column('id', 23), Column('value', 23)]
+        self.closed = False
+        self.itersize = None
+
+    def execute(self, query, parameters=None):
+        pass
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+# Define a class to stand in for a connection
+class TableConnection:
+
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+        self.autocommit = False
+        self.cursors = []
+
+    def cursor(self, name=None, withhold=False):
+        self.cursors.append(TableCursor(self.n_rows))
+        return self.cursors[-1]
+
+
+# Define a class to stand in for a pool that hands out one connection
+class TablePool:
+
+    def __init__(self, n_rows):
+        self.connection = TableConnection(n_rows)
+        self.cursors = self.connection.cursors
+        self.in_use = 0
+
+    def acquire(self):
+        self.in_use += 1
+        return self.connection
+
+    def release(self, connection):
+        self.in_use -= 1
+
+
+def test_pooled_chunks_release_the_connection_when_exhausted():
+    from akutils.query_to_dataframe import query_to_dataframe
+
+    pool = TablePool(25)
+    chunks = query_to_dataframe(pool, 'select * from site', itersize=10, chunks=True)
+    assert pool.in_use == 1
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert pool.in_use == 0
+    assert pool.cursors[0].closed
+
+
+@pytest.mark.parametrize('consumed', [0, 1])
+def test_pooled_chunks_release_the_connection_when_closed_or_dropped(consumed):
+    import gc
+    from akutils.query_to_dataframe import query_to_dataframe
+
+    # Close the chunks explicitly
+    pool = TablePool(25)
+    chunks = query_to_dataframe(pool, 'select * from site', itersize=10, chunks=True)
+    for chunk_n in range(consumed):
+        next(chunks)
+    chunks.close()
+    chunks.close()
+    assert pool.in_use == 0
+    assert pool.cursors[0].closed
+
+    # Drop the chunks without closing them
+    chunks = query_to_dataframe(pool, 'select * from site', itersize=10, chunks=True)
+    for chunk_n in range(consumed):
+        next(chunks)
+    del chunks
+    gc.collect()
+    assert pool.in_use == 0
+    assert pool.cursors[1].closed
+
+
+def test_chunked_queries_are_timed_while_consumed():
+    from akutils.end_timing import disable_profiling, enable_profiling
+    from akutils.query_to_dataframe import query_to_dataframe
+
+    pool = TablePool(25)
+    profiler = enable_profiling()
+    try:
+        chunks = query_to_dataframe(pool, 'select * from site', itersize=10, chunks=True)
+        assert [record['name'] for record in profiler.records if record['name'] == 'query_chunk'] == []
+        assert sum(len(chunk) for chunk in chunks) == 25
+    finally:
+        disable_profiling()
+
+    # Each chunk and the final empty fetch are timed as top-level stages
+    stages = {stage['path']: stage for stage in profiler.summary()}
+    assert stages['query_chunk']['count'] == 4
+    assert stages['query_chunk']['errors'] == 0
+    assert 'query' in stages
+
+
+# Define a class to stand in for a cursor that exports rows with COPY as PostgreSQL does
+class CopyCursor:
+
+    def __init__(self, rows, error=None):
+        self.rows = rows
+        self.error = error
+        self.description = None
+        self.copy_file = None
+
+    def execute(self, query, parameters=None):
+        self.description = [Column('id', 23), Column('name', 25)]
+
+    def copy_expert(self, sql, copy_file):
+        import re
+
+        # Write nulls with the marker of the COPY statement and quote empty strings as PostgreSQL does
+        self.copy_file = copy_file
+        null = re.search(r"NULL '([^']*)'", sql)
+        null = '' if null is None else null.group(1)
+        lines = ['id,name']
+        for row in self.rows:
+            lines.append(','.join(null if value is None else ('""' if value == '' else str(value)) for value in row))
+        copy_file.write(('\n'.join(lines) + '\n').encode())
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        pass
+
+
+# Define a class to stand in for a connection with a copy cursor
+class CopyConnection:
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def test_copy_query_reads_empty_strings_and_nulls_as_fetched_queries_do():
+    pytest.importorskip('pyarrow')
+    from akutils.query_to_dataframe import copy_query_to_dataframe
+
+    rows = [(1, ''), (2, None), (None, '\\N'), (4, 'text')]
+    query_result = copy_query_to_dataframe(CopyConnection(CopyCursor(rows)), 'select * from site', engine='pyarrow')
+    assert query_result['id'].isna().tolist() == [False, False, True, False]
+    assert query_result['name'].tolist()[0] == ''
+    assert query_result['name'].isna().tolist() == [False, True, False, False]
+    assert query_result['name'].tolist()[2:] == ['\\N', 'text']
+
+
+@pytest.mark.parametrize('buffer', ['memory', 'file'])
+def test_copy_query_closes_the_export_when_the_query_fails(buffer):
+    import psycopg2
+    from akutils.query_to_dataframe import copy_query_to_dataframe
+
+    cursor = CopyCursor([(1, 'text')], error=psycopg2.DatabaseError('copy failed'))
+    assert copy_query_to_dataframe(CopyConnection(cursor), 'select * from site', buffer=buffer, engine='c') == 1
+    assert cursor.copy_file.closed